@@ -1,17 +1,34 @@
 """Agent 2: Corporate Intelligence - Ownership graphs and assignee resolution."""
 
+from datetime import date
+from typing import Optional
+
 from knot.agents.base import BaseAgent
 from knot.services.graph_traversal import find_ultimate_parent, get_all_subsidiaries, resolve_assignee_to_company
+from knot.services.ownership import effective_holdings, effective_owners
+from knot.services.reachability import ReachabilityIndex
 from knot.stores.graph_store import GraphStore
 from knot.stores.patent_store import PatentStore
+from knot.stores.portfolio import PortfolioRollup
+
+# Patent ids returned per resolve_parent call unless the payload asks for another page size
+DEFAULT_PATENT_PAGE_SIZE = 100
 
 
 class CorporateIntelAgent(BaseAgent):
     agent_name = "corporate_intel"
 
-    def __init__(self, graph_store: GraphStore, patent_store: PatentStore):
+    def __init__(
+        self,
+        graph_store: GraphStore,
+        patent_store: PatentStore,
+        portfolios: Optional[PortfolioRollup] = None,
+        reachability: Optional[ReachabilityIndex] = None,
+    ):
         self.graph_store = graph_store
         self.patent_store = patent_store
+        self.portfolios = portfolios or PortfolioRollup(graph_store, patent_store)
+        self.reachability = reachability or ReachabilityIndex(graph_store)
 
     def execute(self, task_type: str, payload: dict) -> dict:
         if task_type == "resolve_parent":
@@ -20,9 +37,21 @@ class CorporateIntelAgent(BaseAgent):
             return self._get_graph(payload)
         elif task_type == "resolve_assignees":
             return self._resolve_assignees(payload)
+        elif task_type == "effective_ownership":
+            return self._effective_ownership(payload)
+        elif task_type == "check_control":
+            return self._check_control(payload)
         else:
             raise ValueError(f"Unknown task type: {task_type}")
 
+    @staticmethod
+    def _as_of(payload: dict) -> Optional[date]:
+        """Point in time to evaluate ownership at; accepts a date or ISO string."""
+        as_of = payload.get("as_of")
+        if isinstance(as_of, str):
+            return date.fromisoformat(as_of) if as_of else None
+        return as_of
+
     def _resolve_parent(self, payload: dict) -> dict:
         company_name = payload.get("company_name", "")
         company_id = payload.get("company_id", "")
@@ -40,17 +69,21 @@ class CorporateIntelAgent(BaseAgent):
                 "confidence_score": 0.0,
             }
 
-        parent_id = find_ultimate_parent(self.graph_store, company.id)
+        as_of = self._as_of(payload)
+        parent_id = find_ultimate_parent(self.graph_store, company.id, as_of)
         parent = self.graph_store.get_company(parent_id)
-        subsidiaries = get_all_subsidiaries(self.graph_store, parent_id)
 
-        # Get all patents owned by the parent and its subsidiaries
-        all_entity_ids = [parent_id] + subsidiaries
-        patent_ids = []
-        for eid in all_entity_ids:
-            entity = self.graph_store.get_company(eid)
-            if entity:
-                patent_ids.extend(entity.patent_ids)
+        # Companies the parent ultimately controls, and their patents
+        if as_of is None:
+            portfolio = self.portfolios.get(parent_id)
+        else:
+            # The materialized view is current-only; rebuild the group as it stood then
+            portfolio = self.portfolios.build(
+                cid for cid in [parent_id] + get_all_subsidiaries(self.graph_store, parent_id, as_of)
+                if find_ultimate_parent(self.graph_store, cid, as_of) == parent_id
+            )
+        offset = payload.get("offset", 0)
+        limit = payload.get("limit", DEFAULT_PATENT_PAGE_SIZE)
 
         return {
             "resolved": True,
@@ -59,10 +92,16 @@ class CorporateIntelAgent(BaseAgent):
             "query_company_type": company.company_type,
             "ultimate_parent_id": parent_id,
             "ultimate_parent_name": parent.canonical_name if parent else None,
-            "subsidiary_count": len(subsidiaries),
-            "subsidiaries": subsidiaries,
-            "total_patents": len(patent_ids),
-            "patent_ids": patent_ids,
+            "subsidiary_count": len(portfolio.companies) - (parent_id in portfolio.companies),
+            "subsidiaries": self.portfolios.member_ids(portfolio, parent_id, offset, limit),
+            "total_patents": len(portfolio),
+            "patent_ids": self.portfolios.patent_ids(portfolio, offset, limit),
+            "offset": offset,
+            "limit": limit,
+            "patents_by_jurisdiction": dict(portfolio.by_jurisdiction.most_common()),
+            "patents_by_status": dict(portfolio.by_status.most_common()),
+            "patents_by_classification": dict(portfolio.by_classification.most_common()),
+            "as_of": as_of.isoformat() if as_of else None,
             "confidence_score": 0.95,
         }
 
@@ -72,7 +111,15 @@ class CorporateIntelAgent(BaseAgent):
         if not company:
             return {"error": "Company not found", "confidence_score": 0.0}
 
-        graph = self.graph_store.get_ownership_graph(company_id)
+        as_of = self._as_of(payload)
+        graph = self.graph_store.get_ownership_graph(
+            company_id,
+            as_of,
+            max_depth=payload.get("max_depth"),
+            direction=payload.get("direction", "both"),
+            max_nodes=payload.get("max_nodes"),
+            cursor=payload.get("cursor"),
+        )
         return {
             "company_id": company_id,
             "company_name": company.canonical_name,
@@ -95,21 +142,124 @@ class CorporateIntelAgent(BaseAgent):
                 }
                 for e in graph.edges
             ],
+            "frontier": graph.frontier,
+            "next_cursor": graph.next_cursor,
+            "as_of": as_of.isoformat() if as_of else None,
             "confidence_score": 0.95,
         }
 
+    def _find_company_id(self, name_or_id: str) -> Optional[str]:
+        company = self.graph_store.get_company(name_or_id) or self.graph_store.find_company_by_name(name_or_id)
+        return company.id if company else None
+
     def _resolve_assignees(self, payload: dict) -> dict:
         assignees = payload.get("assignees", [])
+        as_of = self._as_of(payload)
+        # Optional companies (names or ids) to test each assignee against, e.g. the client's own group
+        owner_ids = [oid for oid in map(self._find_company_id, payload.get("owners", [])) if oid]
+        historical_holdings: dict[str, set[str]] = {}
+
         results = []
+        groups: dict[str, dict] = {}
         for assignee in assignees:
-            result = resolve_assignee_to_company(self.graph_store, assignee)
+            result = resolve_assignee_to_company(self.graph_store, assignee, as_of)
+            if result["resolved"]:
+                company_id = result["company_id"]
+                group = groups.setdefault(result["ultimate_parent_id"], {
+                    "ultimate_parent_id": result["ultimate_parent_id"],
+                    "ultimate_parent_name": result["ultimate_parent_name"],
+                    "assignees": [],
+                })
+                group["assignees"].append(assignee)
+                if owner_ids:
+                    if as_of is None:
+                        controlled_by = [o for o in owner_ids if o == company_id or self.reachability.controls(o, company_id)]
+                    else:
+                        # The reachability index reflects current ownership only; walk the historical graph
+                        controlled_by = [
+                            o for o in owner_ids
+                            if o == company_id or company_id in historical_holdings.setdefault(
+                                o, set(get_all_subsidiaries(self.graph_store, o, as_of)))
+                        ]
+                    result["controlled_by"] = controlled_by
             results.append(result)
 
         resolved_count = sum(1 for r in results if r["resolved"])
         return {
             "assignee_resolutions": results,
+            "groups": list(groups.values()),
             "total": len(assignees),
             "resolved_count": resolved_count,
             "resolution_rate": resolved_count / max(len(assignees), 1),
             "confidence_score": resolved_count / max(len(assignees), 1),
         }
+
+    def _check_control(self, payload: dict) -> dict:
+        owner_id = self._find_company_id(payload.get("owner", ""))
+        company_id = self._find_company_id(payload.get("company", ""))
+        if not owner_id or not company_id:
+            return {"resolved": False, "error": "Company not found", "confidence_score": 0.0}
+        return {
+            "resolved": True,
+            "owner_id": owner_id,
+            "company_id": company_id,
+            "controls": self.reachability.controls(owner_id, company_id),
+            "confidence_score": 0.95,
+        }
+
+    def _effective_ownership(self, payload: dict) -> dict:
+        company_id = payload.get("company_id", "")
+        company_name = payload.get("company_name", "")
+        direction = payload.get("direction", "holdings")
+        min_percentage = payload.get("min_percentage", 0.0)
+        control_threshold = payload.get("control_threshold", 50.0)
+
+        if direction not in ("holdings", "owners"):
+            raise ValueError(f"Unknown direction: {direction}")
+
+        if company_id:
+            company = self.graph_store.get_company(company_id)
+        else:
+            company = self.graph_store.find_company_by_name(company_name)
+        if not company:
+            return {
+                "resolved": False,
+                "company_name": company_name or company_id,
+                "error": "Company not found",
+                "confidence_score": 0.0,
+            }
+
+        if direction == "holdings":
+            stakes = effective_holdings(self.graph_store, company.id)
+        else:
+            stakes = effective_owners(self.graph_store, company.id)
+
+        entries = []
+        for cid, percentage in sorted(stakes.items(), key=lambda item: item[1], reverse=True):
+            if percentage < min_percentage:
+                continue
+            other = self.graph_store.get_company(cid)
+            entries.append({
+                "company_id": cid,
+                "company_name": other.canonical_name if other else None,
+                "company_type": other.company_type if other else None,
+                "effective_percentage": round(percentage, 4),
+                "controlled": percentage >= control_threshold,
+                "patent_count": len(other.patent_ids) if other else 0,
+            })
+
+        # Patents attributable to the company: its own plus those of entities it effectively controls
+        attributed = len(company.patent_ids) if direction == "holdings" else 0
+        if direction == "holdings":
+            attributed += sum(e["patent_count"] for e in entries if e["controlled"])
+
+        return {
+            "resolved": True,
+            "company_id": company.id,
+            "company_name": company.canonical_name,
+            "direction": direction,
+            "entries": entries,
+            "total": len(entries),
+            "attributed_patent_count": attributed,
+            "confidence_score": 0.9,
+        }
@@ -1,19 +1,22 @@
 """Agent 7: FTO Risk Analyst - Claim-by-claim analysis, risk levels, exclude expired."""
 
 from datetime import date
+from typing import Optional
 
 from knot.agents.base import BaseAgent
 from knot.models.fto import ClaimMatch, InfringementAnalysis, FTOReport
 from knot.services.similarity import claim_text_similarity, determine_risk_level
 from knot.services.text_processing import extract_keywords
+from knot.stores.family import FamilyIndex
 from knot.stores.patent_store import PatentStore
 
 
 class FTOAnalystAgent(BaseAgent):
     agent_name = "fto_analyst"
 
-    def __init__(self, patent_store: PatentStore):
+    def __init__(self, patent_store: PatentStore, families: Optional[FamilyIndex] = None):
         self.patent_store = patent_store
+        self.families = families or FamilyIndex(patent_store)
 
     def execute(self, task_type: str, payload: dict) -> dict:
         if task_type == "analyze_fto":
@@ -27,38 +30,50 @@ class FTOAnalystAgent(BaseAgent):
         description = payload.get("description", "")
         target_markets = payload.get("target_markets", [])
         keywords = payload.get("keywords", [])
+        statuses = payload.get("statuses", [])
+        collapse_families = payload.get("collapse_families", False)
 
         if not keywords:
             keywords = extract_keywords(description)
 
-        # Search for relevant patents
-        patents = self.patent_store.search_by_keywords(keywords, target_markets if target_markets else None)
-
-        if not patents and target_markets:
-            # Try without jurisdiction filter
-            patents = self.patent_store.search_by_keywords(keywords)
+        # Search for relevant patents; jurisdiction and status filters are
+        # applied by the store's bitmap indexes, so every hit is in a target market.
+        patents = self.patent_store.search_by_keywords(
+            keywords,
+            target_markets if target_markets else None,
+            statuses if statuses else None,
+        )
 
         analyses = []
         today = date.today()
 
-        for patent in patents:
-            # Skip expired patents
-            if patent.status == "expired" or (patent.expiry_date and patent.expiry_date < today):
-                continue
+        # Skip expired patents
+        live = [
+            p for p in patents
+            if not (p.status == "expired" or (p.expiry_date and p.expiry_date < today))
+        ]
+
+        # In family-collapsed mode only one representative per family is analyzed
+        groups = self.families.collapse(live) if collapse_families else [[p] for p in live]
 
-            # Check jurisdiction overlap
-            if target_markets:
-                jurisdiction_overlap = any(j in patent.jurisdictions for j in target_markets)
-                if not jurisdiction_overlap:
-                    continue
+        # Claim keywords were extracted and interned when each patent was added,
+        # so only the description is tokenized per request.
+        claim_vocabulary = self.patent_store.claim_vocabulary
+        description_keywords = set(extract_keywords(description))
+        description_ids = claim_vocabulary.encode(description_keywords)
 
+        for group in groups:
+            patent = group[0]
             # Claim-by-claim analysis
             claim_matches = []
             max_risk = "low"
 
-            for claim in patent.claims:
-                sim, matched_kw = claim_text_similarity(claim.text, description)
+            for claim, claim_ids in zip(patent.claims, self.patent_store.claim_keyword_ids(patent.id)):
+                shared = description_ids & claim_ids
+                union = len(description_keywords) + len(claim_ids) - len(shared)
+                sim = len(shared) / union if description_keywords and claim_ids else 0.0
                 if sim > 0.05:  # Low threshold to catch potential matches
+                    matched_kw = sorted(claim_vocabulary.decode(shared))
                     risk = determine_risk_level(sim)
                     claim_matches.append(ClaimMatch(
                         patent_id=patent.id,
@@ -89,6 +104,7 @@ class FTOAnalystAgent(BaseAgent):
                     overall_risk=max_risk,
                     claim_matches=claim_matches,
                     recommendation=rec,
+                    **(self._family_fields(group) if collapse_families else {}),
                 ))
 
         # Sort by risk level
@@ -126,6 +142,13 @@ class FTOAnalystAgent(BaseAgent):
             "confidence_score": 0.85,
         }
 
+    def _family_fields(self, group: list) -> dict:
+        return {
+            "family_id": self.families.family_id(group[0].id),
+            "family_members": [p.id for p in group],
+            "jurisdictions": sorted({j for p in group for j in p.jurisdictions}),
+        }
+
     def _check_single_patent(self, payload: dict) -> dict:
         patent_id = payload.get("patent_id", "")
         description = payload.get("description", "")
@@ -1,20 +1,38 @@
 """Agent 5: Integration Agent - Data unification, duplicate detection, conflict resolution."""
 
+from typing import Optional
+
 from knot.agents.base import BaseAgent
-from knot.services.similarity import keyword_similarity
-from knot.services.text_processing import normalize_text
+from knot.models.patent import Patent
+from knot.services.similarity import keyword_id_similarity, similarity_join
+from knot.stores.family import FamilyIndex
+from knot.stores.indexes import DisjointSet
 from knot.stores.patent_store import PatentStore
 
+# Keyword Jaccard above which two patents are reported as duplicates
+DUPLICATE_KEYWORD_THRESHOLD = 0.6
+# Estimated shingle (MinHash) similarity above which a record is flagged as a near-duplicate
+NEAR_DUPLICATE_THRESHOLD = 0.5
+
 
 class IntegrationAgent(BaseAgent):
     agent_name = "integration"
 
-    def __init__(self, patent_store: PatentStore):
+    def __init__(self, patent_store: PatentStore, families: Optional[FamilyIndex] = None):
         self.patent_store = patent_store
+        self.families = families or FamilyIndex(patent_store)
 
     def execute(self, task_type: str, payload: dict) -> dict:
         if task_type == "detect_duplicates":
             return self._detect_duplicates(payload)
+        elif task_type == "detect_duplicates_bulk":
+            return self._detect_duplicates_bulk(payload)
+        elif task_type == "find_near_duplicates":
+            return self._find_near_duplicates(payload)
+        elif task_type == "ingest_patent":
+            return self._ingest_patent(payload)
+        elif task_type == "get_family":
+            return self._get_family(payload)
         elif task_type == "unify_records":
             return self._unify_records(payload)
         elif task_type == "resolve_conflict":
@@ -28,22 +46,19 @@ class IntegrationAgent(BaseAgent):
         if not patent:
             raise ValueError(f"Patent {patent_id} not found")
 
+        # Only patents sharing the normalized title or a keyword can be duplicates
+        title_ids = {other.id for other in self.patent_store.same_title(patent.title)}
+        kw_scores = {other.id: sim for other, sim in self.patent_store.similar_by_keywords(patent.keywords)}
+        candidates = sorted((title_ids | kw_scores.keys()) - {patent_id}, key=self.patent_store.doc_number)
+
         duplicates = []
-        all_patents = self.patent_store.get_all()
-        normalized_title = normalize_text(patent.title)
-
-        for other in all_patents:
-            if other.id == patent_id:
-                continue
-            # Check for duplicates by title similarity and keyword overlap
-            other_title = normalize_text(other.title)
-            title_match = normalized_title == other_title
-            kw_sim = keyword_similarity(patent.keywords, other.keywords)
-
-            if title_match or kw_sim > 0.6:
+        for other_id in candidates:
+            title_match = other_id in title_ids
+            kw_sim = kw_scores.get(other_id, 0.0)
+            if title_match or kw_sim > DUPLICATE_KEYWORD_THRESHOLD:
                 duplicates.append({
-                    "patent_id": other.id,
-                    "title": other.title,
+                    "patent_id": other_id,
+                    "title": self.patent_store.get(other_id).title,
                     "similarity": kw_sim,
                     "match_type": "title" if title_match else "keywords",
                 })
@@ -55,6 +70,115 @@ class IntegrationAgent(BaseAgent):
             "confidence_score": 0.85,
         }
 
+    def _detect_duplicates_bulk(self, payload: dict) -> dict:
+        """Duplicate groups across the whole store (or the given patent ids) in one pass.
+
+        Exact normalized-title matches come from the title index; keyword
+        near-duplicates from a prefix-filtered similarity join, so pairs that
+        share no rare keyword are never compared.
+        """
+        threshold = payload.get("threshold", DUPLICATE_KEYWORD_THRESHOLD)
+        patent_ids = payload.get("patent_ids")
+        if patent_ids is None:
+            patent_ids = [p.id for p in self.patent_store.get_all()]
+        patent_ids = list(dict.fromkeys(pid for pid in patent_ids if self.patent_store.get(pid)))
+        position = {pid: i for i, pid in enumerate(patent_ids)}
+
+        pairs: dict[tuple[int, int], dict] = {}
+        keyword_ids = [self.patent_store.keyword_ids(pid) for pid in patent_ids]
+        for i, j, sim in similarity_join(keyword_ids, threshold):
+            pairs[(i, j)] = {"similarity": sim, "match_type": "keywords"}
+        for group in self.patent_store.title_groups():
+            members = [position[pid] for pid in group if pid in position]
+            for a, i in enumerate(members):
+                for j in members[a + 1:]:
+                    sim = keyword_id_similarity(set(keyword_ids[i]), len(keyword_ids[i]), keyword_ids[j])
+                    pairs[(min(i, j), max(i, j))] = {"similarity": sim, "match_type": "title"}
+
+        components = DisjointSet()
+        for i, j in sorted(pairs):
+            components.union(i, j)
+        groups: dict[int, dict] = {}
+        for i, j in sorted(pairs):
+            group = groups.setdefault(components.find(i), {"patent_ids": set(), "pairs": []})
+            group["patent_ids"].update((i, j))
+            group["pairs"].append({"patent_id_a": patent_ids[i], "patent_id_b": patent_ids[j], **pairs[(i, j)]})
+
+        duplicate_groups = [
+            {"patent_ids": [patent_ids[i] for i in sorted(group["patent_ids"])], "pairs": group["pairs"]}
+            for group in sorted(groups.values(), key=lambda g: min(g["patent_ids"]))
+        ]
+        return {
+            "patents_checked": len(patent_ids),
+            "duplicate_groups": duplicate_groups,
+            "group_count": len(duplicate_groups),
+            "duplicate_count": sum(len(g["patent_ids"]) for g in duplicate_groups),
+            "confidence_score": 0.85,
+        }
+
+    def _near_duplicates(self, patent: Patent, threshold: float) -> list[dict]:
+        return [
+            {
+                "patent_id": other.id,
+                "title": other.title,
+                "source": other.source,
+                "similarity": sim,
+                "cross_office": other.source != patent.source,
+            }
+            for other, sim in self.patent_store.near_duplicates(patent, threshold)
+        ]
+
+    def _find_near_duplicates(self, payload: dict) -> dict:
+        """Near-duplicates of a stored patent (`patent_id`) or an incoming record (`patent`)."""
+        if "patent" in payload:
+            patent = Patent.model_validate(payload["patent"])
+        else:
+            patent_id = payload.get("patent_id")
+            patent = self.patent_store.get(patent_id)
+            if not patent:
+                raise ValueError(f"Patent {patent_id} not found")
+
+        near = self._near_duplicates(patent, payload.get("threshold", NEAR_DUPLICATE_THRESHOLD))
+        return {
+            "patent_id": patent.id,
+            "near_duplicates": near,
+            "duplicate_count": len(near),
+            "confidence_score": 0.8,
+        }
+
+    def _ingest_patent(self, payload: dict) -> dict:
+        """Store an incoming record, flagging near-duplicates already held (from any office)."""
+        patent = Patent.model_validate(payload.get("patent", {}))
+        near = self._near_duplicates(patent, payload.get("threshold", NEAR_DUPLICATE_THRESHOLD))
+        self.patent_store.add(patent)
+        return {
+            "patent_id": patent.id,
+            "stored": True,
+            "family_id": self.families.family_id(patent.id),
+            "near_duplicates": near,
+            "cross_office_duplicates": [d["patent_id"] for d in near if d["cross_office"]],
+            "confidence_score": 0.8,
+        }
+
+    def _get_family(self, payload: dict) -> dict:
+        patent_id = payload.get("patent_id")
+        family_id = self.families.family_id(patent_id)
+        if family_id is None:
+            raise ValueError(f"Patent {patent_id} not found")
+
+        members = [self.patent_store.get(pid) for pid in self.families.members(family_id)]
+        return {
+            "family_id": family_id,
+            "representative_id": self.families.representative(family_id),
+            "members": [
+                {"patent_id": p.id, "source": p.source, "publication_number": p.publication_number,
+                 "jurisdictions": p.jurisdictions}
+                for p in members
+            ],
+            "jurisdictions": sorted({j for p in members for j in p.jurisdictions}),
+            "confidence_score": 0.85,
+        }
+
     def _unify_records(self, payload: dict) -> dict:
         patent_ids = payload.get("patent_ids", [])
         patents = [self.patent_store.get(pid) for pid in patent_ids]
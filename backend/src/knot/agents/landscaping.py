@@ -1,17 +1,33 @@
 """Agent 6: Landscaping Specialist - Clustering and white space detection."""
 
+from typing import Optional
+
 from knot.agents.base import BaseAgent
 from knot.models.landscape import PatentCluster, WhiteSpace, RankedOpportunity, LandscapeReport
-from knot.services.clustering import cluster_patents, identify_white_spaces
+from knot.services.clustering import ClusterIndex, identify_white_spaces
 from knot.services.text_processing import extract_keywords
+from knot.stores.family import FamilyIndex
 from knot.stores.patent_store import PatentStore
 
 
 class LandscapingAgent(BaseAgent):
     agent_name = "landscaping"
 
-    def __init__(self, patent_store: PatentStore):
+    def __init__(
+        self,
+        patent_store: PatentStore,
+        families: Optional[FamilyIndex] = None,
+        clusters: Optional[ClusterIndex] = None,
+    ):
         self.patent_store = patent_store
+        self.families = families or FamilyIndex(patent_store)
+        self.clusters = clusters or ClusterIndex(patent_store)
+
+    def _representatives(self, patents: list, payload: dict) -> list:
+        """One patent per family when the payload asks for family-collapsed results."""
+        if not payload.get("collapse_families", False):
+            return patents
+        return [group[0] for group in self.families.collapse(patents)]
 
     def execute(self, task_type: str, payload: dict) -> dict:
         if task_type == "analyze_landscape":
@@ -33,9 +49,10 @@ class LandscapingAgent(BaseAgent):
         if not patents:
             # Broaden search
             patents = self.patent_store.get_all()
+        patents = self._representatives(patents, payload)
 
-        # Cluster patents
-        clusters = cluster_patents(patents)
+        # Clusters are maintained as patents arrive; narrow them to the domain
+        clusters = self.clusters.clusters_for(patents)
 
         # Identify white spaces
         all_domain_keywords = set(domain_keywords)
@@ -88,8 +105,8 @@ class LandscapingAgent(BaseAgent):
 
     def _find_white_spaces(self, payload: dict) -> dict:
         keywords = payload.get("keywords", [])
-        patents = self.patent_store.search_by_keywords(keywords)
-        clusters = cluster_patents(patents)
+        patents = self._representatives(self.patent_store.search_by_keywords(keywords), payload)
+        clusters = self.clusters.clusters_for(patents)
 
         all_kw = set(keywords)
         for p in patents:
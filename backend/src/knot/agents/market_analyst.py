@@ -2,7 +2,7 @@
 
 from knot.agents.base import BaseAgent
 from knot.models.product import ProductMatch
-from knot.services.similarity import keyword_similarity, claim_text_similarity
+from knot.services.similarity import jaccard_many_to_many, jaccard_similarity
 from knot.services.text_processing import extract_keywords
 from knot.stores.patent_store import PatentStore
 from knot.stores.search_store import SearchStore
@@ -29,33 +29,40 @@ class MarketAnalystAgent(BaseAgent):
         if not patent:
             raise ValueError(f"Patent {patent_id} not found")
 
-        products = self.search_store.get_all_products()
-        matches = []
-
-        for product in products:
-            # Compare patent keywords with product description keywords
-            product_keywords = extract_keywords(f"{product.name} {product.description}")
-            sim = keyword_similarity(patent.keywords, product_keywords)
-
+        # Only products sharing a keyword can clear the threshold; their keywords were extracted at add time
+        products = self.search_store.product_candidates(patent.keywords)
+        product_keywords = [self.search_store.product_keywords(product.id) for product in products]
+        patent_keywords = {k.lower() for k in patent.keywords}
+        hits = []
+        for i, keywords in enumerate(product_keywords):
+            sim = jaccard_similarity(patent_keywords, set(keywords))
             if sim > 0.1:
-                # Check claim-level matching
-                matching_claims = []
-                for claim in patent.claims:
-                    claim_sim, matched_kw = claim_text_similarity(claim.text, product.description)
-                    if claim_sim > 0.1:
-                        matching_claims.append(claim.number)
+                hits.append((i, sim))
+
+        # Claim-level matching: every claim against every matched product description at once;
+        # claim and description keywords were extracted when the records were added
+        claim_vocabulary = self.patent_store.claim_vocabulary
+        claim_matches: dict[int, list[int]] = {}
+        for claim_index, hit_index, _ in jaccard_many_to_many(
+            [set(claim_vocabulary.decode(ids)) for ids in self.patent_store.claim_keyword_ids(patent.id)],
+            [self.search_store.product_description_keywords(products[i].id) for i, _ in hits],
+            threshold=0.1,
+        ):
+            claim_matches.setdefault(hit_index, []).append(patent.claims[claim_index].number)
 
-                match = ProductMatch(
-                    patent_id=patent_id,
-                    product_id=product.id,
-                    product_name=product.name,
-                    manufacturer=product.manufacturer,
-                    confidence_score=min(sim * 2, 1.0),  # Scale up for readability
-                    matching_claims=matching_claims,
-                    evidence=[f"Keyword overlap: {sim:.2f}"],
-                    matched_keywords=sorted(set(patent.keywords) & set(product_keywords)),
-                )
-                matches.append(match)
+        matches = []
+        for hit_index, (i, sim) in enumerate(hits):
+            product = products[i]
+            matches.append(ProductMatch(
+                patent_id=patent_id,
+                product_id=product.id,
+                product_name=product.name,
+                manufacturer=product.manufacturer,
+                confidence_score=min(sim * 2, 1.0),  # Scale up for readability
+                matching_claims=claim_matches.get(hit_index, []),
+                evidence=[f"Keyword overlap: {sim:.2f}"],
+                matched_keywords=sorted(set(patent.keywords) & set(product_keywords[i])),
+            ))
 
         # Sort by confidence
         matches.sort(key=lambda m: m.confidence_score, reverse=True)
@@ -75,21 +82,19 @@ class MarketAnalystAgent(BaseAgent):
         if not keywords:
             keywords = extract_keywords(description)
 
-        all_patents = self.patent_store.get_all()
-        matches = []
-
-        for patent in all_patents:
-            sim = keyword_similarity(keywords, patent.keywords)
-            if sim > 0.1:
-                matches.append({
-                    "patent_id": patent.id,
-                    "patent_title": patent.title,
-                    "assignee": patent.assignees[0] if patent.assignees else "",
-                    "similarity": sim,
-                    "matched_keywords": sorted(set(k.lower() for k in keywords) & set(k.lower() for k in patent.keywords)),
-                })
-
-        matches.sort(key=lambda m: m["similarity"], reverse=True)
+        # Scored straight from the keyword postings: only patents sharing a keyword are touched.
+        query_ids = self.patent_store.encode_keywords(keywords)
+        vocabulary = self.patent_store.vocabulary
+        matches = [
+            {
+                "patent_id": patent.id,
+                "patent_title": patent.title,
+                "assignee": patent.assignees[0] if patent.assignees else "",
+                "similarity": sim,
+                "matched_keywords": sorted(vocabulary.decode(query_ids.intersection(self.patent_store.keyword_ids(patent.id)))),
+            }
+            for patent, sim in self.patent_store.similar_by_keywords(keywords, threshold=0.1)
+        ]
 
         return {
             "description": description[:100],
@@ -150,7 +150,8 @@ class RouterAgent(BaseAgent):
                 report = fto_result.get("report", {})
                 analyses = report.get("analyses", [])
                 assignees = list(set(a.get("assignee", "") for a in analyses if a.get("assignee")))
-                return {"assignees": assignees}
+                # Companies named in the query: flag assignees they control through the reachability index
+                return {"assignees": assignees, "owners": companies}
             else:
                 return {
                     "company_name": companies[0] if companies else "",
@@ -208,9 +209,13 @@ class RouterAgent(BaseAgent):
                 if r.get("resolved") and r.get("ultimate_parent_name"):
                     parent_companies.add(r["ultimate_parent_name"])
 
+            summary = f"Resolved {corp.get('resolved_count', 0)} of {corp.get('total', 0)} assignees. Ultimate parent companies: {', '.join(parent_companies) or 'None identified'}."
+            controlled = [r["assignee"] for r in resolutions if r.get("controlled_by")]
+            if controlled:
+                summary += f" Controlled by the named companies: {', '.join(sorted(controlled))}."
             sections.append({
                 "title": "Corporate Intelligence",
-                "summary": f"Resolved {corp.get('resolved_count', 0)} of {corp.get('total', 0)} assignees. Ultimate parent companies: {', '.join(parent_companies) or 'None identified'}.",
+                "summary": summary,
                 "details": {"resolutions": resolutions},
             })
 
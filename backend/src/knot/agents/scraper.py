@@ -70,8 +70,7 @@ class ScraperAgent(BaseAgent):
             return {**rate_check, "patents": [], "confidence_score": 0.5}
 
         source = payload.get("source", "USPTO")
-        all_patents = self.patent_store.get_all()
-        results = [p for p in all_patents if p.source == source]
+        results = self.patent_store.filter(sources=[source])
 
         return {
             "patents": [
@@ -2,8 +2,7 @@
 
 from knot.agents.base import BaseAgent
 from knot.models.validity import PriorArtAnalysis, ValidityReport
-from knot.services.similarity import keyword_similarity
-from knot.services.text_processing import extract_keywords
+from knot.services.similarity import jaccard_many_to_many, jaccard_similarity
 from knot.stores.patent_store import PatentStore
 from knot.stores.search_store import SearchStore
 
@@ -32,42 +31,42 @@ class ValidityResearcherAgent(BaseAgent):
         if patent and not keywords:
             keywords = patent.keywords
 
-        # Search prior art store
-        candidates = self.search_store.search_prior_art(keywords)
+        # Search prior art store; only art published before the target's filing date qualifies
+        filing_date = patent.filing_date if patent else None
+        candidates = self.search_store.search_prior_art(keywords, published_before=filing_date)
 
-        # Filter by date if we have a target patent
-        if patent and patent.filing_date:
-            candidates = [
-                c for c in candidates
-                if c.publication_date is None or c.publication_date < patent.filing_date
-            ]
+        # Candidate and claim keyword sets were built when each record was added
+        query_keywords = {k.lower() for k in keywords}
+        candidate_keywords = [self.search_store.prior_art_keywords(c.id) for c in candidates]
+        hits = []
+        for i, pa_keywords in enumerate(candidate_keywords):
+            relevance = jaccard_similarity(query_keywords, pa_keywords)
+            if relevance > 0.05:
+                hits.append((i, relevance))
+        hits.sort(key=lambda hit: -hit[1])  # best first; stable, so ties stay in candidate order
+
+        # Check which claims might be affected: all claims against all relevant candidates at once
+        matched_claims: dict[int, list[int]] = {}
+        if patent:
+            claim_vocabulary = self.patent_store.claim_vocabulary
+            for claim_index, hit_index, _ in jaccard_many_to_many(
+                [set(claim_vocabulary.decode(ids)) for ids in self.patent_store.claim_keyword_ids(patent.id)],
+                [candidate_keywords[i] for i, _ in hits],
+                threshold=0.1,
+            ):
+                matched_claims.setdefault(hit_index, []).append(patent.claims[claim_index].number)
 
-        # Score each candidate
         results = []
-        for candidate in candidates:
-            pa_keywords = candidate.keywords
-            relevance = keyword_similarity(keywords, pa_keywords)
-
-            # Check which claims might be affected
-            matched_claims = []
-            if patent:
-                for claim in patent.claims:
-                    claim_kw = extract_keywords(claim.text)
-                    claim_sim = keyword_similarity(claim_kw, pa_keywords)
-                    if claim_sim > 0.1:
-                        matched_claims.append(claim.number)
-
-            if relevance > 0.05:
-                results.append(PriorArtAnalysis(
-                    prior_art_id=candidate.id,
-                    target_patent_id=patent_id,
-                    relevance_score=relevance,
-                    matched_claims=matched_claims,
-                    matched_keywords=sorted(set(k.lower() for k in keywords) & set(k.lower() for k in pa_keywords)),
-                    analysis=f"Prior art '{candidate.title}' published {candidate.publication_date} has {relevance:.0%} relevance.",
-                ))
-
-        results.sort(key=lambda r: r.relevance_score, reverse=True)
+        for hit_index, (i, relevance) in enumerate(hits):
+            candidate = candidates[i]
+            results.append(PriorArtAnalysis(
+                prior_art_id=candidate.id,
+                target_patent_id=patent_id,
+                relevance_score=relevance,
+                matched_claims=matched_claims.get(hit_index, []),
+                matched_keywords=sorted(query_keywords & candidate_keywords[i]),
+                analysis=f"Prior art '{candidate.title}' published {candidate.publication_date} has {relevance:.0%} relevance.",
+            ))
 
         return {
             "patent_id": patent_id,
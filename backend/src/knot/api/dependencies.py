@@ -1,8 +1,14 @@
 """Dependency injection for stores and agents."""
 
+from knot.config import settings
 from knot.stores.patent_store import PatentStore
+from knot.stores.disk_patent_store import DiskPatentStore
 from knot.stores.graph_store import GraphStore
 from knot.stores.search_store import SearchStore
+from knot.stores.portfolio import PortfolioRollup
+from knot.stores.family import FamilyIndex
+from knot.services.clustering import ClusterIndex
+from knot.services.reachability import ReachabilityIndex
 from knot.agents.data_custodian import DataCustodianAgent
 from knot.agents.corporate_intel import CorporateIntelAgent
 from knot.agents.market_analyst import MarketAnalystAgent
@@ -19,18 +25,29 @@ class Container:
 
     def __init__(self):
         # Stores
-        self.patent_store = PatentStore()
+        if settings.patent_store_path:
+            self.patent_store = DiskPatentStore(settings.patent_store_path)
+        else:
+            self.patent_store = PatentStore()
         self.graph_store = GraphStore()
         self.search_store = SearchStore()
 
+        # Materialized views
+        self.portfolios = PortfolioRollup(self.graph_store, self.patent_store)
+        self.reachability = ReachabilityIndex(self.graph_store)
+        self.families = FamilyIndex(self.patent_store)
+        self.clusters = ClusterIndex(self.patent_store)
+
         # Agents
         self.data_custodian = DataCustodianAgent(self.patent_store)
         self.scraper = ScraperAgent(self.patent_store)
-        self.integration = IntegrationAgent(self.patent_store)
-        self.corporate_intel = CorporateIntelAgent(self.graph_store, self.patent_store)
+        self.integration = IntegrationAgent(self.patent_store, self.families)
+        self.corporate_intel = CorporateIntelAgent(
+            self.graph_store, self.patent_store, self.portfolios, self.reachability
+        )
         self.market_analyst = MarketAnalystAgent(self.patent_store, self.search_store)
-        self.landscaping = LandscapingAgent(self.patent_store)
-        self.fto_analyst = FTOAnalystAgent(self.patent_store)
+        self.landscaping = LandscapingAgent(self.patent_store, self.families, self.clusters)
+        self.fto_analyst = FTOAnalystAgent(self.patent_store, self.families)
         self.validity_researcher = ValidityResearcherAgent(self.patent_store, self.search_store)
 
         # Router with all agents
@@ -1,5 +1,6 @@
 """REST API endpoints for Project Knot."""
 
+from datetime import date
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
@@ -21,16 +22,21 @@ class FTORequest(BaseModel):
     description: str = Field(description="Product or technology description")
     target_markets: list[str] = Field(default_factory=list, description="Target market jurisdictions (US, EU, IN, etc.)")
     keywords: list[str] = Field(default_factory=list, description="Optional additional keywords")
+    collapse_families: bool = Field(default=False, description="Analyze one representative per patent family")
 
 
 class CorporateResolveRequest(BaseModel):
     company_name: str = Field(default="", description="Company name to resolve")
     company_id: str = Field(default="", description="Company ID to resolve")
+    as_of: Optional[date] = Field(default=None, description="Resolve ownership as it stood on this date")
+    offset: int = Field(default=0, ge=0, description="First patent id to return")
+    limit: int = Field(default=100, ge=1, le=1000, description="Maximum patent ids to return")
 
 
 class LandscapeRequest(BaseModel):
     domain: str = Field(description="Technology domain to analyze")
     keywords: list[str] = Field(default_factory=list, description="Optional domain keywords")
+    collapse_families: bool = Field(default=False, description="Count one representative per patent family")
 
 
 class ValidityRequest(BaseModel):
@@ -89,6 +95,7 @@ async def fto_analyze(request: FTORequest):
             "description": request.description,
             "target_markets": request.target_markets,
             "keywords": request.keywords,
+            "collapse_families": request.collapse_families,
         },
     )
     response = container.fto_analyst.handle_request(agent_request)
@@ -108,6 +115,9 @@ async def corporate_resolve(request: CorporateResolveRequest):
         payload={
             "company_name": request.company_name,
             "company_id": request.company_id,
+            "as_of": request.as_of,
+            "offset": request.offset,
+            "limit": request.limit,
         },
     )
     response = container.corporate_intel.handle_request(agent_request)
@@ -117,14 +127,76 @@ async def corporate_resolve(request: CorporateResolveRequest):
 
 
 @router.get("/corporate/graph/{company_id}")
-async def corporate_graph(company_id: str):
-    """Get ownership graph for a company."""
+async def corporate_graph(
+    company_id: str,
+    as_of: Optional[date] = Query(default=None, description="Graph as it stood on this date"),
+    max_depth: Optional[int] = Query(default=None, ge=0, description="Maximum hops from the company"),
+    direction: str = Query(default="both", pattern="^(up|down|both)$", description="Follow owners (up), holdings (down) or both"),
+    max_nodes: int = Query(default=500, ge=1, le=5000, description="Companies per page"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+):
+    """Get ownership graph for a company, one page of companies at a time."""
     container = get_container()
+    if cursor:
+        try:
+            container.graph_store.cursor_offset(cursor, company_id, as_of, max_depth, direction)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
     agent_request = AgentRequest(
         source_agent="api",
         target_agent="corporate_intel",
         task_type="get_graph",
-        payload={"company_id": company_id},
+        payload={
+            "company_id": company_id,
+            "as_of": as_of,
+            "max_depth": max_depth,
+            "direction": direction,
+            "max_nodes": max_nodes,
+            "cursor": cursor,
+        },
+    )
+    response = container.corporate_intel.handle_request(agent_request)
+    if response.status == "failure":
+        raise HTTPException(status_code=500, detail=response.errors)
+    return response.result
+
+
+@router.get("/corporate/ownership/{company_id}")
+async def corporate_ownership(
+    company_id: str,
+    direction: str = Query(default="holdings", pattern="^(holdings|owners)$", description="holdings (what it owns) or owners (who owns it)"),
+    min_percentage: float = Query(default=0.0, ge=0, le=100, description="Hide stakes below this percentage"),
+):
+    """Effective (direct plus indirect) ownership stakes for a company."""
+    container = get_container()
+    agent_request = AgentRequest(
+        source_agent="api",
+        target_agent="corporate_intel",
+        task_type="effective_ownership",
+        payload={
+            "company_id": company_id,
+            "direction": direction,
+            "min_percentage": min_percentage,
+        },
+    )
+    response = container.corporate_intel.handle_request(agent_request)
+    if response.status == "failure":
+        raise HTTPException(status_code=500, detail=response.errors)
+    return response.result
+
+
+@router.get("/corporate/control")
+async def corporate_control(
+    owner: str = Query(description="Owning company name or id"),
+    company: str = Query(description="Company name or id to check"),
+):
+    """Whether `owner` directly or indirectly holds a stake in `company`."""
+    container = get_container()
+    agent_request = AgentRequest(
+        source_agent="api",
+        target_agent="corporate_intel",
+        task_type="check_control",
+        payload={"owner": owner, "company": company},
     )
     response = container.corporate_intel.handle_request(agent_request)
     if response.status == "failure":
@@ -143,6 +215,7 @@ async def landscape_analyze(request: LandscapeRequest):
         payload={
             "domain": request.domain,
             "keywords": request.keywords,
+            "collapse_families": request.collapse_families,
         },
     )
     response = container.landscaping.handle_request(agent_request)
@@ -189,22 +262,69 @@ async def products_match(request: ProductMatchRequest):
     return response.result
 
 
+def _family_result(container: Container, group: list) -> dict:
+    """A family's representative with the members it stands for and their jurisdictions."""
+    return {
+        **group[0].model_dump(),
+        "family_id": container.families.family_id(group[0].id),
+        "family_members": [p.id for p in group],
+        "jurisdictions": sorted({j for p in group for j in p.jurisdictions}),
+    }
+
+
 @router.get("/patents/search")
 async def search_patents(
     q: str = Query(default="", description="Search query"),
     jurisdiction: Optional[str] = Query(default=None, description="Filter by jurisdiction"),
+    rank: bool = Query(default=False, description="Rank results by BM25 relevance"),
+    limit: Optional[int] = Query(default=None, ge=1, description="Maximum number of results"),
+    collapse_families: bool = Query(default=False, description="One result per patent family"),
 ):
     """Search patents."""
     container = get_container()
     jurisdictions = [jurisdiction] if jurisdiction else None
+    if rank:
+        ranked = container.patent_store.search_ranked(q, jurisdictions, limit or 20)
+        if collapse_families:
+            scores = {p.id: score for p, score in ranked}
+            groups = container.families.collapse(p for p, _ in ranked)
+            return {
+                "query": q,
+                "results": [{**_family_result(container, g), "score": scores[g[0].id]} for g in groups],
+                "total": len(groups),
+            }
+        return {
+            "query": q,
+            "results": [{**p.model_dump(), "score": score} for p, score in ranked],
+            "total": len(ranked),
+        }
     results = container.patent_store.search(q, jurisdictions)
+    if collapse_families:
+        groups = container.families.collapse(results)
+        return {
+            "query": q,
+            "results": [_family_result(container, g) for g in groups[:limit]],
+            "total": len(groups),
+        }
     return {
         "query": q,
-        "results": [p.model_dump() for p in results],
+        "results": [p.model_dump() for p in results[:limit]],
         "total": len(results),
     }
 
 
+@router.get("/patents/classifications")
+async def patent_classifications(
+    prefix: str = Query(default="", description="IPC/CPC code prefix to drill into"),
+):
+    """Patent counts per classification group below a code prefix."""
+    container = get_container()
+    return {
+        "prefix": prefix,
+        "groups": container.patent_store.classification_breakdown(prefix),
+    }
+
+
 @router.get("/patents/{patent_id}")
 async def get_patent(patent_id: str):
     """Get a single patent by ID."""
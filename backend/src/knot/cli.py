@@ -0,0 +1,39 @@
+"""Command-line tools for Project Knot."""
+
+import argparse
+import time
+
+from knot.config import settings
+from knot.mock_data.seed import seed_all
+from knot.stores.patent_store import PatentStore
+from knot.stores.graph_store import GraphStore
+from knot.stores.search_store import SearchStore
+from knot.stores.snapshot import build_snapshot
+
+
+def snapshot_build(args: argparse.Namespace) -> None:
+    """Seed fresh stores from the mock data and write them to a snapshot file."""
+    start = time.time()
+    patent_store, graph_store, search_store = PatentStore(), GraphStore(), SearchStore()
+    seed_all(patent_store, graph_store, search_store)
+    build_snapshot(args.output, patent_store, graph_store, search_store)
+    print(f"Wrote snapshot {args.output} with {patent_store.count()} patents, "
+          f"{graph_store.count()} companies in {(time.time() - start) * 1000:.0f}ms")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="knot", description=settings.app_name)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    snapshot = commands.add_parser("snapshot", help="Manage store snapshots")
+    snapshot_commands = snapshot.add_subparsers(dest="snapshot_command", required=True)
+    build = snapshot_commands.add_parser("build", help="Build a snapshot from the seed data")
+    build.add_argument("--output", "-o", default=settings.snapshot_path, help="Snapshot file to write")
+    build.set_defaults(func=snapshot_build)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 """Application configuration using Pydantic Settings."""
 
+from pathlib import Path
+
 from pydantic_settings import BaseSettings
 
+# Generated local files (snapshots); git-ignored
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+
 
 class Settings(BaseSettings):
     app_name: str = "Project Knot"
@@ -17,6 +22,12 @@ class Settings(BaseSettings):
     # Agent timeouts (ms)
     default_agent_timeout_ms: int = 300000
 
+    # SQLite file for the disk-backed patent store (empty = in-memory store)
+    patent_store_path: str = ""
+
+    # Store snapshot loaded at startup instead of seeding (built by `knot snapshot build`)
+    snapshot_path: str = str(DATA_DIR / "knot.snapshot")
+
     model_config = {"env_prefix": "KNOT_"}
 
 
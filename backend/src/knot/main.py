@@ -6,7 +6,8 @@ from fastapi import FastAPI
 from knot.config import settings
 from knot.api.routes import router
 from knot.api.dependencies import get_container
-from knot.mock_data.seed import seed_all
+from knot.mock_data.seed import load_patents, seed_all, seed_graph_and_search
+from knot.stores.snapshot import load_snapshot
 
 
 def create_app() -> FastAPI:
@@ -21,12 +22,31 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     async def startup():
         container = get_container()
-        seed_all(container.patent_store, container.graph_store, container.search_store)
-        print(f"Seeded {container.patent_store.count()} patents, "
+        stores = (container.patent_store, container.graph_store, container.search_store)
+        if settings.patent_store_path:
+            # Patent records persist in the SQLite file; only an empty file is seeded
+            if container.patent_store.count() == 0:
+                with container.patent_store.batch():
+                    load_patents(container.patent_store)
+            seed_graph_and_search(container.graph_store, container.search_store)
+        elif not load_snapshot(settings.snapshot_path, *stores):
+            seed_all(*stores)
+        else:
+            container.portfolios.rebuild()
+            container.reachability.invalidate()
+            container.families.rebuild()
+        # Start from the batch clustering of everything loaded, not the incremental merges
+        container.clusters.rebalance()
+        print(f"Loaded {container.patent_store.count()} patents, "
               f"{container.graph_store.count()} companies, "
               f"{len(container.search_store.get_all_products())} products, "
               f"{len(container.search_store.get_all_prior_art())} prior art entries")
 
+    @app.on_event("shutdown")
+    async def shutdown():
+        if settings.patent_store_path:
+            get_container().patent_store.close()
+
     return app
 
 
@@ -1,5 +1,6 @@
 """Load all mock data into stores at startup."""
 
+import hashlib
 import json
 from pathlib import Path
 from datetime import date
@@ -13,6 +14,7 @@ from knot.stores.graph_store import GraphStore
 from knot.stores.search_store import SearchStore
 
 MOCK_DATA_DIR = Path(__file__).parent
+SEED_FILES = ("patents.json", "companies.json", "products.json", "prior_art.json")
 
 
 def _parse_date(d: str | None) -> date | None:
@@ -48,46 +50,44 @@ def load_patents(store: PatentStore) -> None:
 def load_companies(store: GraphStore) -> None:
     with open(MOCK_DATA_DIR / "companies.json") as f:
         data = json.load(f)
-    for c in data:
-        company = Company(**c)
-        store.add_company(company)
-    # Build ownership edges from the data
-    for c in data:
-        if c.get("ultimate_parent_id"):
-            # Find direct parent by walking the tree
-            _add_ownership_edges(store, c, data)
-
-
-def _add_ownership_edges(store: GraphStore, company_data: dict, all_companies: list[dict]) -> None:
-    """Add ownership edges. If ultimate_parent_id is set, create edge from parent to this company."""
-    child_id = company_data["id"]
-    parent_id = company_data.get("ultimate_parent_id")
-    if not parent_id:
-        return
-    # Check if this child is a direct subsidiary of the parent
-    parent_data = next((c for c in all_companies if c["id"] == parent_id), None)
-    if parent_data and child_id in parent_data.get("subsidiaries", []):
-        edge = OwnershipEdge(
-            from_company_id=parent_id,
-            to_company_id=child_id,
-            ownership_percentage=100.0,
-            effective_date=date(2015, 1, 1),
-            source="SEC Filing",
-        )
-        store.add_edge(edge)
-    else:
-        # Find intermediate parent
-        for c in all_companies:
-            if child_id in c.get("subsidiaries", []):
-                edge = OwnershipEdge(
-                    from_company_id=c["id"],
-                    to_company_id=child_id,
-                    ownership_percentage=100.0,
-                    effective_date=date(2018, 6, 1),
-                    source="Corporate Filing",
-                )
-                store.add_edge(edge)
-                break
+    store.bulk_load([Company(**c) for c in data], _ownership_edges(data))
+
+
+def _ownership_edges(companies: list[dict]) -> list[OwnershipEdge]:
+    """Ownership edges implied by the registry, built from id and subsidiary lookup tables.
+
+    A company whose ultimate parent lists it as a subsidiary is owned by that
+    parent directly; otherwise it is owned by the first company that lists it.
+    """
+    subsidiaries = {c["id"]: set(c.get("subsidiaries", [])) for c in companies}
+    listed_by: dict[str, str] = {}
+    for c in companies:
+        for child_id in c.get("subsidiaries", []):
+            listed_by.setdefault(child_id, c["id"])
+
+    edges = []
+    for c in companies:
+        child_id = c["id"]
+        parent_id = c.get("ultimate_parent_id")
+        if not parent_id:
+            continue
+        if child_id in subsidiaries.get(parent_id, ()):
+            edges.append(OwnershipEdge(
+                from_company_id=parent_id,
+                to_company_id=child_id,
+                ownership_percentage=100.0,
+                effective_date=date(2015, 1, 1),
+                source="SEC Filing",
+            ))
+        elif child_id in listed_by:
+            edges.append(OwnershipEdge(
+                from_company_id=listed_by[child_id],
+                to_company_id=child_id,
+                ownership_percentage=100.0,
+                effective_date=date(2018, 6, 1),
+                source="Corporate Filing",
+            ))
+    return edges
 
 
 def load_products(store: SearchStore) -> None:
@@ -115,9 +115,23 @@ def load_prior_art(store: SearchStore) -> None:
         store.add_prior_art(candidate)
 
 
-def seed_all(patent_store: PatentStore, graph_store: GraphStore, search_store: SearchStore) -> None:
-    """Load all mock data into stores."""
-    load_patents(patent_store)
+def seed_graph_and_search(graph_store: GraphStore, search_store: SearchStore) -> None:
+    """Load the mock companies, products and prior art (everything but patents)."""
     load_companies(graph_store)
     load_products(search_store)
     load_prior_art(search_store)
+
+
+def seed_all(patent_store: PatentStore, graph_store: GraphStore, search_store: SearchStore) -> None:
+    """Load all mock data into stores."""
+    load_patents(patent_store)
+    seed_graph_and_search(graph_store, search_store)
+
+
+def seed_data_hash() -> str:
+    """SHA-256 over the seed files, so data derived from them can tell when they change."""
+    digest = hashlib.sha256()
+    for name in SEED_FILES:
+        digest.update(name.encode())
+        digest.update((MOCK_DATA_DIR / name).read_bytes())
+    return digest.hexdigest()
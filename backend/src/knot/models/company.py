@@ -22,9 +22,12 @@ class OwnershipEdge(BaseModel):
     to_company_id: str
     ownership_percentage: float = Field(ge=0, le=100)
     effective_date: Optional[date] = None
+    end_date: Optional[date] = Field(default=None, description="First day the stake no longer applies")
     source: str = ""
 
 
 class OwnershipGraph(BaseModel):
     nodes: list[Company] = Field(default_factory=list)
     edges: list[OwnershipEdge] = Field(default_factory=list)
+    frontier: list[str] = Field(default_factory=list, description="Returned companies not expanded due to the depth limit")
+    next_cursor: Optional[str] = Field(default=None, description="Resumes the traversal after this page")
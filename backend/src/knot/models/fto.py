@@ -1,5 +1,7 @@
 """Freedom to Operate analysis models."""
 
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 
@@ -19,6 +21,9 @@ class InfringementAnalysis(BaseModel):
     overall_risk: str = Field(description="high, medium, low, none")
     claim_matches: list[ClaimMatch] = Field(default_factory=list)
     recommendation: str = ""
+    family_id: Optional[str] = Field(default=None, description="Set when results are collapsed by patent family")
+    family_members: list[str] = Field(default_factory=list, description="Family members this analysis stands for")
+    jurisdictions: list[str] = Field(default_factory=list, description="Jurisdictions covered by those members")
 
 
 class FTOReport(BaseModel):
@@ -43,3 +43,4 @@ class Patent(BaseModel):
     language: str = "en"
     status: str = Field(default="active", description="active, expired, abandoned")
     jurisdictions: list[str] = Field(default_factory=list)
+    family_id: Optional[str] = Field(default=None, description="Patent family id (e.g. DOCDB), when the source provides one")
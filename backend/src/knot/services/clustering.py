@@ -1,8 +1,69 @@
 """Patent clustering by classification and keyword overlap."""
 
+import threading
+from collections import Counter
+from typing import Iterable, Optional
+
 from knot.models.patent import Patent
 from knot.models.landscape import PatentCluster
-from knot.services.similarity import keyword_similarity
+from knot.stores.indexes import DisjointSet
+from knot.stores.patent_store import PatentStore
+
+# Patents added between background re-balancing runs of a ClusterIndex
+DEFAULT_REBALANCE_EVERY = 1000
+
+
+def _group_code(patent: Patent) -> str:
+    """Classification code prefix (first 4 chars) a patent is grouped under."""
+    return patent.classifications[0].code[:4] if patent.classifications else "NONE"
+
+
+def _keyword_set(patent: Patent) -> frozenset[str]:
+    return frozenset(k.lower() for k in patent.keywords)
+
+
+# What _ClusterState.rebuild needs: group codes, patent_id -> group, patent_id -> keywords
+_Records = tuple[list[str], dict[str, int], dict[str, frozenset[str]]]
+
+
+def _merge_groups(group_keywords: list[set[str]], threshold: float) -> list[list[int]]:
+    """Greedy pass-wise merge of groups by keyword similarity; member groups of each cluster, in output order.
+
+    Each cluster, in order, merges with the first later cluster untouched in
+    this pass whose keyword similarity reaches the threshold, until a pass
+    merges nothing. Candidates come from a keyword -> cluster inverted index
+    with overlap counts and merges are tracked with union-find.
+    """
+    keywords: dict[int, set[str]] = dict(enumerate(group_keywords))  # union-find root -> keyword set
+    members: dict[int, list[int]] = {i: [i] for i in keywords}  # union-find root -> groups in merge order
+    components = DisjointSet()
+    order = list(keywords)  # current clusters (roots), in output order
+    merged = True
+    while merged:
+        merged = False
+        index: dict[str, list[int]] = {}  # keyword -> positions in `order`
+        for pos, root in enumerate(order):
+            for keyword in keywords[root]:
+                index.setdefault(keyword, []).append(pos)
+
+        new_order = []
+        skip = set()
+        for i, root in enumerate(order):
+            if i in skip:
+                continue
+            partner = _first_match(i, keywords[root], order, keywords, index, skip, threshold)
+            if partner is not None:
+                other = order[partner]
+                new_root = components.union(root, other)
+                keywords[new_root] = keywords.pop(root) | keywords.pop(other)
+                members[new_root] = members.pop(root) + members.pop(other)
+                new_order.append(new_root)
+                skip.update((i, partner))
+                merged = True
+            else:
+                new_order.append(root)
+        order = new_order
+    return [members[root] for root in order]
 
 
 def cluster_patents(patents: list[Patent], similarity_threshold: float = 0.15) -> list[PatentCluster]:
@@ -11,6 +72,8 @@ def cluster_patents(patents: list[Patent], similarity_threshold: float = 0.15) -
     Uses a simple greedy clustering approach:
     1. Group by primary classification code prefix
     2. Merge groups with high keyword overlap
+
+    `PatentCluster` models are only built once merging is done.
     """
     if not patents:
         return []
@@ -18,63 +81,306 @@ def cluster_patents(patents: list[Patent], similarity_threshold: float = 0.15) -
     # Step 1: Group by classification code prefix (first 4 chars)
     code_groups: dict[str, list[Patent]] = {}
     for patent in patents:
-        if patent.classifications:
-            code = patent.classifications[0].code[:4]
-        else:
-            code = "NONE"
-        code_groups.setdefault(code, []).append(patent)
+        code_groups.setdefault(_group_code(patent), []).append(patent)
+
+    # Step 2: Merge groups with high keyword overlap
+    codes = list(code_groups)
+    groups = list(code_groups.values())
+    merged = _merge_groups([{k.lower() for p in group for k in p.keywords} for group in groups], similarity_threshold)
 
-    # Step 2: Build initial clusters
     clusters = []
-    for i, (code, group) in enumerate(code_groups.items()):
-        # Collect all keywords from patents in this group
-        all_keywords = set()
-        for p in group:
-            all_keywords.update(k.lower() for k in p.keywords)
-
-        cluster = PatentCluster(
-            id=f"CLU{i+1:03d}",
-            label=f"{code} cluster",
-            keywords=sorted(all_keywords),
-            patent_ids=[p.id for p in group],
-            density=len(group) / max(len(patents), 1),
-            classification_codes=[code],
-        )
-        clusters.append(cluster)
-
-    # Step 3: Merge clusters with high keyword overlap
-    merged = True
-    while merged:
-        merged = False
-        new_clusters = []
-        skip = set()
-        for i, c1 in enumerate(clusters):
-            if i in skip:
+    for group_numbers in merged:
+        patent_ids = [p.id for g in group_numbers for p in groups[g]]
+        clusters.append(PatentCluster(
+            id=f"CLU{group_numbers[0]+1:03d}",
+            label=" + ".join(f"{codes[g]} cluster" for g in group_numbers),
+            keywords=sorted({k.lower() for g in group_numbers for p in groups[g] for k in p.keywords}),
+            patent_ids=patent_ids,
+            density=len(patent_ids) / max(len(patents), 1),
+            classification_codes=[codes[g] for g in group_numbers],
+        ))
+    return clusters
+
+
+def _first_match(
+    i: int,
+    cluster_keywords: set[str],
+    order: list[int],
+    keywords: dict[int, set[str]],
+    index: dict[str, list[int]],
+    skip: set[int],
+    threshold: float,
+) -> Optional[int]:
+    """Smallest position after `i`, not yet merged this pass, whose keyword similarity reaches the threshold."""
+    if threshold <= 0:
+        # Even clusters sharing no keyword qualify, so the index cannot prune
+        return next((j for j in range(i + 1, len(order)) if j not in skip), None)
+    overlaps: dict[int, int] = {}
+    for keyword in cluster_keywords:
+        for j in index[keyword]:
+            if j > i:
+                overlaps[j] = overlaps.get(j, 0) + 1
+    for j in sorted(overlaps):
+        if j in skip:
+            continue
+        overlap = overlaps[j]
+        if overlap / (len(cluster_keywords) + len(keywords[order[j]]) - overlap) >= threshold:
+            return j
+    return None
+
+
+class _ClusterState:
+    """Classification groups merged into clusters, with incremental assignment.
+
+    Groups are numbered in order of first appearance and a cluster is a
+    union-find component of groups; its id comes from its first group, as in
+    `cluster_patents`. Per-cluster keyword counts (how many of its groups use
+    a keyword) back a keyword -> cluster inverted index, so a new patent only
+    looks at clusters sharing one of the keywords it added.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.codes: list[str] = []  # group number -> classification prefix
+        self._group_numbers: dict[str, int] = {}
+        self._group_keywords: list[Counter] = []  # group -> keyword -> patents using it
+        self._patent_groups: dict[str, int] = {}
+        self._patent_keywords: dict[str, frozenset[str]] = {}
+        self._components = DisjointSet()
+        self._first_group: dict[int, int] = {}  # root -> smallest group number in the cluster
+        self._cluster_keywords: dict[int, Counter] = {}  # root -> keyword -> groups using it
+        self._keyword_clusters: dict[str, set[int]] = {}  # keyword -> roots
+
+    @classmethod
+    def build(cls, patents: Iterable[Patent], threshold: float) -> "_ClusterState":
+        """Same partition as `cluster_patents` over all the patents."""
+        return cls._build(((p.id, _group_code(p), _keyword_set(p)) for p in patents), threshold)
+
+    @classmethod
+    def rebuild(cls, records: "_Records", threshold: float) -> "_ClusterState":
+        """Batch partition of the patents in `records` (from copy_records), without their Patent objects."""
+        codes, groups, keywords = records
+        return cls._build(((pid, codes[group], keywords[pid]) for pid, group in groups.items()), threshold)
+
+    @classmethod
+    def _build(cls, features: Iterable[tuple[str, str, frozenset[str]]], threshold: float) -> "_ClusterState":
+        state = cls(threshold)
+        for patent_id, code, keywords in features:
+            state._place(patent_id, code, keywords)
+        for group_numbers in _merge_groups([set(keywords) for keywords in state._group_keywords], threshold):
+            for other in group_numbers[1:]:
+                state._merge(state._components.find(group_numbers[0]), state._components.find(other))
+        return state
+
+    def copy_records(self) -> "_Records":
+        """Group codes and each patent's group and keywords, in first-add order.
+
+        Shallow dict and list copies: cheap to take under a lock, and enough
+        for `rebuild` on another thread without reading the patent store.
+        """
+        return list(self.codes), dict(self._patent_groups), dict(self._patent_keywords)
+
+    def __contains__(self, patent_id: str) -> bool:
+        return patent_id in self._patent_groups
+
+    def add(self, patent: Patent) -> None:
+        """Assign a patent (replacing any earlier version) to its group, then merge that cluster with its best keyword match.
+
+        A replaced patent keeps its place in first-add order, as it does in the store.
+        """
+        if patent.id in self._patent_groups:
+            self._unplace(patent.id)
+        root, added = self._place(patent.id, _group_code(patent), _keyword_set(patent))
+        if added:
+            self._merge_best(root, added)
+
+    def remove(self, patent_id: str) -> None:
+        """Take a patent out of its group; clusters are not split until the next rebalance."""
+        self._unplace(patent_id)
+        del self._patent_groups[patent_id]
+        del self._patent_keywords[patent_id]
+
+    def _unplace(self, patent_id: str) -> None:
+        """Drop a patent's keyword counts from its group and cluster (its entries are left to the caller)."""
+        group = self._patent_groups[patent_id]
+        root = self._components.find(group)
+        for keyword in self._patent_keywords[patent_id]:
+            self._group_keywords[group][keyword] -= 1
+            if self._group_keywords[group][keyword]:
                 continue
-            for j, c2 in enumerate(clusters):
-                if j <= i or j in skip:
-                    continue
-                sim = keyword_similarity(c1.keywords, c2.keywords)
-                if sim >= similarity_threshold:
-                    # Merge c2 into c1
-                    new_cluster = PatentCluster(
-                        id=c1.id,
-                        label=f"{c1.label} + {c2.label}",
-                        keywords=sorted(set(c1.keywords) | set(c2.keywords)),
-                        patent_ids=c1.patent_ids + c2.patent_ids,
-                        density=(len(c1.patent_ids) + len(c2.patent_ids)) / max(len(patents), 1),
-                        classification_codes=list(set(c1.classification_codes + c2.classification_codes)),
-                    )
-                    new_clusters.append(new_cluster)
-                    skip.add(i)
-                    skip.add(j)
-                    merged = True
-                    break
-            if i not in skip:
-                new_clusters.append(c1)
-        clusters = new_clusters
+            del self._group_keywords[group][keyword]
+            self._cluster_keywords[root][keyword] -= 1
+            if not self._cluster_keywords[root][keyword]:
+                del self._cluster_keywords[root][keyword]
+                self._keyword_clusters[keyword].discard(root)
+                if not self._keyword_clusters[keyword]:
+                    del self._keyword_clusters[keyword]
 
-    return clusters
+    def cluster_count(self) -> int:
+        return len(self._cluster_keywords)
+
+    def clusters_for(self, patents: list[Patent]) -> list[PatentCluster]:
+        """The clusters holding the given patents, each narrowed to those patents."""
+        members: dict[int, list[Patent]] = {}
+        for patent in patents:
+            group = self._patent_groups.get(patent.id)
+            if group is not None:
+                members.setdefault(self._components.find(group), []).append(patent)
+        clusters = []
+        for root in sorted(members, key=self._first_group.__getitem__):
+            held = members[root]
+            group_numbers = sorted({self._patent_groups[p.id] for p in held})
+            clusters.append(PatentCluster(
+                id=f"CLU{self._first_group[root]+1:03d}",
+                label=" + ".join(f"{self.codes[g]} cluster" for g in group_numbers),
+                keywords=sorted({k.lower() for p in held for k in p.keywords}),
+                patent_ids=[p.id for p in held],
+                density=len(held) / max(len(patents), 1),
+                classification_codes=[self.codes[g] for g in group_numbers],
+            ))
+        return clusters
+
+    def _place(self, patent_id: str, code: str, keywords: frozenset[str]) -> tuple[int, list[str]]:
+        """Add a patent to its group (spawning group and cluster if new); returns its root and new cluster keywords."""
+        group = self._group_numbers.get(code)
+        if group is None:
+            group = len(self.codes)
+            self._group_numbers[code] = group
+            self.codes.append(code)
+            self._group_keywords.append(Counter())
+            self._first_group[group] = group
+            self._cluster_keywords[group] = Counter()
+        root = self._components.find(group)
+        self._patent_groups[patent_id] = group
+        self._patent_keywords[patent_id] = keywords
+        added = []
+        for keyword in keywords:
+            self._group_keywords[group][keyword] += 1
+            if self._group_keywords[group][keyword] > 1:
+                continue
+            self._cluster_keywords[root][keyword] += 1
+            if self._cluster_keywords[root][keyword] == 1:
+                self._keyword_clusters.setdefault(keyword, set()).add(root)
+                added.append(keyword)
+        return root, added
+
+    def _merge_best(self, root: int, added: list[str]) -> None:
+        # Only clusters sharing a newly added keyword can have moved closer to this one
+        candidates = set().union(*(self._keyword_clusters[k] for k in added))
+        candidates.discard(root)
+        keywords = self._cluster_keywords[root]
+        best, best_score = None, self.threshold
+        for other in sorted(candidates, key=self._first_group.__getitem__):
+            other_keywords = self._cluster_keywords[other]
+            small, large = (keywords, other_keywords) if len(keywords) <= len(other_keywords) else (other_keywords, keywords)
+            overlap = sum(1 for k in small if k in large)
+            score = overlap / (len(keywords) + len(other_keywords) - overlap)
+            if score > best_score or (best is None and score >= best_score):
+                best, best_score = other, score
+        if best is not None:
+            self._merge(root, best)
+
+    def _merge(self, root_a: int, root_b: int) -> None:
+        root = self._components.union(root_a, root_b)
+        other = root_b if root == root_a else root_a
+        self._first_group[root] = min(self._first_group[root], self._first_group.pop(other))
+        keywords = self._cluster_keywords[root]
+        for keyword, count in self._cluster_keywords.pop(other).items():
+            keywords[keyword] += count
+            clusters = self._keyword_clusters[keyword]
+            clusters.discard(other)
+            clusters.add(root)
+
+
+class ClusterIndex:
+    """Persistent landscape clusters over the whole patent store, maintained as patents arrive.
+
+    Each new patent joins its classification group (spawning a group and
+    cluster for an unseen code) and the group's cluster then merges with its
+    best keyword match. Incremental merges are greedy and never split
+    clusters, so every `rebalance_every` adds the partition is recomputed
+    with the batch algorithm on a background thread. The thread rebuilds from
+    a copy of the per-patent groups and keywords the index already holds, so
+    it never reads the store; patents added after the copy was taken are
+    replayed onto the new state before it is swapped in.
+    """
+
+    def __init__(
+        self,
+        patent_store: PatentStore,
+        similarity_threshold: float = 0.15,
+        rebalance_every: Optional[int] = DEFAULT_REBALANCE_EVERY,
+    ):
+        self.patent_store = patent_store
+        self.similarity_threshold = similarity_threshold
+        self.rebalance_every = rebalance_every
+        self._lock = threading.Lock()
+        self._rebalancer: Optional[threading.Thread] = None
+        self._pending: Optional[list[Patent]] = None  # adds seen while a background rebalance runs
+        self._adds_since_rebalance = 0
+        patent_store.add_listener(self._on_patent_added)
+        self.rebalance()
+
+    def rebalance(self) -> None:
+        """Recompute the clusters from the store now (e.g. after restoring a snapshot)."""
+        state = _ClusterState.build(self.patent_store.get_all(), self.similarity_threshold)
+        with self._lock:
+            self._state = state
+            self._adds_since_rebalance = 0
+
+    def wait_for_rebalance(self, timeout: Optional[float] = None) -> None:
+        """Block until a running background rebalance has been swapped in."""
+        rebalancer = self._rebalancer
+        if rebalancer is not None:
+            rebalancer.join(timeout)
+
+    def clusters_for(self, patents: Iterable[Patent]) -> list[PatentCluster]:
+        """Clusters holding the given patents, narrowed to them, in cluster id order."""
+        patents = list(patents)
+        with self._lock:
+            return self._state.clusters_for(patents)
+
+    def cluster_count(self) -> int:
+        with self._lock:
+            return self._state.cluster_count()
+
+    def _on_patent_added(self, patent: Patent, previous: Optional[Patent]) -> None:
+        with self._lock:
+            self._state.add(patent)
+            if self._pending is not None:
+                self._pending.append(patent)
+            self._adds_since_rebalance += 1
+            due = (
+                self.rebalance_every is not None
+                and self._adds_since_rebalance >= self.rebalance_every
+                and self._rebalancer is None
+            )
+            if due:
+                # No store reads here: the copy only holds ids, group numbers
+                # and keyword sets already in memory.
+                records = self._state.copy_records()
+                self._pending = []
+                self._adds_since_rebalance = 0
+                self._rebalancer = threading.Thread(
+                    target=self._rebalance_in_background, args=(records,), daemon=True
+                )
+        if due:
+            self._rebalancer.start()
+
+    def _rebalance_in_background(self, records: _Records) -> None:
+        state = None
+        try:
+            state = _ClusterState.rebuild(records, self.similarity_threshold)
+        finally:
+            with self._lock:
+                if state is not None:
+                    # _pending holds exactly the adds made after the copy, in
+                    # order; updates to copied patents replace them in place.
+                    for patent in self._pending:
+                        state.add(patent)
+                    self._state = state
+                self._pending = None
+                self._rebalancer = None
 
 
 def identify_white_spaces(
@@ -1,48 +1,36 @@
 """BFS graph traversal for corporate ownership resolution."""
 
+from collections import deque
+from datetime import date
+from typing import Optional
+
 from knot.stores.graph_store import GraphStore
 
 
-def find_ultimate_parent(graph_store: GraphStore, company_id: str) -> str:
-    """Find the ultimate parent company using BFS traversal.
+def find_ultimate_parent(graph_store: GraphStore, company_id: str, as_of: Optional[date] = None) -> str:
+    """Find the ultimate parent company by following the largest ownership stake.
 
     Returns the company_id of the ultimate parent.
-    Handles cycles by tracking visited nodes.
+    Handles cycles by stopping at the first revisited node. Results are
+    memoized in the graph store and invalidated when ownership edges change.
+    With `as_of`, only edges in effect on that date are followed.
     """
-    visited = set()
-    current = company_id
-
-    while True:
-        if current in visited:
-            # Cycle detected, return current as the root
-            return current
-        visited.add(current)
-
-        # Find parent edges (where this company is the child)
-        parent_edges = graph_store.get_parent_edges(current)
-        if not parent_edges:
-            # No parent found, this is the ultimate parent
-            return current
+    return graph_store.ultimate_parent(company_id, as_of)
 
-        # Follow the ownership edge to the parent
-        # Pick the edge with highest ownership percentage
-        best_edge = max(parent_edges, key=lambda e: e.ownership_percentage)
-        current = best_edge.from_company_id
 
-
-def get_all_subsidiaries(graph_store: GraphStore, company_id: str) -> list[str]:
-    """Get all subsidiaries (direct and indirect) using BFS."""
+def get_all_subsidiaries(graph_store: GraphStore, company_id: str, as_of: Optional[date] = None) -> list[str]:
+    """Get all subsidiaries (direct and indirect) using BFS, optionally as of a date."""
     visited = set()
     result = []
-    queue = [company_id]
+    queue = deque([company_id])
 
     while queue:
-        current = queue.pop(0)
+        current = queue.popleft()
         if current in visited:
             continue
         visited.add(current)
 
-        sub_edges = graph_store.get_subsidiary_edges(current)
+        sub_edges = graph_store.get_subsidiary_edges(current, as_of)
         for edge in sub_edges:
             child = edge.to_company_id
             if child not in visited:
@@ -52,38 +40,146 @@ def get_all_subsidiaries(graph_store: GraphStore, company_id: str) -> list[str]:
     return result
 
 
+def _owned_ids(graph_store: GraphStore, company_id: str) -> list[str]:
+    return [e.to_company_id for e in graph_store.get_subsidiary_edges(company_id)]
+
+
+def _owner_ids(graph_store: GraphStore, company_id: str) -> list[str]:
+    return [e.from_company_id for e in graph_store.get_parent_edges(company_id)]
+
+
+def strongly_connected_components(graph_store: GraphStore) -> list[list[str]]:
+    """Tarjan's algorithm over ownership edges, iterative so deep chains cannot overflow the stack.
+
+    Runs in O(V+E). Components come out in reverse topological order, each
+    listed in discovery order.
+    """
+    index: dict[str, int] = {}
+    low: dict[str, int] = {}
+    stack: list[str] = []
+    on_stack: set[str] = set()
+    components = []
+
+    for root in graph_store.get_node_ids():
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(_owned_ids(graph_store, root)))]
+        while work:
+            node, successors = work[-1]
+            descended = False
+            for child in successors:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(_owned_ids(graph_store, child))))
+                    descended = True
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            if descended:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component[::-1])
+    return components
+
+
+def _is_cycle(graph_store: GraphStore, component: list[str]) -> bool:
+    if len(component) > 1:
+        return True
+    return component[0] in _owned_ids(graph_store, component[0])
+
+
 def detect_cycles(graph_store: GraphStore) -> list[list[str]]:
-    """Detect cycles in the ownership graph."""
-    all_companies = graph_store.get_all_companies()
-    cycles = []
-
-    for company in all_companies:
-        visited = set()
-        path = []
-        current = company.id
-
-        while current and current not in visited:
-            visited.add(current)
-            path.append(current)
-            parent_edges = graph_store.get_parent_edges(current)
-            if parent_edges:
-                current = parent_edges[0].from_company_id
-            else:
-                current = None
-
-        if current and current in visited:
-            # Found a cycle
-            cycle_start = path.index(current)
-            cycle = path[cycle_start:]
-            # Normalize cycle to avoid duplicates
-            if sorted(cycle) not in [sorted(c) for c in cycles]:
-                cycles.append(cycle)
-
-    return cycles
-
-
-def resolve_assignee_to_company(graph_store: GraphStore, assignee_name: str) -> dict:
-    """Resolve a patent assignee name to company info with ultimate parent."""
+    """Detect circular-ownership groups (strongly connected components) in one pass."""
+    return [c for c in strongly_connected_components(graph_store) if _is_cycle(graph_store, c)]
+
+
+class CycleTracker:
+    """Keeps circular-ownership groups current as edges are added to a graph store.
+
+    Starts from one Tarjan pass; each new edge u -> v then only explores what
+    is reachable from v (and, if u is among it, what reaches u), merging the
+    components on the new cycle.
+    """
+
+    def __init__(self, graph_store: GraphStore):
+        self.graph_store = graph_store
+        self._component: dict[str, int] = {}
+        self._members: dict[int, list[str]] = {}
+        self._cyclic: set[int] = set()
+        self._next_id = 0
+        for component in strongly_connected_components(graph_store):
+            cid = self._new_component(component)
+            if _is_cycle(graph_store, component):
+                self._cyclic.add(cid)
+
+    def _new_component(self, members: list[str]) -> int:
+        cid = self._next_id
+        self._next_id += 1
+        self._members[cid] = members
+        for member in members:
+            self._component[member] = cid
+        return cid
+
+    def _component_of(self, node: str) -> int:
+        cid = self._component.get(node)
+        return cid if cid is not None else self._new_component([node])
+
+    def _reach(self, start: str, step, within: Optional[set[str]] = None) -> set[str]:
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            for nxt in step(self.graph_store, queue.popleft()):
+                if nxt not in seen and (within is None or nxt in within):
+                    seen.add(nxt)
+                    queue.append(nxt)
+        return seen
+
+    def add_edge(self, from_company_id: str, to_company_id: str) -> Optional[list[str]]:
+        """Account for an edge already added to the store.
+
+        Returns the members of the cycle the edge closes, or None.
+        """
+        source = self._component_of(from_company_id)
+        target = self._component_of(to_company_id)
+        if source == target:
+            if source in self._cyclic:
+                return None
+            self._cyclic.add(source)  # self-ownership
+            return list(self._members[source])
+
+        downstream = self._reach(to_company_id, _owned_ids)
+        if from_company_id not in downstream:
+            return None
+        on_cycle = self._reach(from_company_id, _owner_ids, within=downstream)
+        merged_ids = dict.fromkeys(self._component_of(node) for node in on_cycle)
+        members = [m for cid in merged_ids for m in self._members.pop(cid)]
+        self._cyclic.difference_update(merged_ids)
+        cid = self._new_component(members)
+        self._cyclic.add(cid)
+        return list(members)
+
+    def cycles(self) -> list[list[str]]:
+        return [list(self._members[cid]) for cid in sorted(self._cyclic)]
+
+
+def resolve_assignee_to_company(graph_store: GraphStore, assignee_name: str, as_of: Optional[date] = None) -> dict:
+    """Resolve a patent assignee name to company info with ultimate parent (as of a date, if given)."""
     company = graph_store.find_company_by_name(assignee_name)
     if not company:
         return {
@@ -94,7 +190,7 @@ def resolve_assignee_to_company(graph_store: GraphStore, assignee_name: str) ->
             "ultimate_parent_name": None,
         }
 
-    ultimate_parent_id = find_ultimate_parent(graph_store, company.id)
+    ultimate_parent_id = find_ultimate_parent(graph_store, company.id, as_of)
     ultimate_parent = graph_store.get_company(ultimate_parent_id)
 
     return {
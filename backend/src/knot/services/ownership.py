@@ -0,0 +1,56 @@
+"""Effective (indirect) ownership across multi-level ownership chains."""
+
+from knot.stores.graph_store import GraphStore
+
+# Stakes below this fraction stop propagating further down (or up) the chain
+DEFAULT_TOLERANCE = 1e-6
+# Longest chain followed; bounds the walk around ownership cycles
+DEFAULT_MAX_DEPTH = 50
+
+
+def _propagate(graph_store: GraphStore, start: str, upward: bool, tolerance: float, max_depth: int) -> dict[str, float]:
+    """Sparse vector-matrix propagation of stake fractions from `start`.
+
+    Each round multiplies the frontier vector by the (sparse) direct-ownership
+    matrix, so the accumulated vector is sum_k A^k: every path's stakes are
+    multiplied along the path and all paths are summed. Cycles contribute a
+    geometric series that is cut off by the tolerance and depth limit.
+    """
+    totals: dict[str, float] = {}
+    frontier = {start: 1.0}
+    for _ in range(max_depth):
+        next_frontier: dict[str, float] = {}
+        for company_id, stake in frontier.items():
+            edges = graph_store.get_parent_edges(company_id) if upward else graph_store.get_subsidiary_edges(company_id)
+            for edge in edges:
+                other = edge.from_company_id if upward else edge.to_company_id
+                next_frontier[other] = next_frontier.get(other, 0.0) + stake * edge.ownership_percentage / 100
+        frontier = {cid: stake for cid, stake in next_frontier.items() if stake >= tolerance}
+        if not frontier:
+            break
+        for company_id, stake in frontier.items():
+            totals[company_id] = totals.get(company_id, 0.0) + stake
+    totals.pop(start, None)
+    return totals
+
+
+def effective_holdings(
+    graph_store: GraphStore,
+    owner_id: str,
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+) -> dict[str, float]:
+    """Effective percentage of every company the owner holds directly or indirectly."""
+    fractions = _propagate(graph_store, owner_id, upward=False, tolerance=tolerance, max_depth=max_depth)
+    return {cid: min(stake * 100, 100.0) for cid, stake in fractions.items()}
+
+
+def effective_owners(
+    graph_store: GraphStore,
+    company_id: str,
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_depth: int = DEFAULT_MAX_DEPTH,
+) -> dict[str, float]:
+    """Effective percentage each direct or indirect owner holds in the company."""
+    fractions = _propagate(graph_store, company_id, upward=True, tolerance=tolerance, max_depth=max_depth)
+    return {cid: min(stake * 100, 100.0) for cid, stake in fractions.items()}
@@ -0,0 +1,117 @@
+"""Reachability index answering "does X directly or indirectly own Y" without a graph walk."""
+
+from bisect import bisect_right
+
+from knot.models.company import Company, OwnershipEdge
+from knot.services.graph_traversal import strongly_connected_components
+from knot.stores.graph_store import GraphStore
+
+
+class ReachabilityIndex:
+    """Compressed transitive closure of the ownership graph.
+
+    Cycles are collapsed into their strongly connected components first. The
+    resulting DAG is numbered in post-order over a spanning forest, so every
+    subtree is one contiguous range; each component then keeps the sorted,
+    merged ranges of everything it reaches (its subtree plus whatever the
+    non-tree edges add). A query is one binary search over the owner's
+    ranges. The index is rebuilt lazily after an ownership edge is added.
+    """
+
+    def __init__(self, graph_store: GraphStore):
+        self.graph_store = graph_store
+        self._component: dict[str, int] = {}  # company_id -> component number
+        self._post: list[int] = []  # component -> post-order number
+        self._cyclic: list[bool] = []  # component reaches itself (cycle or self-loop)
+        self._starts: list[list[int]] = []  # component -> sorted range starts of reachable post numbers
+        self._ends: list[list[int]] = []
+        self._stale = True
+        graph_store.add_listener(self._on_graph_change)
+
+    def _on_graph_change(self, item: Company | OwnershipEdge | None) -> None:
+        if not isinstance(item, Company):
+            self._stale = True
+
+    def invalidate(self) -> None:
+        """Force a rebuild on the next query (e.g. after restoring a snapshot)."""
+        self._stale = True
+
+    def build(self) -> None:
+        # Tarjan emits components in reverse topological order: successors have lower numbers.
+        components = strongly_connected_components(self.graph_store)
+        component = {member: i for i, members in enumerate(components) for member in members}
+        successors: list[list[int]] = []
+        cyclic = []
+        for i, members in enumerate(components):
+            targets = {
+                component[edge.to_company_id]
+                for member in members
+                for edge in self.graph_store.get_subsidiary_edges(member)
+            }
+            cyclic.append(len(members) > 1 or i in targets)
+            targets.discard(i)
+            successors.append(sorted(targets, reverse=True))
+
+        # Post-order over a spanning forest, roots taken in topological order
+        post = [0] * len(components)
+        low = [0] * len(components)  # smallest post number in the component's subtree
+        entered = [False] * len(components)
+        counter = 0
+        for root in range(len(components) - 1, -1, -1):
+            if entered[root]:
+                continue
+            entered[root] = True
+            work = [(root, counter, iter(successors[root]))]
+            while work:
+                node, first, children = work[-1]
+                child = next((c for c in children if not entered[c]), None)
+                if child is not None:
+                    entered[child] = True
+                    work.append((child, counter, iter(successors[child])))
+                    continue
+                work.pop()
+                low[node] = first
+                post[node] = counter
+                counter += 1
+
+        # Reachable ranges, sinks first so every successor is already done
+        starts: list[list[int]] = []
+        ends: list[list[int]] = []
+        for i in range(len(components)):
+            ranges = [(low[i], post[i])]
+            for j in successors[i]:
+                ranges.extend(zip(starts[j], ends[j]))
+            ranges.sort()
+            merged_starts, merged_ends = [ranges[0][0]], [ranges[0][1]]
+            for start, end in ranges[1:]:
+                if start <= merged_ends[-1] + 1:
+                    merged_ends[-1] = max(merged_ends[-1], end)
+                else:
+                    merged_starts.append(start)
+                    merged_ends.append(end)
+            starts.append(merged_starts)
+            ends.append(merged_ends)
+
+        self._component = component
+        self._post = post
+        self._cyclic = cyclic
+        self._starts = starts
+        self._ends = ends
+        self._stale = False
+
+    def controls(self, owner_id: str, company_id: str) -> bool:
+        """True if `owner_id` holds `company_id` directly or through intermediaries.
+
+        A company only controls itself when it sits on an ownership cycle.
+        """
+        if self._stale:
+            self.build()
+        owner = self._component.get(owner_id)
+        company = self._component.get(company_id)
+        if owner is None or company is None:
+            return False
+        if owner == company:
+            return self._cyclic[owner]
+        target = self._post[company]
+        pos = bisect_right(self._starts[owner], target) - 1
+        return pos >= 0 and target <= self._ends[owner][pos]
@@ -1,13 +1,19 @@
 """Jaccard similarity scoring and claim matching."""
 
+import hashlib
+import heapq
+import math
+from array import array
+from typing import AbstractSet, Callable, Hashable, Iterable, Optional, Sequence
+
 
 def jaccard_similarity(set_a: set[str], set_b: set[str]) -> float:
     """Compute Jaccard similarity between two sets of keywords."""
     if not set_a or not set_b:
         return 0.0
-    intersection = set_a & set_b
-    union = set_a | set_b
-    return len(intersection) / len(union)
+    # |A ∪ B| = |A| + |B| - |A ∩ B|, so the union set is never built
+    intersection = len(set_a & set_b)
+    return intersection / (len(set_a) + len(set_b) - intersection)
 
 
 def keyword_similarity(keywords_a: list[str], keywords_b: list[str]) -> float:
@@ -17,6 +23,177 @@ def keyword_similarity(keywords_a: list[str], keywords_b: list[str]) -> float:
     return jaccard_similarity(set_a, set_b)
 
 
+def keyword_id_similarity(query_ids: set[int], query_size: int, doc_ids) -> float:
+    """Jaccard similarity over interned keyword ids.
+
+    `query_size` is the number of distinct query terms, including any the
+    vocabulary does not know (they still count toward the union).
+    """
+    if not query_size or not doc_ids:
+        return 0.0
+    intersection = sum(1 for term_id in doc_ids if term_id in query_ids)
+    return intersection / (query_size + len(doc_ids) - intersection)
+
+
+def _select(scored: list[tuple[int, float]], top_k: Optional[int]) -> list[tuple[int, float]]:
+    """Best first, ties in input order; only the top_k when given."""
+    if top_k is not None:
+        return heapq.nsmallest(top_k, scored, key=lambda hit: (-hit[1], hit[0]))
+    return sorted(scored, key=lambda hit: (-hit[1], hit[0]))
+
+
+def jaccard_many_to_many(
+    rows: Sequence[AbstractSet[Hashable]],
+    cols: Sequence[AbstractSet[Hashable]],
+    threshold: float = 0.0,
+) -> list[tuple[int, int, float]]:
+    """Jaccard scores above `threshold` for every (row, col) pair, in row-major order.
+
+    The columns are indexed into posting lists once; each row then walks
+    the postings of its own terms, so pairs that share no term are never
+    scored.
+    """
+    postings: dict[Hashable, list[int]] = {}
+    for j, col in enumerate(cols):
+        for term in col:
+            postings.setdefault(term, []).append(j)
+
+    pairs = []
+    for i, row in enumerate(rows):
+        overlaps: dict[int, int] = {}
+        for term in row:
+            for j in postings.get(term, ()):
+                overlaps[j] = overlaps.get(j, 0) + 1
+        for j in sorted(overlaps):
+            overlap = overlaps[j]
+            score = overlap / (len(row) + len(cols[j]) - overlap)
+            if score > threshold:
+                pairs.append((i, j, score))
+    return pairs
+
+
+def jaccard_from_postings(
+    query_postings: Iterable[Iterable[int]],
+    query_size: int,
+    doc_size: Callable[[int], int],
+    threshold: float = 0.0,
+    top_k: Optional[int] = None,
+) -> list[tuple[int, float]]:
+    """Jaccard scores of one query against an indexed corpus, as (doc, score) pairs above `threshold`.
+
+    `query_postings` are the posting lists of the query's known terms (the
+    term-document matrix columns); `query_size` counts all distinct query
+    terms, known or not. Intersections are accumulated term-at-a-time, so
+    only documents sharing a term are touched.
+    """
+    if not query_size:
+        return []
+    overlaps: dict[int, int] = {}
+    for posting in query_postings:
+        for doc in posting:
+            overlaps[doc] = overlaps.get(doc, 0) + 1
+    scored = []
+    for doc, intersection in overlaps.items():
+        score = intersection / (query_size + doc_size(doc) - intersection)
+        if score > threshold:
+            scored.append((doc, score))
+    return _select(scored, top_k)
+
+
+def minhash_signature(features: Iterable[str], num_perm: int = 64) -> array:
+    """MinHash signature of a feature set (e.g. shingles); empty for an empty set.
+
+    Each feature is expanded by SHAKE-128 into `num_perm` independent 32-bit
+    hash values, and the signature keeps the minimum per position, so the
+    fraction of equal positions in two signatures estimates the Jaccard
+    similarity of the underlying sets. The hash is fixed, so signatures stay
+    comparable across processes and snapshots.
+    """
+    rows = [array("I", hashlib.shake_128(feature.encode()).digest(4 * num_perm)) for feature in set(features)]
+    if not rows:
+        return array("I")
+    return array("I", map(min, zip(*rows)))
+
+
+def minhash_similarity(signature_a: Sequence[int], signature_b: Sequence[int]) -> float:
+    """Estimated Jaccard similarity of two signatures of equal length."""
+    if not signature_a or not signature_b:
+        return 0.0
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+
+def _min_overlap(threshold: float, size: int) -> int:
+    """Fewest shared terms a set of `size` terms needs to reach `threshold` against any set."""
+    return max(1, math.ceil(threshold * size - 1e-9))
+
+
+def similarity_join(sets: Sequence[Iterable[Hashable]], threshold: float) -> list[tuple[int, int, float]]:
+    """All pairs (i, j, score) with i < j and Jaccard score above `threshold`, in (i, j) order.
+
+    PPJoin-style prefix filtering: terms are ranked rarest first and sets are
+    visited from smallest to largest. Two sets reaching the threshold must
+    share a term within the short prefix of their rare terms, so only the
+    prefixes are indexed and probed; the length and positional filters drop
+    most candidates before the full intersection is computed.
+    """
+    frequency: dict[Hashable, int] = {}
+    term_sets = [set(terms) for terms in sets]
+    for terms in term_sets:
+        for term in terms:
+            frequency[term] = frequency.get(term, 0) + 1
+    rank = {term: i for i, term in enumerate(sorted(frequency, key=frequency.__getitem__))}
+    records = [sorted(rank[term] for term in terms) for terms in term_sets]
+    order = sorted((i for i, record in enumerate(records) if record), key=lambda i: len(records[i]))
+
+    sizes = [len(record) for record in records]
+    factor = threshold / (1 + threshold)
+    # Term rank -> (set, position) of indexed prefixes, appended in size order; entries
+    # before `skip[rank]` belong to sets now too small to reach the threshold.
+    index: dict[int, list[tuple[int, int]]] = {}
+    skip: dict[int, int] = {}
+    pairs = []
+    for x in order:
+        record = records[x]
+        size = sizes[x]
+        probe_prefix = size - _min_overlap(threshold, size) + 1
+        min_size = threshold * size - 1e-9  # smaller sets cannot reach the threshold
+        overlaps: dict[int, int] = {}
+        for i in range(probe_prefix):
+            term = record[i]
+            entries = index.get(term)
+            if not entries:
+                continue
+            first = skip.get(term, 0)
+            while first < len(entries) and sizes[entries[first][0]] < min_size:
+                first += 1
+            skip[term] = first
+            remaining = size - i - 1
+            for y, j in entries[first:]:
+                seen = overlaps.get(y, 0)
+                if seen < 0:
+                    continue
+                # Positional filter: the terms after both positions bound the remaining overlap
+                y_size = sizes[y]
+                rest = y_size - j - 1
+                if seen + 1 + (remaining if remaining < rest else rest) >= math.ceil(factor * (size + y_size) - 1e-9):
+                    overlaps[y] = seen + 1
+                else:
+                    overlaps[y] = -1
+        x_terms = term_sets[x]
+        for y, seen in overlaps.items():
+            if seen <= 0:
+                continue
+            intersection = len(x_terms & term_sets[y])
+            score = intersection / (size + sizes[y] - intersection)
+            if score > threshold:
+                pairs.append((x, y, score) if x < y else (y, x, score))
+        # Index the shorter mid-prefix: later sets are at least as large
+        for i in range(size - _min_overlap(2 * factor, size) + 1):
+            index.setdefault(record[i], []).append((x, i))
+    pairs.sort()
+    return pairs
+
+
 def claim_text_similarity(claim_text: str, description: str) -> tuple[float, list[str]]:
     """Compare a patent claim against a product/technology description.
 
@@ -19,6 +19,16 @@ STOP_WORDS = {
     "including", "method", "system", "device", "apparatus", "means",
 }
 
+# Legal-form suffixes and generic business words that many company names share;
+# left out of name matching so "X Technologies" does not resolve to "Y Technologies".
+COMPANY_NAME_STOP_WORDS = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "llc", "ltd",
+    "limited", "pvt", "private", "plc", "gmbh", "ag", "nv", "bv", "sa", "ab", "kk",
+    "holdings", "group", "technologies", "technology", "solutions", "systems",
+    "industries", "international", "partners", "platforms", "dynamics", "research",
+    "innovations", "labs", "services", "india", "europe", "asia", "usa",
+}
+
 
 def normalize_text(text: str) -> str:
     """Normalize text: lowercase, collapse whitespace, remove special chars.
@@ -36,27 +46,50 @@ def normalize_text(text: str) -> str:
     return result.strip()
 
 
-def extract_keywords(text: str, max_keywords: int = 20) -> list[str]:
-    """Extract meaningful keywords from text, filtering stop words."""
-    normalized = normalize_text(text)
-    words = normalized.split()
-    # Filter stop words and short words
-    keywords = []
-    seen = set()
-    for word in words:
+def tokenize(text: str) -> list[str]:
+    """Split text into normalized content terms, keeping repeats (for term-frequency scoring)."""
+    tokens = []
+    for word in normalize_text(text).split():
         word_clean = word.strip("-")
         if (
             word_clean
             and word_clean not in STOP_WORDS
             and len(word_clean) > 2
-            and word_clean not in seen
             and not word_clean.isdigit()
         ):
-            seen.add(word_clean)
-            keywords.append(word_clean)
+            tokens.append(word_clean)
+    return tokens
+
+
+def extract_keywords(text: str, max_keywords: int = 20) -> list[str]:
+    """Extract meaningful keywords from text, filtering stop words."""
+    keywords = list(dict.fromkeys(tokenize(text)))
     return keywords[:max_keywords]
 
 
+def trigrams(text: str) -> set[str]:
+    """Character trigrams of a name, padded so word boundaries count (pg_trgm style)."""
+    cleaned = re.sub(r"[^\w]+", " ", text.lower()).strip()
+    if not cleaned:
+        return set()
+    padded = f" {cleaned} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def company_name_core(name: str) -> str:
+    """Distinctive words of a company name, lowercased; the whole name if every word is generic."""
+    words = re.sub(r"[^\w]+", " ", name.lower()).split()
+    return " ".join([w for w in words if w not in COMPANY_NAME_STOP_WORDS] or words)
+
+
+def shingles(text: str, size: int = 3) -> set[str]:
+    """Word shingles: every run of `size` consecutive content terms (the whole text if shorter)."""
+    tokens = tokenize(text)
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
 def simulate_ocr(text: str) -> str:
     """Simulate OCR by adding realistic artifacts, then cleaning them.
 
@@ -0,0 +1,131 @@
+"""SQLite-backed patent store: records on disk, indexes and hot records in memory."""
+
+import sqlite3
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, MutableMapping
+
+from knot.models.patent import Patent
+from knot.stores.patent_store import PatentStore
+
+
+class SQLitePatentMapping(MutableMapping[str, Patent]):
+    """Patent records persisted as JSON rows, with an LRU cache of recently used patents.
+
+    Iteration follows first-insertion order (rowid is kept on update), matching
+    the dict the in-memory store uses. Every write is committed immediately,
+    except inside batch(), which commits once at the end.
+    """
+
+    def __init__(self, path: str, cache_size: int = 4096):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS patents (id TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        self._cache: OrderedDict[str, Patent] = OrderedDict()
+        self._cache_size = cache_size
+        self._batch_depth = 0
+
+    def _remember(self, patent: Patent) -> None:
+        self._cache[patent.id] = patent
+        self._cache.move_to_end(patent.id)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def __getitem__(self, patent_id: str) -> Patent:
+        patent = self._cache.get(patent_id)
+        if patent is not None:
+            self._cache.move_to_end(patent_id)
+            return patent
+        row = self._conn.execute("SELECT data FROM patents WHERE id = ?", (patent_id,)).fetchone()
+        if row is None:
+            raise KeyError(patent_id)
+        patent = Patent.model_validate_json(row[0])
+        self._remember(patent)
+        return patent
+
+    def __setitem__(self, patent_id: str, patent: Patent) -> None:
+        self._conn.execute(
+            "INSERT INTO patents (id, data) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET data = excluded.data",
+            (patent_id, patent.model_dump_json()),
+        )
+        self._remember(patent)
+        self._written()
+
+    def __delitem__(self, patent_id: str) -> None:
+        cursor = self._conn.execute("DELETE FROM patents WHERE id = ?", (patent_id,))
+        if cursor.rowcount == 0:
+            raise KeyError(patent_id)
+        self._cache.pop(patent_id, None)
+        self._written()
+
+    def _written(self) -> None:
+        if not self._batch_depth:
+            self._conn.commit()
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Defer commits until the outermost batch ends, for bulk loads."""
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            self._written()
+
+    def __contains__(self, patent_id: object) -> bool:
+        if patent_id in self._cache:
+            return True
+        return self._conn.execute("SELECT 1 FROM patents WHERE id = ?", (patent_id,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        for (patent_id,) in self._conn.execute("SELECT id FROM patents ORDER BY rowid"):
+            yield patent_id
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM patents").fetchone()[0]
+
+    def iter_values(self) -> Iterator[Patent]:
+        """Stream all patents in insertion order without filling the cache."""
+        for patent_id, data in self._conn.execute("SELECT id, data FROM patents ORDER BY rowid"):
+            yield self._cache.get(patent_id) or Patent.model_validate_json(data)
+
+    def values(self) -> list[Patent]:
+        return list(self.iter_values())
+
+    def flush(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+class DiskPatentStore(PatentStore):
+    """PatentStore whose records live in a SQLite file.
+
+    Only the search indexes and an LRU of hot patents stay in memory; full
+    records (claims, abstract, raw text) are loaded on demand by get() and
+    search results. Opening an existing file rebuilds the indexes from it.
+    """
+
+    def __init__(self, path: str, cache_size: int = 4096):
+        storage = SQLitePatentMapping(path, cache_size)
+        super().__init__(storage)
+        self._storage = storage
+        for patent in storage.iter_values():
+            self._index(self._assign_doc(patent.id), patent)
+
+    def count(self) -> int:
+        return len(self._doc_patent_ids)
+
+    def batch(self):
+        """Context manager committing the adds made inside it in one transaction."""
+        return self._storage.batch()
+
+    def flush(self) -> None:
+        """Commit pending writes to disk."""
+        self._storage.flush()
+
+    def close(self) -> None:
+        self._storage.close()
@@ -0,0 +1,81 @@
+"""Patent family index: the same invention filed with several offices, grouped under one id."""
+
+from typing import Iterable, Optional
+
+from knot.models.patent import Patent
+from knot.stores.patent_store import PatentStore
+
+# Estimated shingle similarity above which a record from another office joins an existing family
+FAMILY_SIMILARITY_THRESHOLD = 0.8
+
+
+class FamilyIndex:
+    """Family id -> member patent ids (insertion order), kept current through a store listener.
+
+    A record that carries a `family_id` joins that family. Otherwise it joins
+    the family of its closest earlier near-duplicate filed with another
+    office, or starts a family of its own. Only earlier records are
+    considered, so rebuilding from the store gives the same families as
+    adding the records one by one. The first member is the representative.
+    """
+
+    def __init__(self, patent_store: PatentStore):
+        self.patent_store = patent_store
+        patent_store.add_listener(self._on_patent_added)
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Recompute every family from the store (e.g. after restoring a snapshot)."""
+        self._family: dict[str, str] = {}  # patent_id -> family id
+        self._members: dict[str, list[str]] = {}  # family id -> patent ids
+        for patent in self.patent_store.get_all():
+            self._attach(patent)
+
+    def family_id(self, patent_id: str) -> Optional[str]:
+        return self._family.get(patent_id)
+
+    def members(self, family_id: str) -> list[str]:
+        return list(self._members.get(family_id, ()))
+
+    def representative(self, family_id: str) -> Optional[str]:
+        members = self._members.get(family_id)
+        return members[0] if members else None
+
+    def family_count(self) -> int:
+        return len(self._members)
+
+    def collapse(self, patents: Iterable[Patent]) -> list[list[Patent]]:
+        """Group patents by family in order of first appearance; each group's first patent represents it."""
+        groups: dict[str, list[Patent]] = {}
+        for patent in patents:
+            groups.setdefault(self._family.get(patent.id, patent.id), []).append(patent)
+        return list(groups.values())
+
+    def _assign(self, patent: Patent) -> str:
+        if patent.family_id:
+            return patent.family_id
+        doc = self.patent_store.doc_number(patent.id)
+        for other, _ in self.patent_store.near_duplicates(patent, FAMILY_SIMILARITY_THRESHOLD):
+            if other.source != patent.source and self.patent_store.doc_number(other.id) < doc:
+                return self._family[other.id]
+        return f"FAM-{patent.id}"
+
+    def _attach(self, patent: Patent) -> None:
+        family_id = self._assign(patent)
+        self._family[patent.id] = family_id
+        members = self._members.setdefault(family_id, [])
+        members.append(patent.id)
+        if len(members) > 1 and self.patent_store.doc_number(members[-2]) > self.patent_store.doc_number(patent.id):
+            members.sort(key=self.patent_store.doc_number)  # a replaced record keeps its place
+
+    def _detach(self, patent_id: str) -> None:
+        family_id = self._family.pop(patent_id)
+        members = self._members[family_id]
+        members.remove(patent_id)
+        if not members:
+            del self._members[family_id]
+
+    def _on_patent_added(self, patent: Patent, previous: Optional[Patent]) -> None:
+        if previous is not None:
+            self._detach(patent.id)
+        self._attach(patent)
@@ -1,23 +1,136 @@
 """In-memory graph store simulating Neo4j for corporate ownership."""
 
-from typing import Optional
+import base64
+import json
+from collections import deque
+from datetime import date
+from typing import Callable, Iterable, Optional
 from knot.models.company import Company, OwnershipEdge, OwnershipGraph
+from knot.services.text_processing import company_name_core, trigrams
+from knot.stores.indexes import IntervalIndex, InvertedIndex
+
+# Minimum trigram similarity for a fuzzy company-name match
+MIN_NAME_SIMILARITY = 0.5
+# How far the best fuzzy match must lead the next company's score to be trusted
+MIN_NAME_MARGIN = 0.1
+# Which ownership edges an ownership-graph traversal follows: owners, holdings or both
+GRAPH_DIRECTIONS = ("up", "down", "both")
+
+
+def _graph_query(company_id: str, as_of: Optional[date], max_depth: Optional[int], direction: str) -> list:
+    """Parameters a graph cursor is bound to."""
+    return [company_id, direction, max_depth, as_of.isoformat() if as_of else None]
+
+
+def _encode_cursor(query: list, offset: int) -> str:
+    payload = json.dumps({"query": query, "offset": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def _decode_cursor(cursor: str, query: list) -> int:
+    """Offset stored in a graph cursor; the cursor must come from the same query."""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        offset = state["offset"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if state.get("query") != query or not isinstance(offset, int) or offset < 0:
+        raise ValueError("Cursor does not match this query")
+    return offset
 
 
 class GraphStore:
     def __init__(self):
         self._companies: dict[str, Company] = {}
         self._edges: list[OwnershipEdge] = []
+        # Current view: edges whose stake has not ended (end_date after today)
+        self._parent_edges: dict[str, list[OwnershipEdge]] = {}  # child_id -> edges from its owners
+        self._child_edges: dict[str, list[OwnershipEdge]] = {}  # owner_id -> edges to its holdings
+        self._next_expiry: Optional[date] = None  # earliest end_date still in the current view
+        self._parent_intervals = IntervalIndex()  # child_id -> owner edges by validity period
+        self._child_intervals = IntervalIndex()  # owner_id -> holding edges by validity period
+        self._ultimate_parents: dict[str, str] = {}  # memoized company_id -> ultimate parent id
         self._alias_index: dict[str, str] = {}  # alias_lower -> company_id
+        self._alias_trigrams = InvertedIndex()  # trigram -> aliases containing it
+        self._alias_trigram_counts: dict[str, int] = {}  # alias_lower -> number of trigrams
+        # Called with each added Company or OwnershipEdge; not part of the store's state.
+        self._listeners: list[Callable[[Company | OwnershipEdge | None], None]] = []
 
     def add_company(self, company: Company) -> None:
-        self._companies[company.id] = company
-        self._alias_index[company.canonical_name.lower()] = company.id
-        for alias in company.aliases:
-            self._alias_index[alias.lower()] = company.id
+        self._insert_company(company)
+        for listener in self._listeners:
+            listener(company)
 
     def add_edge(self, edge: OwnershipEdge) -> None:
+        self._insert_edge(edge)
+        self._invalidate_ultimate_parents(edge.to_company_id)
+        for listener in self._listeners:
+            listener(edge)
+
+    def bulk_load(self, companies: Iterable[Company], edges: Iterable[OwnershipEdge]) -> None:
+        """Insert many companies and edges in one pass.
+
+        Per-edge ultimate-parent invalidation and per-item listener callbacks
+        are skipped; the ultimate-parent index is rebuilt once at the end and
+        listeners are called once with None so they can rebuild.
+        """
+        for company in companies:
+            self._insert_company(company)
+        for edge in edges:
+            self._insert_edge(edge)
+        self._ultimate_parents.clear()
+        self.build_ultimate_parent_index()
+        for listener in self._listeners:
+            listener(None)
+
+    def _insert_company(self, company: Company) -> None:
+        self._companies[company.id] = company
+        for name in [company.canonical_name, *company.aliases]:
+            alias = name.lower()
+            if alias not in self._alias_trigram_counts:
+                alias_trigrams = trigrams(company_name_core(alias))
+                self._alias_trigrams.add(alias, alias_trigrams)
+                self._alias_trigram_counts[alias] = len(alias_trigrams)
+            self._alias_index[alias] = company.id
+
+    def _insert_edge(self, edge: OwnershipEdge) -> None:
         self._edges.append(edge)
+        self._parent_intervals.add(edge.to_company_id, edge, edge.effective_date, edge.end_date)
+        self._child_intervals.add(edge.from_company_id, edge, edge.effective_date, edge.end_date)
+        if edge.end_date is None or edge.end_date > date.today():
+            self._add_current_edge(edge)
+
+    def _add_current_edge(self, edge: OwnershipEdge) -> None:
+        self._parent_edges.setdefault(edge.to_company_id, []).append(edge)
+        self._child_edges.setdefault(edge.from_company_id, []).append(edge)
+        if edge.end_date is not None and (self._next_expiry is None or edge.end_date < self._next_expiry):
+            self._next_expiry = edge.end_date
+
+    def _expire_ended_edges(self) -> None:
+        """Drop stakes that have ended since they were added from the current view.
+
+        Memoized ultimate parents are cleared and listeners are called with
+        None, as after a bulk load.
+        """
+        if self._next_expiry is None or date.today() < self._next_expiry:
+            return
+        today = date.today()
+        self._parent_edges.clear()
+        self._child_edges.clear()
+        self._next_expiry = None
+        for edge in self._edges:
+            if edge.end_date is None or edge.end_date > today:
+                self._add_current_edge(edge)
+        self._ultimate_parents.clear()
+        for listener in self._listeners:
+            listener(None)
+
+    def add_listener(self, listener: Callable[[Company | OwnershipEdge | None], None]) -> None:
+        """Register a callback run after each added company or ownership edge.
+
+        It receives None after a bulk load, meaning "many changes: rebuild".
+        """
+        self._listeners.append(listener)
 
     def get_company(self, company_id: str) -> Optional[Company]:
         return self._companies.get(company_id)
@@ -29,43 +142,244 @@ class GraphStore:
         company_id = self._alias_index.get(name.lower())
         if company_id:
             return self._companies.get(company_id)
-        # Fuzzy match
-        name_lower = name.lower()
-        for alias, cid in self._alias_index.items():
-            if name_lower in alias or alias in name_lower:
-                return self._companies.get(cid)
-        return None
-
-    def get_parent_edges(self, company_id: str) -> list[OwnershipEdge]:
-        """Get edges where this company is owned by another (to_company_id == company_id)."""
-        return [e for e in self._edges if e.to_company_id == company_id]
-
-    def get_subsidiary_edges(self, company_id: str) -> list[OwnershipEdge]:
-        """Get edges where this company owns another (from_company_id == company_id)."""
-        return [e for e in self._edges if e.from_company_id == company_id]
-
-    def get_ownership_graph(self, company_id: str) -> OwnershipGraph:
-        """Build the full ownership graph around a company."""
-        visited = set()
-        nodes = []
-        edges = []
-        queue = [company_id]
+        # Fuzzy match: best-scoring alias by trigram similarity, if it clearly beats the runner-up
+        candidates = self.search_companies_by_name(name, limit=2)
+        if not candidates:
+            return None
+        if len(candidates) > 1 and candidates[0][1] - candidates[1][1] < MIN_NAME_MARGIN:
+            return None
+        return candidates[0][0]
+
+    def search_companies_by_name(
+        self,
+        name: str,
+        limit: int = 5,
+        min_score: float = MIN_NAME_SIMILARITY,
+    ) -> list[tuple[Company, float]]:
+        """Companies ranked by trigram (Jaccard) similarity of their best-matching name or alias.
+
+        Names are compared on their distinctive words (company_name_core), so
+        shared suffixes such as "Technologies" or "GmbH" do not count. Only
+        aliases sharing a trigram with the query are scored, so the cost
+        follows the query's posting lists rather than the number of aliases.
+        """
+        query_trigrams = trigrams(company_name_core(name))
+        if not query_trigrams:
+            return []
+        shared: dict[str, int] = {}
+        for trigram in query_trigrams:
+            for alias in self._alias_trigrams.get(trigram):
+                shared[alias] = shared.get(alias, 0) + 1
+
+        best: dict[str, float] = {}
+        for alias, overlap in shared.items():
+            score = overlap / (len(query_trigrams) + self._alias_trigram_counts[alias] - overlap)
+            company_id = self._alias_index[alias]
+            if score >= min_score and score > best.get(company_id, 0.0):
+                best[company_id] = score
+
+        ranked = sorted(best.items(), key=lambda item: (-item[1], item[0]))
+        return [
+            (self._companies[cid], score)
+            for cid, score in ranked
+            if cid in self._companies
+        ][:limit]
+
+    def get_parent_edges(self, company_id: str, as_of: Optional[date] = None) -> list[OwnershipEdge]:
+        """Get edges where this company is owned by another (to_company_id == company_id).
+
+        With `as_of`, only edges in effect on that date are returned;
+        without it, stakes that have ended are left out.
+        """
+        if as_of is not None:
+            return self._parent_intervals.active(company_id, as_of)
+        self._expire_ended_edges()
+        return list(self._parent_edges.get(company_id, ()))
+
+    def get_subsidiary_edges(self, company_id: str, as_of: Optional[date] = None) -> list[OwnershipEdge]:
+        """Get edges where this company owns another (from_company_id == company_id).
+
+        With `as_of`, only edges in effect on that date are returned;
+        without it, stakes that have ended are left out.
+        """
+        if as_of is not None:
+            return self._child_intervals.active(company_id, as_of)
+        self._expire_ended_edges()
+        return list(self._child_edges.get(company_id, ()))
+
+    def ultimate_parent(self, company_id: str, as_of: Optional[date] = None) -> str:
+        """Ultimate parent reached by following the largest-stake owner upward.
+
+        A walk that closes a cycle stops at the first company it revisits.
+        Current walks skip ended stakes and are memoized for every company on
+        the walk; historical (`as_of`) walks read the interval index and
+        bypass the memo.
+        """
+        if as_of is not None:
+            return self._ultimate_parent_as_of(company_id, as_of)
+        self._expire_ended_edges()
+        cached = self._ultimate_parents.get(company_id)
+        if cached is not None:
+            return cached
+
+        path: list[str] = []
+        position: dict[str, int] = {}
+        current = company_id
+        while True:
+            if current in self._ultimate_parents:
+                root = self._ultimate_parents[current]
+                break
+            if current in position:
+                # Each cycle member resolves to itself; the lead-in resolves to the entry point.
+                cycle_start = position[current]
+                for member in path[cycle_start:]:
+                    self._ultimate_parents[member] = member
+                path = path[:cycle_start]
+                root = current
+                break
+            position[current] = len(path)
+            path.append(current)
+            parent_edges = self._parent_edges.get(current)
+            if not parent_edges:
+                root = current
+                break
+            current = max(parent_edges, key=lambda e: e.ownership_percentage).from_company_id
+
+        for node in path:
+            self._ultimate_parents[node] = root
+        return self._ultimate_parents[company_id]
+
+    def _ultimate_parent_as_of(self, company_id: str, as_of: date) -> str:
+        seen: set[str] = set()
+        current = company_id
+        while current not in seen:
+            seen.add(current)
+            parent_edges = self._parent_intervals.active(current, as_of)
+            if not parent_edges:
+                return current
+            current = max(parent_edges, key=lambda e: e.ownership_percentage).from_company_id
+        return current
+
+    def build_ultimate_parent_index(self) -> None:
+        """Eagerly resolve the ultimate parent of every company."""
+        for company_id in self._companies:
+            self.ultimate_parent(company_id)
+
+    def _invalidate_ultimate_parents(self, company_id: str) -> None:
+        """Drop memoized parents for a company whose owners changed and its memoized descendants.
+
+        Any company whose cached walk passes through `company_id` is reachable
+        from it via subsidiary edges through cached companies only.
+        """
+        if company_id not in self._ultimate_parents:
+            return
+        del self._ultimate_parents[company_id]
+        queue = deque([company_id])
         while queue:
-            cid = queue.pop(0)
-            if cid in visited:
+            current = queue.popleft()
+            for edge in self._child_edges.get(current, ()):
+                child = edge.to_company_id
+                if child in self._ultimate_parents:
+                    del self._ultimate_parents[child]
+                    queue.append(child)
+
+    def _holding_edges_at(self, company_id: str, as_of: Optional[date]) -> list[OwnershipEdge]:
+        if as_of is not None:
+            return self._child_intervals.active(company_id, as_of)
+        self._expire_ended_edges()
+        return self._child_edges.get(company_id, [])
+
+    def _owner_edges_at(self, company_id: str, as_of: Optional[date]) -> list[OwnershipEdge]:
+        if as_of is not None:
+            return self._parent_intervals.active(company_id, as_of)
+        self._expire_ended_edges()
+        return self._parent_edges.get(company_id, [])
+
+    def _neighbours(self, company_id: str, as_of: Optional[date], direction: str) -> list[str]:
+        neighbours = []
+        if direction != "up":
+            neighbours.extend(e.to_company_id for e in self._holding_edges_at(company_id, as_of))
+        if direction != "down":
+            neighbours.extend(e.from_company_id for e in self._owner_edges_at(company_id, as_of))
+        return neighbours
+
+    @staticmethod
+    def cursor_offset(
+        cursor: str,
+        company_id: str,
+        as_of: Optional[date] = None,
+        max_depth: Optional[int] = None,
+        direction: str = "both",
+    ) -> int:
+        """Offset a get_ownership_graph cursor resumes from; ValueError if it is malformed or from another query."""
+        return _decode_cursor(cursor, _graph_query(company_id, as_of, max_depth, direction))
+
+    def get_ownership_graph(
+        self,
+        company_id: str,
+        as_of: Optional[date] = None,
+        max_depth: Optional[int] = None,
+        direction: str = "both",
+        max_nodes: Optional[int] = None,
+        cursor: Optional[str] = None,
+    ) -> OwnershipGraph:
+        """Ownership graph around a company, visited breadth-first from it.
+
+        `direction` follows holdings ("down"), owners ("up") or both, and stops
+        `max_depth` hops out. Companies come back in BFS order, `max_nodes` per
+        page; `next_cursor` resumes after this page. Each edge between visited
+        companies appears once, on the page of its later-visited endpoint.
+        `frontier` lists companies on this page cut off by the depth limit;
+        request one of them as `company_id` to load its neighbourhood.
+        """
+        if direction not in GRAPH_DIRECTIONS:
+            raise ValueError(f"Unknown direction: {direction}")
+        query = _graph_query(company_id, as_of, max_depth, direction)
+        offset = _decode_cursor(cursor, query) if cursor else 0
+        stop = None if max_nodes is None else offset + max_nodes
+
+        # BFS until one company past the page is known, so we can tell whether more remain
+        depth = {company_id: 0}
+        order = [company_id]
+        queue = deque(order)
+        while queue and (stop is None or len(order) <= stop):
+            cid = queue.popleft()
+            if max_depth is not None and depth[cid] >= max_depth:
                 continue
-            visited.add(cid)
+            for neighbour in self._neighbours(cid, as_of, direction):
+                if neighbour not in depth:
+                    depth[neighbour] = depth[cid] + 1
+                    order.append(neighbour)
+                    queue.append(neighbour)
+
+        position = {cid: i for i, cid in enumerate(order)}
+        page = order[offset:stop]
+        nodes = []
+        edges = []
+        frontier = []
+        for cid in page:
             company = self._companies.get(cid)
             if company:
                 nodes.append(company)
-            for edge in self._edges:
-                if edge.from_company_id == cid and edge.to_company_id not in visited:
+            for edge in self._holding_edges_at(cid, as_of):
+                if position.get(edge.to_company_id, len(order)) < position[cid] or edge.to_company_id == cid:
                     edges.append(edge)
-                    queue.append(edge.to_company_id)
-                if edge.to_company_id == cid and edge.from_company_id not in visited:
+            for edge in self._owner_edges_at(cid, as_of):
+                if position.get(edge.from_company_id, len(order)) < position[cid]:
                     edges.append(edge)
-                    queue.append(edge.from_company_id)
-        return OwnershipGraph(nodes=nodes, edges=edges)
+            if depth[cid] == max_depth and any(n not in depth for n in self._neighbours(cid, as_of, direction)):
+                frontier.append(cid)
+
+        next_cursor = _encode_cursor(query, stop) if stop is not None and len(order) > stop else None
+        return OwnershipGraph(nodes=nodes, edges=edges, frontier=frontier, next_cursor=next_cursor)
+
+    def get_node_ids(self) -> list[str]:
+        """All company ids plus any edge endpoints that have no Company record."""
+        self._expire_ended_edges()
+        node_ids = dict.fromkeys(self._companies)
+        node_ids.update(dict.fromkeys(self._child_edges))
+        node_ids.update(dict.fromkeys(self._parent_edges))
+        return list(node_ids)
 
     def count(self) -> int:
         return len(self._companies)
@@ -0,0 +1,380 @@
+"""Secondary index structures shared by the in-memory stores."""
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from typing import Any, Hashable, Iterable, Optional, Sequence
+
+
+class Vocabulary:
+    """Interns terms as dense integer ids so hot paths compare ints, not strings."""
+
+    def __init__(self):
+        self._ids: dict[str, int] = {}
+        self._terms: list[str] = []
+
+    def intern(self, term: str) -> int:
+        term_id = self._ids.get(term)
+        if term_id is None:
+            term_id = len(self._terms)
+            self._ids[term] = term_id
+            self._terms.append(term)
+        return term_id
+
+    def id(self, term: str) -> Optional[int]:
+        return self._ids.get(term)
+
+    def encode(self, terms: Iterable[str]) -> set[int]:
+        """Ids of the known terms; unknown terms are dropped rather than interned."""
+        return {self._ids[t] for t in terms if t in self._ids}
+
+    def decode(self, term_ids: Iterable[int]) -> list[str]:
+        return [self._terms[i] for i in term_ids]
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+
+class InvertedIndex:
+    """Term -> posting list of document numbers.
+
+    Document numbers are the dense integers a store assigns in insertion
+    order, so sorting a posting set reproduces the store's iteration order.
+    """
+
+    def __init__(self):
+        self._postings: dict[Hashable, set[int]] = {}
+
+    def add(self, doc: int, terms: Iterable[Hashable]) -> None:
+        for term in terms:
+            self._postings.setdefault(term, set()).add(doc)
+
+    def remove(self, doc: int, terms: Iterable[Hashable]) -> None:
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            posting.discard(doc)
+            if not posting:
+                del self._postings[term]
+
+    def get(self, term: Hashable) -> set[int]:
+        return self._postings.get(term, set())
+
+    def postings(self) -> Iterable[set[int]]:
+        return self._postings.values()
+
+    def union(self, terms: Iterable[Hashable]) -> set[int]:
+        """Documents containing any of the terms."""
+        result: set[int] = set()
+        for term in terms:
+            posting = self._postings.get(term)
+            if posting:
+                result |= posting
+        return result
+
+    def __contains__(self, term: Hashable) -> bool:
+        return term in self._postings
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+
+class LSHIndex:
+    """Locality-sensitive hashing over MinHash signatures, split into bands of rows.
+
+    Two documents become candidates when all rows of at least one band agree,
+    which happens with probability 1 - (1 - s**rows)**bands for Jaccard
+    similarity s: an S-curve that is steep around (1/bands)**(1/rows).
+    """
+
+    def __init__(self, bands: int, rows: int):
+        self.bands = bands
+        self.rows = rows
+        self._buckets: dict[tuple, set[int]] = {}  # (band, band rows) -> docs
+
+    def _keys(self, signature: Sequence[int]) -> list[tuple]:
+        if not signature:
+            return []
+        return [(band, tuple(signature[band * self.rows:(band + 1) * self.rows])) for band in range(self.bands)]
+
+    def add(self, doc: int, signature: Sequence[int]) -> None:
+        for key in self._keys(signature):
+            self._buckets.setdefault(key, set()).add(doc)
+
+    def remove(self, doc: int, signature: Sequence[int]) -> None:
+        for key in self._keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                continue
+            bucket.discard(doc)
+            if not bucket:
+                del self._buckets[key]
+
+    def candidates(self, signature: Sequence[int]) -> set[int]:
+        """Documents sharing at least one band with the signature."""
+        result: set[int] = set()
+        for key in self._keys(signature):
+            bucket = self._buckets.get(key)
+            if bucket:
+                result |= bucket
+        return result
+
+
+class Bitmap:
+    """Compact set of document numbers backed by a bytearray (one bit per doc)."""
+
+    __slots__ = ("_bits",)
+
+    def __init__(self, bits: bytes | bytearray = b""):
+        self._bits = bytearray(bits)
+
+    def add(self, doc: int) -> None:
+        byte = doc >> 3
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(byte + 1 - len(self._bits)))
+        self._bits[byte] |= 1 << (doc & 7)
+
+    def discard(self, doc: int) -> None:
+        byte = doc >> 3
+        if byte < len(self._bits):
+            self._bits[byte] &= ~(1 << (doc & 7)) & 0xFF
+
+    def __contains__(self, doc: int) -> bool:
+        byte = doc >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] >> (doc & 7) & 1)
+
+    def __iter__(self):
+        """Yield document numbers in ascending order."""
+        for i, byte in enumerate(self._bits):
+            if not byte:
+                continue
+            base = i << 3
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield base + bit
+
+    def __len__(self) -> int:
+        return int.from_bytes(self._bits, "little").bit_count()
+
+    def __bool__(self) -> bool:
+        return any(self._bits)
+
+    def _combine(self, other: "Bitmap", value: int) -> "Bitmap":
+        size = max(len(self._bits), len(other._bits))
+        return Bitmap(value.to_bytes(size, "little"))
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        return self._combine(other, int.from_bytes(self._bits, "little") | int.from_bytes(other._bits, "little"))
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        return self._combine(other, int.from_bytes(self._bits, "little") & int.from_bytes(other._bits, "little"))
+
+
+class BitmapIndex:
+    """Value -> Bitmap index for low-cardinality fields (jurisdiction, source, status)."""
+
+    def __init__(self):
+        self._bitmaps: dict[str, Bitmap] = {}
+
+    def add(self, doc: int, values: Iterable[str]) -> None:
+        for value in values:
+            self._bitmaps.setdefault(value, Bitmap()).add(doc)
+
+    def remove(self, doc: int, values: Iterable[str]) -> None:
+        for value in values:
+            bitmap = self._bitmaps.get(value)
+            if bitmap is not None:
+                bitmap.discard(doc)
+
+    def get(self, value: str) -> Bitmap:
+        return self._bitmaps.get(value, Bitmap())
+
+    def union(self, values: Iterable[str]) -> Bitmap:
+        """Documents having any of the values."""
+        result = Bitmap()
+        for value in values:
+            bitmap = self._bitmaps.get(value)
+            if bitmap is not None:
+                result = result | bitmap
+        return result
+
+    def values(self) -> list[str]:
+        return [v for v, bitmap in self._bitmaps.items() if bitmap]
+
+
+def classification_levels(code: str) -> list[str]:
+    """Hierarchy prefixes of an IPC/CPC code, e.g. G01K1/02 ->
+    [G, G01, G01K, G01K1, G01K1/02] (section, class, subclass, main group, subgroup)."""
+    levels = [code[:n] for n in (1, 3, 4) if len(code) > n]
+    if "/" in code:
+        levels.append(code[:code.index("/")])
+    levels.append(code)
+    return list(dict.fromkeys(levels))
+
+
+class PrefixIndex:
+    """Code -> document numbers, with prefix lookups via bisect over a sorted code array."""
+
+    def __init__(self):
+        self._docs: dict[str, set[int]] = {}
+        self._codes: list[str] = []  # sorted distinct codes
+
+    def add(self, doc: int, codes: Iterable[str]) -> None:
+        for code in codes:
+            if code not in self._docs:
+                self._docs[code] = set()
+                insort(self._codes, code)
+            self._docs[code].add(doc)
+
+    def remove(self, doc: int, codes: Iterable[str]) -> None:
+        for code in codes:
+            docs = self._docs.get(code)
+            if docs is None:
+                continue
+            docs.discard(doc)
+            if not docs:
+                del self._docs[code]
+                del self._codes[bisect_left(self._codes, code)]
+
+    def _codes_with_prefix(self, prefix: str) -> list[str]:
+        start = bisect_left(self._codes, prefix)
+        end = start
+        while end < len(self._codes) and self._codes[end].startswith(prefix):
+            end += 1
+        return self._codes[start:end]
+
+    def lookup(self, prefix: str) -> set[int]:
+        """Documents having at least one code starting with the prefix."""
+        result: set[int] = set()
+        for code in self._codes_with_prefix(prefix):
+            result |= self._docs[code]
+        return result
+
+    def breakdown(self, prefix: str) -> dict[str, int]:
+        """Distinct document counts per next hierarchy level below the prefix.
+
+        Codes that sit exactly at the prefix are counted under the prefix itself.
+        """
+        groups: dict[str, set[int]] = {}
+        for code in self._codes_with_prefix(prefix):
+            child = next((level for level in classification_levels(code) if len(level) > len(prefix)), code)
+            groups.setdefault(child, set()).update(self._docs[code])
+        return {child: len(docs) for child, docs in sorted(groups.items())}
+
+
+class IntervalIndex:
+    """Key -> items valid over a date interval [start, end), queried by point in time.
+
+    Each key's entries are kept sorted by start date, so the entries already
+    started at a date are a bisected prefix; only that prefix is checked
+    against end dates. Open-ended bounds (None) extend to the beginning or end
+    of time. Active items come back in insertion order.
+    """
+
+    def __init__(self):
+        self._entries: dict[Hashable, list[tuple[int, int, int, Any]]] = {}  # (start, seq, end, item)
+        self._next_seq = 0
+
+    def add(self, key: Hashable, item: Any, start: Optional[date] = None, end: Optional[date] = None) -> None:
+        start_ordinal = start.toordinal() if start else date.min.toordinal()
+        end_ordinal = end.toordinal() if end else date.max.toordinal() + 1
+        insort(self._entries.setdefault(key, []), (start_ordinal, self._next_seq, end_ordinal, item))
+        self._next_seq += 1
+
+    def active(self, key: Hashable, as_of: date) -> list[Any]:
+        """Items for the key whose interval contains `as_of`."""
+        entries = self._entries.get(key)
+        if not entries:
+            return []
+        point = as_of.toordinal()
+        started = entries[:bisect_right(entries, (point, self._next_seq))]
+        return [entry[3] for entry in sorted(started, key=lambda e: e[1]) if entry[2] > point]
+
+
+class DateOrderedIndex:
+    """Term -> document numbers ordered by a date, so date cutoffs prune inside the scan.
+
+    Undated documents sort before every date and therefore pass any cutoff.
+    """
+
+    def __init__(self):
+        self._days: dict[Hashable, list[int]] = {}  # term -> sorted date ordinals
+        self._docs: dict[Hashable, list[int]] = {}  # term -> docs, parallel to _days
+
+    @staticmethod
+    def _ordinal(day: Optional[date]) -> int:
+        return day.toordinal() if day else 0
+
+    def add(self, doc: int, terms: Iterable[Hashable], day: Optional[date]) -> None:
+        ordinal = self._ordinal(day)
+        for term in terms:
+            days = self._days.setdefault(term, [])
+            pos = bisect_right(days, ordinal)
+            days.insert(pos, ordinal)
+            self._docs.setdefault(term, []).insert(pos, doc)
+
+    def remove(self, doc: int, terms: Iterable[Hashable], day: Optional[date]) -> None:
+        ordinal = self._ordinal(day)
+        for term in terms:
+            days = self._days.get(term)
+            if days is None:
+                continue
+            docs = self._docs[term]
+            for pos in range(bisect_left(days, ordinal), bisect_right(days, ordinal)):
+                if docs[pos] == doc:
+                    del days[pos]
+                    del docs[pos]
+                    break
+            if not days:
+                del self._days[term]
+                del self._docs[term]
+
+    def union(self, terms: Iterable[Hashable], before: Optional[date] = None) -> set[int]:
+        """Documents containing any of the terms, dated strictly before `before` if given."""
+        result: set[int] = set()
+        for term in terms:
+            docs = self._docs.get(term)
+            if docs is None:
+                continue
+            if before is None:
+                result.update(docs)
+            else:
+                result.update(docs[:bisect_left(self._days[term], before.toordinal())])
+        return result
+
+
+class DisjointSet:
+    """Union-find over hashable items, with path halving and union by size."""
+
+    def __init__(self):
+        self._parent: dict = {}
+        self._size: dict = {}
+
+    def find(self, item):
+        parent = self._parent
+        if item not in parent:
+            parent[item] = item
+            self._size[item] = 1
+            return item
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        """Merge the sets of `a` and `b`; returns the surviving root."""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self._size[root_a] < self._size[root_b]:
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._size[root_a] += self._size.pop(root_b)
+        return root_a
+
+    def groups(self) -> list[list]:
+        """Members of every set, sets and members in first-seen order."""
+        groups: dict = {}
+        for item in self._parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return list(groups.values())
@@ -1,60 +1,289 @@
 """In-memory patent store simulating MongoDB."""
 
-from typing import Optional
+from array import array
+from typing import Callable, MutableMapping, Optional
 from knot.models.patent import Patent
+from knot.services.similarity import jaccard_from_postings, minhash_signature, minhash_similarity
+from knot.services.text_processing import extract_keywords, normalize_text, shingles, tokenize
+from knot.stores.indexes import Bitmap, BitmapIndex, InvertedIndex, LSHIndex, PrefixIndex, Vocabulary
+from knot.stores.ranking import BM25Index
+
+# Relative weight of each field's term occurrences in ranked search
+RANK_FIELD_WEIGHTS = {"title": 3.0, "keywords": 2.0, "abstract": 1.0, "claims": 1.0}
+# MinHash/LSH layout for near-duplicate lookups: 16 bands of 4 rows make
+# documents above roughly 0.5 shingle similarity likely candidates.
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4
 
 
 class PatentStore:
-    def __init__(self):
-        self._patents: dict[str, Patent] = {}
+    def __init__(self, storage: Optional[MutableMapping[str, Patent]] = None):
+        # Record storage; any mapping that preserves first-insertion order works.
+        self._patents: MutableMapping[str, Patent] = storage if storage is not None else {}
+        self._doc_ids: dict[str, int] = {}  # patent_id -> doc number (insertion order)
+        self._doc_patent_ids: list[str] = []  # doc number -> patent_id
+        self._text_index = InvertedIndex()  # title/abstract terms and exact keywords, for search()
+        self._vocabulary = Vocabulary()  # lowercased keyword -> term id
+        self._keyword_ids: list[array] = []  # doc number -> sorted unique keyword term ids
+        self._keyword_index = InvertedIndex()  # keyword term id -> docs, for search_by_keywords()
+        self._claim_vocabulary = Vocabulary()  # claim text keyword -> term id
+        self._claim_keyword_ids: list[list[frozenset[int]]] = []  # doc number -> keyword term ids per claim
+        self._title_index = InvertedIndex()  # normalized title -> docs, for exact duplicate lookups
+        self._signatures: list[array] = []  # doc number -> MinHash signature of text shingles
+        self._lsh_index = LSHIndex(MINHASH_BANDS, MINHASH_ROWS)
+        self._jurisdiction_index = BitmapIndex()
+        self._source_index = BitmapIndex()
+        self._status_index = BitmapIndex()
+        self._classification_index = PrefixIndex()
+        self._rank_index = BM25Index()
+        # Called as listener(patent, previous) after every add; not part of the store's state.
+        self._listeners: list[Callable[[Patent, Optional[Patent]], None]] = []
 
     def add(self, patent: Patent) -> None:
+        doc = self._doc_ids.get(patent.id)
+        previous = None
+        if doc is None:
+            doc = self._assign_doc(patent.id)
+        else:
+            previous = self._patents[patent.id]
+            self._unindex(doc, previous)
         self._patents[patent.id] = patent
+        self._index(doc, patent)
+        for listener in self._listeners:
+            listener(patent, previous)
+
+    def add_listener(self, listener: Callable[[Patent, Optional[Patent]], None]) -> None:
+        """Register a callback run after each add with the new and replaced (or None) patent."""
+        self._listeners.append(listener)
+
+    def _assign_doc(self, patent_id: str) -> int:
+        doc = len(self._doc_patent_ids)
+        self._doc_ids[patent_id] = doc
+        self._doc_patent_ids.append(patent_id)
+        return doc
+
+    def _index(self, doc: int, patent: Patent) -> None:
+        keyword_ids = array("I", sorted(set(self._vocabulary.intern(k.lower()) for k in patent.keywords)))
+        claim_keyword_ids = [
+            frozenset(self._claim_vocabulary.intern(k) for k in extract_keywords(claim.text))
+            for claim in patent.claims
+        ]
+        signature = self.signature(patent)
+        if doc == len(self._keyword_ids):
+            self._keyword_ids.append(keyword_ids)
+            self._claim_keyword_ids.append(claim_keyword_ids)
+            self._signatures.append(signature)
+        else:
+            self._keyword_ids[doc] = keyword_ids
+            self._claim_keyword_ids[doc] = claim_keyword_ids
+            self._signatures[doc] = signature
+        self._text_index.add(doc, self._text_terms(patent))
+        self._keyword_index.add(doc, keyword_ids)
+        self._title_index.add(doc, [normalize_text(patent.title)])
+        self._lsh_index.add(doc, signature)
+        self._jurisdiction_index.add(doc, patent.jurisdictions)
+        self._source_index.add(doc, [patent.source])
+        self._status_index.add(doc, [patent.status])
+        self._classification_index.add(doc, [c.code for c in patent.classifications])
+        self._rank_index.add(doc, self._rank_terms(patent))
+
+    def _unindex(self, doc: int, patent: Patent) -> None:
+        self._text_index.remove(doc, self._text_terms(patent))
+        self._keyword_index.remove(doc, self._keyword_ids[doc])
+        self._title_index.remove(doc, [normalize_text(patent.title)])
+        self._lsh_index.remove(doc, self._signatures[doc])
+        self._jurisdiction_index.remove(doc, patent.jurisdictions)
+        self._source_index.remove(doc, [patent.source])
+        self._status_index.remove(doc, [patent.status])
+        self._classification_index.remove(doc, [c.code for c in patent.classifications])
+        self._rank_index.remove(doc)
+
+    @staticmethod
+    def _text_terms(patent: Patent) -> set[str]:
+        # search() lowercases the query but compares keywords verbatim, so only
+        # keywords that are already lowercase can ever match there.
+        terms = set(f"{patent.title} {patent.abstract}".lower().split())
+        terms.update(k for k in patent.keywords if k == k.lower())
+        return terms
+
+    @staticmethod
+    def _rank_terms(patent: Patent) -> dict[str, float]:
+        fields = {
+            "title": tokenize(patent.title),
+            "keywords": tokenize(" ".join(patent.keywords)),
+            "abstract": tokenize(patent.abstract),
+            "claims": tokenize(" ".join(c.text for c in patent.claims)),
+        }
+        weights: dict[str, float] = {}
+        for field, tokens in fields.items():
+            for token in tokens:
+                weights[token] = weights.get(token, 0.0) + RANK_FIELD_WEIGHTS[field]
+        return weights
+
+    def _filter_mask(
+        self,
+        jurisdictions: list[str] | None = None,
+        sources: list[str] | None = None,
+        statuses: list[str] | None = None,
+    ) -> Optional[Bitmap]:
+        """Intersect the secondary indexes for the given filters (None when unfiltered)."""
+        mask = None
+        for index, values in (
+            (self._jurisdiction_index, jurisdictions),
+            (self._source_index, sources),
+            (self._status_index, statuses),
+        ):
+            if values:
+                bitmap = index.union(values)
+                mask = bitmap if mask is None else mask & bitmap
+        return mask
+
+    def _materialize(self, docs: set[int], mask: Optional[Bitmap]) -> list[Patent]:
+        """Resolve doc numbers to patents in insertion order, keeping only docs in the mask."""
+        if mask is not None:
+            docs = [d for d in sorted(docs) if d in mask]
+        else:
+            docs = sorted(docs)
+        return [self._patents[self._doc_patent_ids[d]] for d in docs]
 
     def get(self, patent_id: str) -> Optional[Patent]:
         return self._patents.get(patent_id)
 
+    def doc_number(self, patent_id: str) -> Optional[int]:
+        """Dense integer id of a stored patent (assigned in insertion order)."""
+        return self._doc_ids.get(patent_id)
+
+    def patent_id(self, doc: int) -> str:
+        return self._doc_patent_ids[doc]
+
     def get_all(self) -> list[Patent]:
         return list(self._patents.values())
 
-    def search(self, query: str, jurisdictions: list[str] | None = None) -> list[Patent]:
-        query_lower = query.lower()
-        query_terms = set(query_lower.split())
-        results = []
-        for patent in self._patents.values():
-            # Check title and abstract
-            text = f"{patent.title} {patent.abstract}".lower()
-            patent_kw = set(patent.keywords)
-            if query_terms & set(text.split()) or query_terms & patent_kw:
-                if jurisdictions:
-                    if any(j in patent.jurisdictions for j in jurisdictions):
-                        results.append(patent)
-                else:
-                    results.append(patent)
-        return results
-
-    def search_by_keywords(self, keywords: list[str], jurisdictions: list[str] | None = None) -> list[Patent]:
-        kw_set = set(k.lower() for k in keywords)
-        results = []
-        for patent in self._patents.values():
-            patent_kw = set(k.lower() for k in patent.keywords)
-            overlap = kw_set & patent_kw
-            if overlap:
-                if jurisdictions:
-                    if any(j in patent.jurisdictions for j in jurisdictions):
-                        results.append(patent)
-                else:
-                    results.append(patent)
-        return results
+    def search(
+        self,
+        query: str,
+        jurisdictions: list[str] | None = None,
+        statuses: list[str] | None = None,
+    ) -> list[Patent]:
+        query_terms = set(query.lower().split())
+        mask = self._filter_mask(jurisdictions, statuses=statuses)
+        return self._materialize(self._text_index.union(query_terms), mask)
+
+    def search_by_keywords(
+        self,
+        keywords: list[str],
+        jurisdictions: list[str] | None = None,
+        statuses: list[str] | None = None,
+    ) -> list[Patent]:
+        kw_ids = self.encode_keywords(keywords)
+        mask = self._filter_mask(jurisdictions, statuses=statuses)
+        return self._materialize(self._keyword_index.union(kw_ids), mask)
+
+    @property
+    def vocabulary(self) -> Vocabulary:
+        return self._vocabulary
+
+    def encode_keywords(self, keywords: list[str]) -> set[int]:
+        """Lowercase keywords once and map them to term ids (unknown keywords are dropped)."""
+        return self._vocabulary.encode(k.lower() for k in keywords)
+
+    def keyword_ids(self, patent_id: str) -> array:
+        """Sorted unique term ids of a patent's lowercased keywords."""
+        doc = self._doc_ids.get(patent_id)
+        return self._keyword_ids[doc] if doc is not None else array("I")
+
+    @property
+    def claim_vocabulary(self) -> Vocabulary:
+        return self._claim_vocabulary
+
+    def claim_keyword_ids(self, patent_id: str) -> list[frozenset[int]]:
+        """Term ids of each claim's extracted keywords, in claim order, computed when the patent was added."""
+        doc = self._doc_ids.get(patent_id)
+        return self._claim_keyword_ids[doc] if doc is not None else []
+
+    def similar_by_keywords(
+        self,
+        keywords: list[str],
+        threshold: float = 0.0,
+        top_k: Optional[int] = None,
+    ) -> list[tuple[Patent, float]]:
+        """Patents by keyword Jaccard similarity above `threshold`, best first (ties in insertion order).
+
+        Scored straight from the keyword postings, so only patents sharing a
+        keyword are touched.
+        """
+        query_size = len({k.lower() for k in keywords})
+        postings = [self._keyword_index.get(term_id) for term_id in self.encode_keywords(keywords)]
+        hits = jaccard_from_postings(postings, query_size, lambda doc: len(self._keyword_ids[doc]), threshold, top_k)
+        return [(self._patents[self._doc_patent_ids[doc]], score) for doc, score in hits]
+
+    def same_title(self, title: str) -> list[Patent]:
+        """Patents whose normalized title equals that of `title`, in insertion order."""
+        return self._materialize(self._title_index.get(normalize_text(title)), None)
+
+    def title_groups(self) -> list[list[str]]:
+        """Patent ids grouped by normalized title, for every title shared by two or more patents."""
+        groups = [sorted(docs) for docs in self._title_index.postings() if len(docs) > 1]
+        groups.sort()
+        return [[self._doc_patent_ids[doc] for doc in docs] for docs in groups]
+
+    @staticmethod
+    def signature(patent: Patent) -> array:
+        """MinHash signature over the word shingles of title, abstract and claims."""
+        text = " ".join([patent.title, patent.abstract, *(c.text for c in patent.claims)])
+        return minhash_signature(shingles(text), MINHASH_BANDS * MINHASH_ROWS)
+
+    def near_duplicates(self, patent: Patent, threshold: float = 0.5) -> list[tuple[Patent, float]]:
+        """Stored patents whose estimated shingle similarity to `patent` is above `threshold`.
+
+        Works for records not yet in the store. Only LSH candidates are
+        scored, so the cost follows the number of near matches rather than
+        the store size; a stored copy under the same id is skipped.
+        """
+        doc = self._doc_ids.get(patent.id)
+        if doc is not None and self._patents.get(patent.id) is patent:
+            signature = self._signatures[doc]  # the stored record: reuse its signature
+        else:
+            signature = self.signature(patent)
+        hits = []
+        for doc in self._lsh_index.candidates(signature):
+            if self._doc_patent_ids[doc] == patent.id:
+                continue
+            score = minhash_similarity(signature, self._signatures[doc])
+            if score > threshold:
+                hits.append((doc, score))
+        hits.sort(key=lambda hit: (-hit[1], hit[0]))
+        return [(self._patents[self._doc_patent_ids[doc]], score) for doc, score in hits]
+
+    def search_ranked(
+        self,
+        query: str,
+        jurisdictions: list[str] | None = None,
+        limit: int = 20,
+    ) -> list[tuple[Patent, float]]:
+        """Top `limit` patents for the query by BM25 score over title, abstract, keywords and claims."""
+        mask = self._filter_mask(jurisdictions)
+        hits = self._rank_index.top_k(tokenize(query), limit, mask)
+        return [(self._patents[self._doc_patent_ids[doc]], score) for doc, score in hits]
+
+    def filter(
+        self,
+        jurisdictions: list[str] | None = None,
+        sources: list[str] | None = None,
+        statuses: list[str] | None = None,
+    ) -> list[Patent]:
+        """Patents matching all given field filters, answered from the bitmap indexes."""
+        mask = self._filter_mask(jurisdictions, sources, statuses)
+        if mask is None:
+            return self.get_all()
+        return [self._patents[self._doc_patent_ids[d]] for d in mask]
 
     def search_by_classification(self, code_prefix: str) -> list[Patent]:
-        results = []
-        for patent in self._patents.values():
-            for cls in patent.classifications:
-                if cls.code.startswith(code_prefix):
-                    results.append(patent)
-                    break
-        return results
+        return self._materialize(self._classification_index.lookup(code_prefix), None)
+
+    def classification_breakdown(self, code_prefix: str = "") -> dict[str, int]:
+        """Patent counts per classification group one hierarchy level below the prefix."""
+        return self._classification_index.breakdown(code_prefix)
 
     def get_by_assignee(self, assignee: str) -> list[Patent]:
         assignee_lower = assignee.lower()
@@ -0,0 +1,190 @@
+"""Materialized patent-portfolio rollup per ultimate parent."""
+
+from array import array
+from bisect import bisect_left
+from heapq import nsmallest
+from collections import Counter, deque
+from typing import Iterable, Optional
+
+from knot.models.company import Company, OwnershipEdge
+from knot.models.patent import Patent
+from knot.stores.graph_store import GraphStore
+from knot.stores.indexes import classification_levels
+from knot.stores.patent_store import PatentStore
+
+
+def _subclass(code: str) -> str:
+    """Classification code cut to subclass level, e.g. G01K1/02 -> G01K."""
+    levels = classification_levels(code)
+    return levels[min(2, len(levels) - 1)]
+
+
+class Portfolio:
+    """Aggregated patents of a corporate group: sorted doc numbers plus per-field counts."""
+
+    __slots__ = ("companies", "docs", "by_jurisdiction", "by_status", "by_classification")
+
+    def __init__(self):
+        self.companies: set[str] = set()
+        self.docs = array("I")  # sorted unique patent doc numbers
+        self.by_jurisdiction: Counter[str] = Counter()
+        self.by_status: Counter[str] = Counter()
+        self.by_classification: Counter[str] = Counter()
+
+    def _counters(self, patent: Patent) -> Iterable[tuple[Counter, set[str]]]:
+        return (
+            (self.by_jurisdiction, set(patent.jurisdictions)),
+            (self.by_status, {patent.status}),
+            (self.by_classification, {_subclass(c.code) for c in patent.classifications}),
+        )
+
+    def add(self, doc: int, patent: Patent) -> None:
+        pos = bisect_left(self.docs, doc)
+        if pos < len(self.docs) and self.docs[pos] == doc:
+            return
+        self.docs.insert(pos, doc)
+        for counter, values in self._counters(patent):
+            counter.update(values)
+
+    def remove(self, doc: int, patent: Patent) -> None:
+        pos = bisect_left(self.docs, doc)
+        if pos == len(self.docs) or self.docs[pos] != doc:
+            return
+        del self.docs[pos]
+        for counter, values in self._counters(patent):
+            counter.subtract(values)
+            for value in values:
+                if counter[value] <= 0:
+                    del counter[value]
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+
+class PortfolioRollup:
+    """Ultimate parent id -> Portfolio of the patents held by every company it ultimately controls.
+
+    A company belongs to the portfolio of its ultimate parent (largest-stake
+    walk), so each company counts toward exactly one group. The view is kept
+    current through store listeners: a new company or patent is added to its
+    group, and a new edge moves only the companies below it whose ultimate
+    parent changed. Patents a company lists before they are stored are
+    counted once they arrive.
+    """
+
+    def __init__(self, graph_store: GraphStore, patent_store: PatentStore):
+        self.graph_store = graph_store
+        self.patent_store = patent_store
+        graph_store.add_listener(self._on_graph_change)
+        patent_store.add_listener(self._on_patent_added)
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Recompute the whole view from the stores (e.g. after restoring a snapshot)."""
+        self._portfolios: dict[str, Portfolio] = {}
+        self._roots: dict[str, str] = {}  # company_id -> ultimate parent id
+        self._company_patents: dict[str, list[str]] = {}  # company_id -> patent ids it lists
+        self._owners: dict[str, list[str]] = {}  # patent_id -> companies listing it
+        for company in self.graph_store.get_all_companies():
+            self._register(company)
+            self._attach(company.id)
+
+    def get(self, ultimate_parent_id: str) -> Portfolio:
+        portfolio = self._portfolios.get(ultimate_parent_id)
+        return portfolio if portfolio is not None else Portfolio()
+
+    def patent_ids(self, portfolio: Portfolio, offset: int = 0, limit: Optional[int] = None) -> list[str]:
+        """One page of a portfolio's patent ids, in store insertion order."""
+        end = len(portfolio.docs) if limit is None else offset + limit
+        return [self.patent_store.patent_id(doc) for doc in portfolio.docs[offset:end]]
+
+    @staticmethod
+    def member_ids(portfolio: Portfolio, exclude: str, offset: int = 0, limit: Optional[int] = None) -> list[str]:
+        """One page of a portfolio's company ids other than `exclude` (its parent), sorted."""
+        members = (company_id for company_id in portfolio.companies if company_id != exclude)
+        if limit is None:
+            return sorted(members)[offset:]
+        return nsmallest(offset + limit, members)[offset:]
+
+    def build(self, company_ids: Iterable[str]) -> Portfolio:
+        """Unmaterialized portfolio over an explicit set of companies."""
+        portfolio = Portfolio()
+        for company_id in company_ids:
+            company = self.graph_store.get_company(company_id)
+            if company:
+                portfolio.companies.add(company_id)
+                for patent_id in company.patent_ids:
+                    self._count(portfolio, patent_id)
+        return portfolio
+
+    def _count(self, portfolio: Portfolio, patent_id: str) -> None:
+        doc = self.patent_store.doc_number(patent_id)
+        if doc is not None:
+            portfolio.add(doc, self.patent_store.get(patent_id))
+
+    def _register(self, company: Company) -> None:
+        self._company_patents[company.id] = list(company.patent_ids)
+        for patent_id in company.patent_ids:
+            self._owners.setdefault(patent_id, []).append(company.id)
+
+    def _unregister(self, company_id: str) -> None:
+        for patent_id in self._company_patents.pop(company_id):
+            owners = self._owners[patent_id]
+            owners.remove(company_id)
+            if not owners:
+                del self._owners[patent_id]
+
+    def _attach(self, company_id: str) -> None:
+        root = self.graph_store.ultimate_parent(company_id)
+        self._roots[company_id] = root
+        portfolio = self._portfolios.setdefault(root, Portfolio())
+        portfolio.companies.add(company_id)
+        for patent_id in self._company_patents[company_id]:
+            self._count(portfolio, patent_id)
+
+    def _detach(self, company_id: str) -> None:
+        root = self._roots.pop(company_id)
+        portfolio = self._portfolios[root]
+        portfolio.companies.discard(company_id)
+        for patent_id in self._company_patents[company_id]:
+            # Keep patents another company of the same group also lists
+            if any(self._roots.get(other) == root for other in self._owners[patent_id] if other != company_id):
+                continue
+            doc = self.patent_store.doc_number(patent_id)
+            if doc is not None:
+                portfolio.remove(doc, self.patent_store.get(patent_id))
+        if not portfolio.companies:
+            del self._portfolios[root]
+
+    def _on_graph_change(self, item: Company | OwnershipEdge | None) -> None:
+        if item is None:
+            self.rebuild()
+            return
+        if isinstance(item, Company):
+            if item.id in self._roots:
+                self._detach(item.id)
+                self._unregister(item.id)
+            self._register(item)
+            self._attach(item.id)
+            return
+        # Only the new child and companies below it can change ultimate parent.
+        visited = {item.to_company_id}
+        queue = deque(visited)
+        while queue:
+            company_id = queue.popleft()
+            root = self._roots.get(company_id)
+            if root is not None and root != self.graph_store.ultimate_parent(company_id):
+                self._detach(company_id)
+                self._attach(company_id)
+            for edge in self.graph_store.get_subsidiary_edges(company_id):
+                if edge.to_company_id not in visited:
+                    visited.add(edge.to_company_id)
+                    queue.append(edge.to_company_id)
+
+    def _on_patent_added(self, patent: Patent, previous: Optional[Patent]) -> None:
+        doc = self.patent_store.doc_number(patent.id)
+        for root in {self._roots[company_id] for company_id in self._owners.get(patent.id, ())}:
+            portfolio = self._portfolios[root]
+            if previous is not None:
+                portfolio.remove(doc, previous)
+            portfolio.add(doc, patent)
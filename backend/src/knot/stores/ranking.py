@@ -0,0 +1,162 @@
+"""BM25 relevance index with MaxScore top-k retrieval."""
+
+import heapq
+import math
+from bisect import bisect_left
+from itertools import accumulate
+from typing import Optional
+
+from knot.stores.indexes import Bitmap
+
+
+class _Posting:
+    """Doc-ordered posting list for one term, plus bounds for its maximum score."""
+
+    __slots__ = ("docs", "tfs", "max_tf", "min_length")
+
+    def __init__(self):
+        self.docs: list[int] = []
+        self.tfs: list[float] = []
+        self.max_tf = 0.0
+        self.min_length = math.inf
+
+    def insert(self, doc: int, tf: float, length: float) -> None:
+        if not self.docs or doc > self.docs[-1]:
+            self.docs.append(doc)
+            self.tfs.append(tf)
+        else:
+            pos = bisect_left(self.docs, doc)
+            self.docs.insert(pos, doc)
+            self.tfs.insert(pos, tf)
+        # Bounds are never tightened on removal; a stale bound is still an upper bound.
+        self.max_tf = max(self.max_tf, tf)
+        self.min_length = min(self.min_length, length)
+
+    def delete(self, doc: int) -> None:
+        pos = bisect_left(self.docs, doc)
+        if pos < len(self.docs) and self.docs[pos] == doc:
+            del self.docs[pos]
+            del self.tfs[pos]
+
+
+class BM25Index:
+    """Okapi BM25 over weighted term frequencies.
+
+    Postings are kept sorted by doc number so queries can run document-at-a-time
+    with MaxScore pruning: terms whose combined upper bound cannot lift a document
+    above the current k-th best score are only probed (by bisect) for documents
+    produced by the remaining, essential terms.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, _Posting] = {}
+        self._lengths: dict[int, float] = {}
+        self._doc_terms: dict[int, list[str]] = {}
+        self._total_length = 0.0
+
+    def add(self, doc: int, term_weights: dict[str, float]) -> None:
+        """Index a document given its (field-weighted) term frequencies."""
+        self.remove(doc)
+        length = sum(term_weights.values())
+        self._lengths[doc] = length
+        self._doc_terms[doc] = list(term_weights)
+        self._total_length += length
+        for term, tf in term_weights.items():
+            self._postings.setdefault(term, _Posting()).insert(doc, tf, length)
+
+    def remove(self, doc: int) -> None:
+        terms = self._doc_terms.pop(doc, None)
+        if terms is None:
+            return
+        self._total_length -= self._lengths.pop(doc)
+        for term in terms:
+            posting = self._postings[term]
+            posting.delete(doc)
+            if not posting.docs:
+                del self._postings[term]
+
+    def _idf(self, posting: _Posting) -> float:
+        n = len(self._lengths)
+        df = len(posting.docs)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def _term_score(self, idf: float, tf: float, length: float, avg_length: float) -> float:
+        norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+        return idf * tf * (self.k1 + 1) / (tf + norm)
+
+    def top_k(self, terms: list[str], k: int, mask: Optional[Bitmap] = None) -> list[tuple[int, float]]:
+        """Best k (doc, score) pairs for the query terms, highest score first.
+
+        Ties keep the lower doc number. Documents outside the mask are skipped.
+        """
+        if k <= 0 or not self._lengths:
+            return []
+        avg_length = self._total_length / len(self._lengths) or 1.0
+
+        lists = []
+        for term in set(terms):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            idf = self._idf(posting)
+            bound = self._term_score(idf, posting.max_tf, posting.min_length, avg_length)
+            lists.append((bound, idf, posting))
+        if not lists:
+            return []
+        lists.sort(key=lambda entry: entry[0])
+        # cumulative[i]: best possible contribution of terms 0..i together
+        cumulative = list(accumulate(entry[0] for entry in lists))
+        cursors = [0] * len(lists)
+
+        heap: list[tuple[float, int]] = []  # (score, -doc); heap[0] is the current k-th best
+        threshold = 0.0
+        first_essential = 0
+
+        while True:
+            if len(heap) == k:
+                while first_essential < len(lists) and cumulative[first_essential] <= threshold:
+                    first_essential += 1
+                if first_essential == len(lists):
+                    break
+
+            candidate = None
+            for i in range(first_essential, len(lists)):
+                docs = lists[i][2].docs
+                if cursors[i] < len(docs) and (candidate is None or docs[cursors[i]] < candidate):
+                    candidate = docs[cursors[i]]
+            if candidate is None:
+                break
+
+            length = self._lengths[candidate]
+            score = 0.0
+            for i in range(first_essential, len(lists)):
+                _, idf, posting = lists[i]
+                pos = cursors[i]
+                if pos < len(posting.docs) and posting.docs[pos] == candidate:
+                    score += self._term_score(idf, posting.tfs[pos], length, avg_length)
+                    cursors[i] = pos + 1
+            if mask is not None and candidate not in mask:
+                continue
+
+            # Probe non-essential terms, strongest first, stopping once they cannot help.
+            for i in range(first_essential - 1, -1, -1):
+                if score + cumulative[i] <= threshold:
+                    break
+                _, idf, posting = lists[i]
+                pos = bisect_left(posting.docs, candidate, cursors[i])
+                cursors[i] = pos
+                if pos < len(posting.docs) and posting.docs[pos] == candidate:
+                    score += self._term_score(idf, posting.tfs[pos], length, avg_length)
+
+            if len(heap) < k:
+                heapq.heappush(heap, (score, -candidate))
+            elif score > threshold:
+                heapq.heapreplace(heap, (score, -candidate))
+            else:
+                continue
+            if len(heap) == k:
+                threshold = heap[0][0]
+
+        return [(-neg_doc, score) for score, neg_doc in sorted(heap, reverse=True)]
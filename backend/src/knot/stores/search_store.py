@@ -1,19 +1,53 @@
 """In-memory search store for products and prior art."""
 
+from datetime import date
 from typing import Optional
 from knot.models.product import ProductInfo, ProductMatch
 from knot.models.validity import PriorArtCandidate
+from knot.services.text_processing import extract_keywords
+from knot.stores.indexes import DateOrderedIndex, InvertedIndex
 
 
 class SearchStore:
     def __init__(self):
         self._products: dict[str, ProductInfo] = {}
-        self._product_matches: list[ProductMatch] = []
+        self._product_docs: dict[str, int] = {}  # product_id -> doc number (insertion order)
+        self._product_ids: list[str] = []  # doc number -> product_id
+        self._product_keywords: list[list[str]] = []  # doc number -> keywords of name + description
+        self._product_description_keywords: list[frozenset[str]] = []  # doc number -> description keywords
+        self._product_keyword_index = InvertedIndex()  # keyword -> docs, for product_candidates()
+        self._product_text_index = InvertedIndex()  # name/description/manufacturer words, for search_products()
+        self._product_matches: list[ProductMatch] = []  # in the order they were added
+        self._matches_by_patent: dict[str, list[ProductMatch]] = {}  # patent_id -> matches
         self._prior_art: dict[str, PriorArtCandidate] = {}
+        self._prior_art_docs: dict[str, int] = {}  # prior_art_id -> doc number (insertion order)
+        self._prior_art_ids: list[str] = []  # doc number -> prior_art_id
+        self._prior_art_keywords: list[frozenset[str]] = []  # doc number -> lowercased keywords
+        self._prior_art_index = DateOrderedIndex()  # term -> docs by publication date
 
     # Product methods
     def add_product(self, product: ProductInfo) -> None:
+        doc = self._product_docs.get(product.id)
+        if doc is None:
+            doc = len(self._product_ids)
+            self._product_docs[product.id] = doc
+            self._product_ids.append(product.id)
+            self._product_keywords.append([])
+            self._product_description_keywords.append(frozenset())
+        else:
+            previous = self._products[product.id]
+            self._product_keyword_index.remove(doc, self._product_keywords[doc])
+            self._product_text_index.remove(doc, self._product_text_terms(previous))
         self._products[product.id] = product
+        keywords = extract_keywords(f"{product.name} {product.description}")
+        self._product_keywords[doc] = keywords
+        self._product_description_keywords[doc] = frozenset(extract_keywords(product.description))
+        self._product_keyword_index.add(doc, keywords)
+        self._product_text_index.add(doc, self._product_text_terms(product))
+
+    @staticmethod
+    def _product_text_terms(product: ProductInfo) -> set[str]:
+        return set(f"{product.name} {product.description} {product.manufacturer}".lower().split())
 
     def get_product(self, product_id: str) -> Optional[ProductInfo]:
         return self._products.get(product_id)
@@ -21,42 +55,75 @@ class SearchStore:
     def get_all_products(self) -> list[ProductInfo]:
         return list(self._products.values())
 
+    def product_keywords(self, product_id: str) -> list[str]:
+        """Keywords extracted from the product's name and description when it was added."""
+        doc = self._product_docs.get(product_id)
+        return self._product_keywords[doc] if doc is not None else []
+
+    def product_description_keywords(self, product_id: str) -> frozenset[str]:
+        """Keywords extracted from the product's description alone when it was added."""
+        doc = self._product_docs.get(product_id)
+        return self._product_description_keywords[doc] if doc is not None else frozenset()
+
+    def product_candidates(self, keywords: list[str]) -> list[ProductInfo]:
+        """Products sharing at least one (lowercased) keyword, in catalog order."""
+        docs = self._product_keyword_index.union({k.lower() for k in keywords})
+        return [self._products[self._product_ids[d]] for d in sorted(docs)]
+
     def search_products(self, query: str) -> list[ProductInfo]:
-        query_lower = query.lower()
-        terms = set(query_lower.split())
-        results = []
-        for product in self._products.values():
-            text = f"{product.name} {product.description} {product.manufacturer}".lower()
-            if terms & set(text.split()):
-                results.append(product)
-        return results
+        docs = self._product_text_index.union(set(query.lower().split()))
+        return [self._products[self._product_ids[d]] for d in sorted(docs)]
 
     # Product match methods
     def add_product_match(self, match: ProductMatch) -> None:
         self._product_matches.append(match)
+        self._matches_by_patent.setdefault(match.patent_id, []).append(match)
 
     def get_matches_for_patent(self, patent_id: str) -> list[ProductMatch]:
-        return [m for m in self._product_matches if m.patent_id == patent_id]
+        return list(self._matches_by_patent.get(patent_id, ()))
 
     def get_all_matches(self) -> list[ProductMatch]:
         return list(self._product_matches)
 
     # Prior art methods
     def add_prior_art(self, prior_art: PriorArtCandidate) -> None:
+        doc = self._prior_art_docs.get(prior_art.id)
+        if doc is None:
+            doc = len(self._prior_art_ids)
+            self._prior_art_docs[prior_art.id] = doc
+            self._prior_art_ids.append(prior_art.id)
+            self._prior_art_keywords.append(frozenset())
+        else:
+            previous = self._prior_art[prior_art.id]
+            self._prior_art_index.remove(doc, self._prior_art_terms(previous), previous.publication_date)
         self._prior_art[prior_art.id] = prior_art
+        self._prior_art_keywords[doc] = frozenset(k.lower() for k in prior_art.keywords)
+        self._prior_art_index.add(doc, self._prior_art_terms(prior_art), prior_art.publication_date)
+
+    @staticmethod
+    def _prior_art_terms(prior_art: PriorArtCandidate) -> set[str]:
+        """Lowercased keywords plus title and relevant-text words."""
+        terms = {k.lower() for k in prior_art.keywords}
+        terms.update(prior_art.title.lower().split())
+        terms.update(prior_art.relevant_text.lower().split())
+        return terms
 
     def get_prior_art(self, prior_art_id: str) -> Optional[PriorArtCandidate]:
         return self._prior_art.get(prior_art_id)
 
+    def prior_art_keywords(self, prior_art_id: str) -> frozenset[str]:
+        """Lowercased keywords of a prior art entry, computed when it was added."""
+        doc = self._prior_art_docs.get(prior_art_id)
+        return self._prior_art_keywords[doc] if doc is not None else frozenset()
+
     def get_all_prior_art(self) -> list[PriorArtCandidate]:
         return list(self._prior_art.values())
 
-    def search_prior_art(self, keywords: list[str]) -> list[PriorArtCandidate]:
-        kw_set = set(k.lower() for k in keywords)
-        results = []
-        for pa in self._prior_art.values():
-            pa_kw = set(k.lower() for k in pa.keywords)
-            pa_text = set(pa.title.lower().split()) | set(pa.relevant_text.lower().split())
-            if kw_set & (pa_kw | pa_text):
-                results.append(pa)
-        return results
+    def search_prior_art(self, keywords: list[str], published_before: Optional[date] = None) -> list[PriorArtCandidate]:
+        """Prior art matching any keyword, optionally published strictly before a date.
+
+        Undated prior art always passes the date cutoff. Postings are ordered
+        by publication date, so entries on or after the cutoff are never read.
+        """
+        docs = self._prior_art_index.union({k.lower() for k in keywords}, published_before)
+        return [self._prior_art[self._prior_art_ids[d]] for d in sorted(docs)]
@@ -0,0 +1,93 @@
+"""Binary snapshots of seeded stores, including their indexes, for fast startup."""
+
+import logging
+import os
+import pickle
+import stat
+from pathlib import Path
+
+from knot.mock_data.seed import seed_data_hash
+from knot.stores.patent_store import PatentStore
+from knot.stores.graph_store import GraphStore
+from knot.stores.search_store import SearchStore
+
+# Bump whenever a store's internal layout changes; older snapshots are then ignored.
+SNAPSHOT_VERSION = 11
+# First line of a snapshot file, checked before anything is unpickled
+_HEADER = "knot-snapshot {version} {seed_hash}\n"
+
+logger = logging.getLogger(__name__)
+
+
+def _header() -> bytes:
+    return _HEADER.format(version=SNAPSHOT_VERSION, seed_hash=seed_data_hash()).encode()
+
+
+def _state(store) -> dict:
+    """A store's attributes minus its change listeners, which belong to the live process."""
+    return {name: value for name, value in vars(store).items() if name != "_listeners"}
+
+
+def build_snapshot(
+    path: str | Path,
+    patent_store: PatentStore,
+    graph_store: GraphStore,
+    search_store: SearchStore,
+) -> None:
+    """Write the full state of all three stores to `path` (atomically replaced).
+
+    The file is tagged with SNAPSHOT_VERSION and a hash of the seed files, so
+    it stops loading once either changes.
+    """
+    if getattr(patent_store, "_storage", None) is not None:
+        raise ValueError("Disk-backed patent stores persist their own records and cannot be snapshotted")
+    payload = {
+        "patent_store": _state(patent_store),
+        "graph_store": _state(graph_store),
+        "search_store": _state(search_store),
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_header())
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(
+    path: str | Path,
+    patent_store: PatentStore,
+    graph_store: GraphStore,
+    search_store: SearchStore,
+) -> bool:
+    """Restore the stores in place from a snapshot file.
+
+    The whole file is read and unpickled in one pass, so no JSON parsing or
+    pydantic validation happens. Returns False (leaving the stores untouched)
+    when the file is missing or empty, was built by another store version or
+    from other seed data, is writable by other users, or cannot be unpickled.
+    Unpickling runs code named in the file, so it is only done for files whose
+    header matches and that only their owner can write.
+    """
+    path = Path(path)
+    if not path.is_file() or path.stat().st_size == 0:
+        return False
+    if os.name == "posix" and path.stat().st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        logger.warning("Ignoring snapshot %s: writable by other users", path)
+        return False
+    try:
+        with open(path, "rb") as f:
+            if f.readline() != _header():
+                logger.info("Ignoring snapshot %s: built from another store version or seed data", path)
+                return False
+            payload = pickle.load(f)
+        states = payload["patent_store"], payload["graph_store"], payload["search_store"]
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError, IndexError,
+            KeyError, TypeError, ValueError) as exc:
+        logger.warning("Ignoring unreadable snapshot %s: %r", path, exc)
+        return False
+    # Update in place: agents and listeners already hold references to these store instances.
+    for store, state in zip((patent_store, graph_store, search_store), states):
+        vars(store).update(state)
+    return True
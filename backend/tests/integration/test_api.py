@@ -1,5 +1,9 @@
 """Integration tests for API endpoints."""
 
+import os
+import subprocess
+import sys
+
 import pytest
 from fastapi.testclient import TestClient
 from knot.main import create_app
@@ -33,6 +37,16 @@ class TestQueryEndpoint:
         data = resp.json()
         assert "executive_summary" in data
 
+    def test_fto_query_flags_assignees_controlled_by_named_company(self, client):
+        resp = client.post("/api/v1/query", json={
+            "query": "Analyze FTO for IoT temperature sensor in US against TechGlobal patents",
+        })
+        assert resp.status_code == 200
+        corp = next(s for s in resp.json()["sections"] if s["title"] == "Corporate Intelligence")
+        controlled = [r for r in corp["details"]["resolutions"] if r.get("controlled_by")]
+        assert controlled and all(r["controlled_by"] == ["COMP001"] for r in controlled)
+        assert "Controlled by the named companies" in corp["summary"]
+
     def test_corporate_query(self, client):
         resp = client.post("/api/v1/query", json={
             "query": "Who owns SensorTech?",
@@ -66,6 +80,46 @@ class TestCorporateEndpoints:
         data = resp.json()
         assert "nodes" in data
 
+    def test_graph_paging(self, client):
+        first = client.get("/api/v1/corporate/graph/COMP001?direction=down&max_nodes=2").json()
+        assert len(first["nodes"]) == 2
+        assert first["next_cursor"]
+        second = client.get("/api/v1/corporate/graph/COMP001",
+                            params={"direction": "down", "max_nodes": 2, "cursor": first["next_cursor"]}).json()
+        assert not {n["id"] for n in first["nodes"]} & {n["id"] for n in second["nodes"]}
+
+    def test_graph_invalid_cursor(self, client):
+        resp = client.get("/api/v1/corporate/graph/COMP001?cursor=garbage")
+        assert resp.status_code == 400
+        first = client.get("/api/v1/corporate/graph/COMP001?direction=down&max_nodes=2").json()
+        # A cursor from one query cannot resume another
+        resp = client.get("/api/v1/corporate/graph/COMP001",
+                          params={"direction": "up", "max_nodes": 2, "cursor": first["next_cursor"]})
+        assert resp.status_code == 400
+
+    def test_graph_as_of(self, client):
+        # Seed edges take effect in 2015 and 2018; nothing was owned before that
+        resp = client.get("/api/v1/corporate/graph/COMP001?as_of=2010-01-01")
+        assert resp.status_code == 200
+        assert resp.json()["edges"] == []
+
+    def test_ownership(self, client):
+        resp = client.get("/api/v1/corporate/ownership/COMP002?direction=owners")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert any(e["company_id"] == "COMP001" for e in data["entries"])
+
+    def test_control(self, client):
+        resp = client.get("/api/v1/corporate/control", params={"owner": "TechGlobal Corp", "company": "COMP002"})
+        assert resp.status_code == 200
+        assert resp.json()["controls"] is True
+        resp = client.get("/api/v1/corporate/control", params={"owner": "COMP002", "company": "COMP001"})
+        assert resp.json()["controls"] is False
+
+    def test_ownership_invalid_direction(self, client):
+        resp = client.get("/api/v1/corporate/ownership/COMP002?direction=sideways")
+        assert resp.status_code == 422
+
 
 class TestLandscapeEndpoint:
     def test_analyze(self, client):
@@ -110,3 +164,57 @@ class TestPatentsEndpoints:
         assert resp.status_code == 200
         data = resp.json()
         assert "results" in data
+
+    def test_search_collapse_families(self, client):
+        container = get_container()
+        base = container.patent_store.get("PAT001")
+        container.patent_store.add(base.model_copy(update={"id": "EP-PAT001", "source": "EPO", "jurisdictions": ["EU"]}))
+        full = client.get("/api/v1/patents/search?q=temperature").json()
+        collapsed = client.get("/api/v1/patents/search?q=temperature&collapse_families=true").json()
+        assert collapsed["total"] == full["total"] - 1
+        first = next(r for r in collapsed["results"] if r["id"] == "PAT001")
+        assert first["family_members"] == ["PAT001", "EP-PAT001"]
+        assert "EU" in first["jurisdictions"]
+
+    def test_ranked_search(self, client):
+        resp = client.get("/api/v1/patents/search?q=wireless+temperature+sensor&rank=true&limit=3")
+        assert resp.status_code == 200
+        results = resp.json()["results"]
+        assert len(results) == 3
+        scores = [r["score"] for r in results]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_classification_breakdown(self, client):
+        resp = client.get("/api/v1/patents/classifications?prefix=G01")
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["prefix"] == "G01"
+        assert all(code.startswith("G01") for code in data["groups"])
+        assert sum(data["groups"].values()) > 0
+
+
+class TestDiskBackedStartup:
+    BOOT = (
+        "import sys\n"
+        "from fastapi.testclient import TestClient\n"
+        "from knot.api.dependencies import get_container\n"
+        "from knot.main import app\n"
+        "with TestClient(app):\n"
+        "    store = get_container().patent_store\n"
+        "    patent = store.get('PAT001')\n"
+        "    print(store.count(), patent.title)\n"
+        "    if sys.argv[1] == 'edit':\n"
+        "        store.add(patent.model_copy(update={'title': 'Edited'}))\n"
+    )
+
+    def _boot(self, path, mode):
+        env = {**os.environ, "KNOT_PATENT_STORE_PATH": path}
+        out = subprocess.run([sys.executable, "-c", self.BOOT, mode], env=env, check=True,
+                             capture_output=True, text=True).stdout
+        return out.strip().splitlines()[-1]
+
+    def test_records_persist_and_are_not_reseeded(self, tmp_path):
+        path = str(tmp_path / "patents.db")
+        count, _ = self._boot(path, "edit").split(" ", 1)
+        # A second boot keeps the edited record instead of seeding over it
+        assert self._boot(path, "read") == f"{count} Edited"
@@ -1,5 +1,8 @@
 """Tests for agent implementations."""
 
+from datetime import date
+
+from knot.models.company import Company, OwnershipEdge
 from knot.models.messages import AgentRequest
 from knot.mock_data.seed import seed_all
 from knot.api.dependencies import Container
@@ -48,6 +51,51 @@ class TestCorporateIntelAgent:
         assert resp.result["resolved"] is True
         assert resp.result["ultimate_parent_name"] == "TechGlobal Corp"
 
+    def test_resolve_parent_pages_patents(self):
+        container = Container()
+        seed_all(container.patent_store, container.graph_store, container.search_store)
+        payload = {"company_name": "SensorTech", "limit": 2}
+        first = container.corporate_intel.execute("resolve_parent", payload)
+        second = container.corporate_intel.execute("resolve_parent", {**payload, "offset": 2})
+        assert len(first["patent_ids"]) == 2
+        assert first["total_patents"] == len(first["patent_ids"]) + len(second["patent_ids"])
+        assert not set(first["patent_ids"]) & set(second["patent_ids"])
+        assert sum(first["patents_by_status"].values()) == first["total_patents"]
+
+    def test_resolve_assignees_leaves_unknown_seed_assignees_unresolved(self):
+        container = Container()
+        seed_all(container.patent_store, container.graph_store, container.search_store)
+        unknown = ["NetSense Technologies", "BuildSmart Technologies LLC", "FiberSense Europe NV"]
+        result = container.corporate_intel.execute("resolve_assignees", {
+            "assignees": unknown + ["InfraGuard Technologies", "EuroSense GmbH"],
+        })
+        resolved = {r["assignee"]: r["company_id"] for r in result["assignee_resolutions"]}
+        assert [resolved[name] for name in unknown] == [None, None, None]
+        assert resolved["InfraGuard Technologies"] == "COMP014"
+        assert resolved["EuroSense GmbH"] == "COMP006"
+
+    def test_resolve_parent_subsidiaries_are_the_rollup_group(self):
+        container = Container()
+        graph_store = container.graph_store
+        for cid in ["P", "Q", "S1", "S2", "S3"]:
+            graph_store.add_company(Company(id=cid, canonical_name=cid))
+        graph_store.add_edge(OwnershipEdge(from_company_id="P", to_company_id="S1", ownership_percentage=100.0))
+        graph_store.add_edge(OwnershipEdge(from_company_id="P", to_company_id="S2", ownership_percentage=100.0))
+        # S3 is reachable from P, but Q holds the larger stake, so it belongs to Q's group
+        graph_store.add_edge(OwnershipEdge(from_company_id="P", to_company_id="S3", ownership_percentage=40.0))
+        graph_store.add_edge(OwnershipEdge(from_company_id="Q", to_company_id="S3", ownership_percentage=60.0,
+                                           effective_date=date(2020, 1, 1)))
+
+        agent = container.corporate_intel
+        result = agent.execute("resolve_parent", {"company_id": "S1"})
+        assert result["subsidiaries"] == ["S1", "S2"]
+        assert result["subsidiary_count"] == 2
+        page = agent.execute("resolve_parent", {"company_id": "S1", "offset": 1, "limit": 1})
+        assert page["subsidiaries"] == ["S2"]
+        before = agent.execute("resolve_parent", {"company_id": "S1", "as_of": "2019-01-01"})
+        assert before["subsidiaries"] == ["S1", "S2", "S3"]
+        assert before["subsidiary_count"] == 3
+
     def test_get_graph(self):
         container = Container()
         seed_all(container.patent_store, container.graph_store, container.search_store)
@@ -59,6 +107,49 @@ class TestCorporateIntelAgent:
         assert "nodes" in resp.result
         assert "edges" in resp.result
 
+    def test_resolve_assignees_groups_and_control(self):
+        container = Container()
+        seed_all(container.patent_store, container.graph_store, container.search_store)
+        resp = container.corporate_intel.handle_request(_make_request("corporate_intel", "resolve_assignees", {
+            "assignees": ["SensorTech Innovations LLC", "TechShield Corp", "Unknown Corp"],
+            "owners": ["TechGlobal Corp"],
+        }))
+        assert resp.status == "success"
+        groups = resp.result["groups"]
+        assert len(groups) == 1 and groups[0]["ultimate_parent_name"] == "TechGlobal Corp"
+        resolved = [r for r in resp.result["assignee_resolutions"] if r["resolved"]]
+        assert all(r["controlled_by"] == ["COMP001"] for r in resolved)
+
+    def test_check_control(self):
+        container = Container()
+        seed_all(container.patent_store, container.graph_store, container.search_store)
+        result = container.corporate_intel.execute("check_control", {"owner": "COMP001", "company": "COMP002"})
+        assert result["controls"] is True
+        result = container.corporate_intel.execute("check_control", {"owner": "COMP002", "company": "COMP001"})
+        assert result["controls"] is False
+
+    def test_effective_ownership(self):
+        container = Container()
+        seed_all(container.patent_store, container.graph_store, container.search_store)
+        req = _make_request("corporate_intel", "effective_ownership", {
+            "company_id": "COMP001",
+        })
+        resp = container.corporate_intel.handle_request(req)
+        assert resp.status == "success"
+        entries = resp.result["entries"]
+        assert entries
+        assert all(e["effective_percentage"] <= 100 for e in entries)
+        assert resp.result["attributed_patent_count"] >= sum(e["patent_count"] for e in entries if e["controlled"])
+
+    def test_effective_ownership_unknown_company(self):
+        container = Container()
+        seed_all(container.patent_store, container.graph_store, container.search_store)
+        req = _make_request("corporate_intel", "effective_ownership", {
+            "company_id": "NOPE",
+        })
+        resp = container.corporate_intel.handle_request(req)
+        assert resp.result["resolved"] is False
+
 
 class TestFTOAnalystAgent:
     def test_analyze_fto(self):
@@ -87,6 +178,29 @@ class TestFTOAnalystAgent:
         assert resp.status == "success"
 
 
+class TestFTOFamilyCollapse:
+    def test_collapsed_mode_analyzes_one_member_per_family(self):
+        container = Container()
+        seed_all(container.patent_store, container.graph_store, container.search_store)
+        base = container.patent_store.get("PAT001")
+        container.patent_store.add(base.model_copy(update={"id": "EP-PAT001", "source": "EPO", "jurisdictions": ["EU"]}))
+        payload = {"description": "wireless temperature sensor with cloud server", "keywords": ["temperature"]}
+
+        full = container.fto_analyst.execute("analyze_fto", payload)["report"]["analyses"]
+        collapsed = container.fto_analyst.execute("analyze_fto", {**payload, "collapse_families": True})
+        collapsed = collapsed["report"]["analyses"]
+        assert len(collapsed) == len(full) - 1
+        family = next(a for a in collapsed if a["patent_id"] == "PAT001")
+        assert family["family_members"] == ["PAT001", "EP-PAT001"]
+        assert family["jurisdictions"] == sorted(set(base.jurisdictions) | {"EU"})
+        assert not any(a["patent_id"] == "EP-PAT001" for a in collapsed)
+
+        req = _make_request("integration", "get_family", {"patent_id": "EP-PAT001"})
+        resp = container.integration.handle_request(req)
+        assert resp.status == "success"
+        assert resp.result["representative_id"] == "PAT001"
+
+
 class TestMarketAnalystAgent:
     def test_match_products(self):
         container = Container()
@@ -126,6 +240,58 @@ class TestValidityResearcherAgent:
         assert "prior_art_results" in resp.result
 
 
+class TestIntegrationAgent:
+    def _container(self):
+        container = Container()
+        seed_all(container.patent_store, container.graph_store, container.search_store)
+        base = container.patent_store.get("PAT001")
+        container.patent_store.add(base.model_copy(update={"id": "DUP1", "title": base.title.upper()}))
+        container.patent_store.add(base.model_copy(update={"id": "DUP2", "title": "Unrelated title"}))
+        return container
+
+    def test_detect_duplicates(self):
+        container = self._container()
+        req = _make_request("integration", "detect_duplicates", {"patent_id": "PAT001"})
+        resp = container.integration.handle_request(req)
+        assert resp.status == "success"
+        assert [(d["patent_id"], d["match_type"]) for d in resp.result["duplicates"]] == [
+            ("DUP1", "title"), ("DUP2", "keywords"),
+        ]
+
+    def test_detect_duplicates_bulk(self):
+        container = self._container()
+        req = _make_request("integration", "detect_duplicates_bulk", {})
+        resp = container.integration.handle_request(req)
+        assert resp.status == "success"
+        assert resp.result["patents_checked"] == container.patent_store.count()
+        groups = resp.result["duplicate_groups"]
+        assert [g["patent_ids"] for g in groups] == [["PAT001", "DUP1", "DUP2"]]
+        pairs = {(p["patent_id_a"], p["patent_id_b"]): p["match_type"] for p in groups[0]["pairs"]}
+        assert pairs[("PAT001", "DUP1")] == "title"
+        assert pairs[("DUP1", "DUP2")] == "keywords"
+
+    def test_detect_duplicates_bulk_subset(self):
+        container = self._container()
+        req = _make_request("integration", "detect_duplicates_bulk", {"patent_ids": ["DUP1", "DUP2", "PAT002"]})
+        resp = container.integration.handle_request(req)
+        assert [g["patent_ids"] for g in resp.result["duplicate_groups"]] == [["DUP1", "DUP2"]]
+
+    def test_ingest_patent_flags_cross_office_duplicates(self):
+        container = Container()
+        seed_all(container.patent_store, container.graph_store, container.search_store)
+        base = container.patent_store.get("PAT001")
+        record = base.model_copy(update={"id": "EPDUP", "source": "EPO" if base.source != "EPO" else "USPTO"})
+        req = _make_request("integration", "ingest_patent", {"patent": record.model_dump(mode="json")})
+        resp = container.integration.handle_request(req)
+        assert resp.status == "success"
+        assert resp.result["cross_office_duplicates"] == ["PAT001"]
+        assert container.patent_store.get("EPDUP") is not None
+
+        req = _make_request("integration", "find_near_duplicates", {"patent_id": "PAT001"})
+        resp = container.integration.handle_request(req)
+        assert [d["patent_id"] for d in resp.result["near_duplicates"]] == ["EPDUP"]
+
+
 class TestRouterAgent:
     def test_fto_query(self):
         container = Container()
@@ -0,0 +1,137 @@
+"""Tests for clustering service."""
+
+import random
+
+from knot.models.patent import Classification, Patent
+from knot.services.clustering import ClusterIndex, cluster_patents
+from knot.services.similarity import keyword_similarity
+from knot.stores.indexes import DisjointSet
+from knot.stores.patent_store import PatentStore
+
+
+def _patent(pid: str, code: str, keywords: list[str]) -> Patent:
+    return Patent(
+        id=pid,
+        source="USPTO",
+        publication_number=pid,
+        title=pid,
+        classifications=[Classification(system="CPC", code=code)] if code else [],
+        keywords=keywords,
+    )
+
+
+class TestDisjointSet:
+    def test_union_and_groups(self):
+        sets = DisjointSet()
+        sets.union("a", "b")
+        sets.union("c", "d")
+        sets.union("b", "d")
+        sets.find("e")
+        assert sets.find("a") == sets.find("c")
+        assert sets.groups() == [["a", "b", "c", "d"], ["e"]]
+
+
+class TestClusterPatents:
+    def test_empty(self):
+        assert cluster_patents([]) == []
+
+    def test_merges_groups_with_shared_keywords(self):
+        patents = [
+            _patent("A", "G01K1/02", ["Temperature", "sensor"]),
+            _patent("B", "H04W4/38", ["wireless", "mesh"]),
+            _patent("C", "G08C17/02", ["temperature", "sensor", "wireless"]),
+            _patent("D", "", []),
+        ]
+        clusters = cluster_patents(patents, similarity_threshold=0.5)
+        assert [(c.id, c.label, c.patent_ids) for c in clusters] == [
+            ("CLU001", "G01K cluster + G08C cluster", ["A", "C"]),
+            ("CLU002", "H04W cluster", ["B"]),
+            ("CLU004", "NONE cluster", ["D"]),
+        ]
+        assert clusters[0].keywords == ["sensor", "temperature", "wireless"]
+        assert clusters[0].classification_codes == ["G01K", "G08C"]
+        assert clusters[0].density == 0.5
+
+    def test_no_remaining_pair_reaches_threshold(self):
+        rng = random.Random(9)
+        vocab = [f"k{i}" for i in range(30)]
+        codes = [f"G{i:02d}K1/00" for i in range(25)]
+        patents = [_patent(f"P{i}", rng.choice(codes), rng.sample(vocab, 4)) for i in range(80)]
+        clusters = cluster_patents(patents, similarity_threshold=0.2)
+        assert sorted(pid for c in clusters for pid in c.patent_ids) == sorted(p.id for p in patents)
+        for i, a in enumerate(clusters):
+            for b in clusters[i + 1:]:
+                assert keyword_similarity(a.keywords, b.keywords) < 0.2
+
+
+def _partition(clusters):
+    return sorted((c.id, sorted(c.patent_ids)) for c in clusters)
+
+
+class TestClusterIndex:
+    def _patents(self, count, seed=4):
+        rng = random.Random(seed)
+        codes = [f"G{i:02d}K1/00" for i in range(12)]
+        vocab = [f"k{i}" for i in range(60)]
+        return [_patent(f"P{i}", rng.choice(codes), rng.sample(vocab, 4)) for i in range(count)]
+
+    def test_rebalance_matches_batch_clustering(self):
+        store = PatentStore()
+        index = ClusterIndex(store, rebalance_every=None)
+        patents = self._patents(60)
+        for patent in patents:
+            store.add(patent)
+        index.rebalance()
+        assert _partition(index.clusters_for(patents)) == _partition(cluster_patents(patents))
+
+    def test_assigns_new_patents_as_they_arrive(self):
+        store = PatentStore()
+        index = ClusterIndex(store, rebalance_every=None)
+        store.add(_patent("A", "G01K1/02", ["temperature", "sensor"]))
+        store.add(_patent("B", "G01K7/00", ["thermistor"]))  # same group as A
+        store.add(_patent("C", "H04W4/38", ["wireless", "mesh"]))  # new group, new cluster
+        store.add(_patent("D", "G08C17/02", ["temperature", "sensor", "thermistor"]))  # merges into A's cluster
+        clusters = index.clusters_for([store.get(pid) for pid in "ABCD"])
+        assert [(c.id, c.patent_ids) for c in clusters] == [("CLU001", ["A", "B", "D"]), ("CLU002", ["C"])]
+        assert clusters[0].classification_codes == ["G01K", "G08C"]
+
+        # Narrowed to a domain: only the matching patents, density relative to them
+        narrowed = index.clusters_for([store.get("D"), store.get("C")])
+        assert [(c.id, c.patent_ids, c.density) for c in narrowed] == [("CLU001", ["D"], 0.5), ("CLU002", ["C"], 0.5)]
+
+        store.add(_patent("B", "H04W4/00", ["wireless"]))  # replaced record moves group
+        assert [c.patent_ids for c in index.clusters_for([store.get(pid) for pid in "ABCD"])] == [["A", "D"], ["B", "C"]]
+
+    def test_background_rebalance(self):
+        store = PatentStore()
+        index = ClusterIndex(store, rebalance_every=30)
+        patents = self._patents(30, seed=7)
+        for patent in patents:
+            store.add(patent)
+        index.wait_for_rebalance()
+        assert _partition(index.clusters_for(patents)) == _partition(cluster_patents(patents))
+
+    def test_background_rebalance_does_not_read_the_store(self):
+        reads = []
+
+        class RecordingStore(PatentStore):
+            def get(self, patent_id):
+                reads.append(patent_id)
+                return super().get(patent_id)
+
+            def get_all(self):
+                reads.append("*")
+                return super().get_all()
+
+        store = RecordingStore()
+        index = ClusterIndex(store, rebalance_every=25)
+        patents = self._patents(24, seed=3)
+        for patent in patents:
+            store.add(patent)
+        # An updated record keeps its place, as it does in the store
+        patents[0] = _patent("P0", "H04W4/00", ["k1", "k2"])
+        reads.clear()
+        store.add(patents[0])
+        index.wait_for_rebalance()
+        assert reads == []
+        assert _partition(index.clusters_for(patents)) == _partition(cluster_patents(store.get_all()))
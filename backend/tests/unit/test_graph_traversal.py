@@ -1,9 +1,12 @@
 """Tests for graph traversal service."""
 
+import random
 from datetime import date
 from knot.stores.graph_store import GraphStore
 from knot.models.company import Company, OwnershipEdge
 from knot.services.graph_traversal import (
+    CycleTracker,
+    detect_cycles,
     find_ultimate_parent,
     get_all_subsidiaries,
 )
@@ -45,3 +48,135 @@ class TestGetAllSubsidiaries:
         store = _build_test_graph()
         subs = get_all_subsidiaries(store, "S2")
         assert len(subs) == 0
+
+
+def _reference_ultimate_parent(store, company_id):
+    """The original uncached parent walk."""
+    visited = set()
+    current = company_id
+    while current not in visited:
+        visited.add(current)
+        parent_edges = store.get_parent_edges(current)
+        if not parent_edges:
+            return current
+        current = max(parent_edges, key=lambda e: e.ownership_percentage).from_company_id
+    return current
+
+
+class TestUltimateParentCache:
+    def test_acquisition_updates_cached_descendants(self):
+        store = _build_test_graph()
+        store.build_ultimate_parent_index()
+        assert find_ultimate_parent(store, "S2") == "P"
+        store.add_company(Company(id="A", canonical_name="Acquirer"))
+        store.add_edge(OwnershipEdge(from_company_id="A", to_company_id="P", ownership_percentage=100.0))
+        assert find_ultimate_parent(store, "S2") == "A"
+        assert find_ultimate_parent(store, "S1") == "A"
+
+    def test_matches_uncached_walk_under_random_edge_updates(self):
+        rng = random.Random(7)
+        store = GraphStore()
+        ids = [f"C{i}" for i in range(40)]
+        for cid in ids:
+            store.add_company(Company(id=cid, canonical_name=cid))
+        for _ in range(120):
+            store.add_edge(OwnershipEdge(
+                from_company_id=rng.choice(ids),
+                to_company_id=rng.choice(ids),
+                ownership_percentage=rng.choice([10.0, 25.0, 51.0, 100.0]),
+            ))
+            probe = rng.sample(ids, 5)
+            for cid in probe:
+                assert find_ultimate_parent(store, cid) == _reference_ultimate_parent(store, cid)
+        for cid in ids:
+            assert find_ultimate_parent(store, cid) == _reference_ultimate_parent(store, cid)
+
+
+class TestDetectCycles:
+    def _store(self, edges):
+        store = GraphStore()
+        for parent, child in edges:
+            store.add_edge(OwnershipEdge(from_company_id=parent, to_company_id=child, ownership_percentage=50.0))
+        return store
+
+    def test_no_cycles_in_tree(self):
+        assert detect_cycles(_build_test_graph()) == []
+
+    def test_finds_cycle_through_non_first_parent(self):
+        # B's first parent is the root R; the cycle only exists via its second parent C
+        store = self._store([("R", "B"), ("A", "B"), ("B", "C"), ("C", "A"), ("X", "X")])
+        cycles = {frozenset(c) for c in detect_cycles(store)}
+        assert cycles == {frozenset({"A", "B", "C"}), frozenset({"X"})}
+
+    def test_tracker_matches_full_recompute(self):
+        rng = random.Random(11)
+        ids = [f"C{i}" for i in range(30)]
+        store = GraphStore()
+        tracker = CycleTracker(store)
+        for _ in range(80):
+            parent, child = rng.choice(ids), rng.choice(ids)
+            store.add_edge(OwnershipEdge(from_company_id=parent, to_company_id=child, ownership_percentage=50.0))
+            tracker.add_edge(parent, child)
+            assert {frozenset(c) for c in tracker.cycles()} == {frozenset(c) for c in detect_cycles(store)}
+
+
+class TestAsOfQueries:
+    def _divestiture_graph(self):
+        # P owns S1 (and through it S2) until S1 is sold to Q at the start of 2022
+        store = GraphStore()
+        store.add_edge(OwnershipEdge(from_company_id="P", to_company_id="S1", ownership_percentage=100.0,
+                                     effective_date=date(2020, 1, 1), end_date=date(2022, 1, 1)))
+        store.add_edge(OwnershipEdge(from_company_id="S1", to_company_id="S2", ownership_percentage=100.0,
+                                     effective_date=date(2020, 1, 1)))
+        store.add_edge(OwnershipEdge(from_company_id="Q", to_company_id="S1", ownership_percentage=100.0,
+                                     effective_date=date(2022, 1, 1)))
+        return store
+
+    def test_ultimate_parent_follows_date(self):
+        store = self._divestiture_graph()
+        assert find_ultimate_parent(store, "S2", as_of=date(2021, 6, 1)) == "P"
+        assert find_ultimate_parent(store, "S2", as_of=date(2022, 1, 1)) == "Q"
+        assert find_ultimate_parent(store, "S2", as_of=date(2019, 1, 1)) == "S2"
+
+    def test_ended_stake_is_not_current(self):
+        store = self._divestiture_graph()
+        assert find_ultimate_parent(store, "S2") == "Q"
+        assert get_all_subsidiaries(store, "P") == []
+        assert get_all_subsidiaries(store, "Q") == ["S1", "S2"]
+
+    def test_as_of_does_not_touch_current_cache(self):
+        store = self._divestiture_graph()
+        assert find_ultimate_parent(store, "S2") == "Q"
+        find_ultimate_parent(store, "S2", as_of=date(2021, 1, 1))
+        assert find_ultimate_parent(store, "S2") == "Q"
+
+    def test_subsidiaries_and_graph_as_of(self):
+        store = self._divestiture_graph()
+        assert get_all_subsidiaries(store, "P", as_of=date(2021, 1, 1)) == ["S1", "S2"]
+        assert get_all_subsidiaries(store, "P", as_of=date(2022, 1, 1)) == []
+        graph = store.get_ownership_graph("S2", as_of=date(2023, 1, 1))
+        assert {(e.from_company_id, e.to_company_id) for e in graph.edges} == {("S1", "S2"), ("Q", "S1")}
+
+    def test_matches_filtered_copy(self):
+        rng = random.Random(5)
+        ids = [f"C{i}" for i in range(15)]
+        edges = []
+        store = GraphStore()
+        for _ in range(40):
+            start = date(2010 + rng.randrange(10), 1, 1) if rng.random() < 0.8 else None
+            end = date(2015 + rng.randrange(10), 6, 1) if rng.random() < 0.5 else None
+            edge = OwnershipEdge(from_company_id=rng.choice(ids), to_company_id=rng.choice(ids),
+                                 ownership_percentage=rng.choice([10.0, 50.0, 100.0]),
+                                 effective_date=start, end_date=end)
+            edges.append(edge)
+            store.add_edge(edge)
+        for year in range(2008, 2026):
+            as_of = date(year, 3, 1)
+            snapshot = GraphStore()
+            for edge in edges:
+                if (edge.effective_date is None or edge.effective_date <= as_of) and (edge.end_date is None or as_of < edge.end_date):
+                    # The copy is the view on as_of, so its edges have not ended
+                    snapshot.add_edge(edge.model_copy(update={"end_date": None}))
+            for cid in ids:
+                assert find_ultimate_parent(store, cid, as_of=as_of) == find_ultimate_parent(snapshot, cid)
+                assert get_all_subsidiaries(store, cid, as_of=as_of) == get_all_subsidiaries(snapshot, cid)
@@ -0,0 +1,44 @@
+"""Tests for the effective ownership engine."""
+
+from datetime import date
+
+import pytest
+
+from knot.models.company import OwnershipEdge
+from knot.services.ownership import effective_holdings, effective_owners
+from knot.stores.graph_store import GraphStore
+
+
+def _store(edges):
+    store = GraphStore()
+    for parent, child, percentage in edges:
+        store.add_edge(OwnershipEdge(from_company_id=parent, to_company_id=child, ownership_percentage=percentage))
+    return store
+
+
+class TestEffectiveOwnership:
+    def test_multiplies_along_chain(self):
+        store = _store([("A", "B", 60.0), ("B", "C", 50.0)])
+        assert effective_holdings(store, "A") == pytest.approx({"B": 60.0, "C": 30.0})
+        assert effective_owners(store, "C") == pytest.approx({"B": 50.0, "A": 30.0})
+
+    def test_sums_parallel_paths(self):
+        # A holds D through B (50% x 40%) and through C (50% x 60%)
+        store = _store([("A", "B", 50.0), ("A", "C", 50.0), ("B", "D", 40.0), ("C", "D", 60.0)])
+        assert effective_holdings(store, "A")["D"] == pytest.approx(50.0)
+
+    def test_cross_holding_cycle_converges(self):
+        # A owns 50% of B and B owns 20% of A: A's stake in B is 50 * (1 + 0.1 + 0.01 + ...)
+        store = _store([("A", "B", 50.0), ("B", "A", 20.0)])
+        holdings = effective_holdings(store, "A")
+        assert set(holdings) == {"B"}
+        assert holdings["B"] == pytest.approx(50.0 / 0.9, rel=1e-4)
+
+    def test_ended_stake_is_ignored(self):
+        store = _store([("A", "B", 60.0)])
+        store.add_edge(OwnershipEdge(from_company_id="B", to_company_id="C", ownership_percentage=50.0,
+                                     end_date=date(2020, 1, 1)))
+        assert effective_holdings(store, "A") == pytest.approx({"B": 60.0})
+
+    def test_unknown_company_has_no_stakes(self):
+        assert effective_holdings(GraphStore(), "MISSING") == {}
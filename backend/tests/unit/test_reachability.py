@@ -0,0 +1,58 @@
+"""Tests for the ownership reachability index."""
+
+import random
+
+from knot.models.company import OwnershipEdge
+from knot.services.graph_traversal import get_all_subsidiaries
+from knot.services.reachability import ReachabilityIndex
+from knot.stores.graph_store import GraphStore
+
+
+def _add(store, parent, child):
+    store.add_edge(OwnershipEdge(from_company_id=parent, to_company_id=child, ownership_percentage=50.0))
+
+
+class TestReachabilityIndex:
+    def test_chain_and_siblings(self):
+        store = GraphStore()
+        index = ReachabilityIndex(store)
+        for parent, child in [("P", "A"), ("A", "B"), ("P", "C")]:
+            _add(store, parent, child)
+        assert index.controls("P", "B")
+        assert index.controls("A", "B")
+        assert not index.controls("B", "A")
+        assert not index.controls("A", "C")
+        assert not index.controls("P", "P")
+        assert not index.controls("P", "UNKNOWN")
+
+    def test_cycle_members_control_each_other(self):
+        store = GraphStore()
+        index = ReachabilityIndex(store)
+        for parent, child in [("A", "B"), ("B", "A"), ("B", "C")]:
+            _add(store, parent, child)
+        assert index.controls("A", "A")
+        assert index.controls("B", "A")
+        assert index.controls("A", "C")
+        assert not index.controls("C", "A")
+
+    def test_rebuilds_after_new_edge(self):
+        store = GraphStore()
+        index = ReachabilityIndex(store)
+        _add(store, "A", "B")
+        assert not index.controls("A", "C")
+        _add(store, "B", "C")
+        assert index.controls("A", "C")
+
+    def test_matches_bfs(self):
+        rng = random.Random(21)
+        for _ in range(30):
+            store = GraphStore()
+            index = ReachabilityIndex(store)
+            ids = [f"C{i}" for i in range(rng.randrange(2, 25))]
+            for _ in range(rng.randrange(40)):
+                _add(store, rng.choice(ids), rng.choice(ids))
+            for owner in ids:
+                subsidiaries = set(get_all_subsidiaries(store, owner))
+                for company in ids:
+                    if company != owner:
+                        assert index.controls(owner, company) == (company in subsidiaries)
@@ -1,8 +1,16 @@
 """Tests for similarity service."""
 
+import random
+
 from knot.services.similarity import (
+    jaccard_from_postings,
+    jaccard_many_to_many,
     jaccard_similarity,
+    minhash_signature,
+    minhash_similarity,
+    similarity_join,
     keyword_similarity,
+    keyword_id_similarity,
     claim_text_similarity,
     determine_risk_level,
 )
@@ -35,6 +43,82 @@ class TestKeywordSimilarity:
         assert keyword_similarity(["Sensor"], ["sensor"]) == 1.0
 
 
+class TestKeywordIdSimilarity:
+    def test_matches_string_jaccard(self):
+        # query {a, b, unknown} vs doc {a, c}: intersection 1, union 4
+        assert keyword_id_similarity({1, 2}, 3, [1, 3]) == 0.25
+
+    def test_empty(self):
+        assert keyword_id_similarity(set(), 0, [1]) == 0.0
+        assert keyword_id_similarity({1}, 1, []) == 0.0
+
+
+class TestBatchJaccard:
+    def _random_sets(self, rng, count):
+        vocab = [f"t{i}" for i in range(12)]
+        return [set(rng.sample(vocab, rng.randint(0, 6))) for _ in range(count)]
+
+    def test_many_to_many_matches_pairwise(self):
+        rng = random.Random(11)
+        rows = self._random_sets(rng, 8)
+        cols = self._random_sets(rng, 10)
+        for threshold in (0.0, 0.2):
+            expected = [
+                (i, j, jaccard_similarity(r, c))
+                for i, r in enumerate(rows)
+                for j, c in enumerate(cols)
+                if jaccard_similarity(r, c) > threshold
+            ]
+            assert jaccard_many_to_many(rows, cols, threshold=threshold) == expected
+
+    def test_from_postings_matches_pairwise(self):
+        rng = random.Random(3)
+        docs = self._random_sets(rng, 30)
+        postings: dict[str, set[int]] = {}
+        for doc, terms in enumerate(docs):
+            for term in terms:
+                postings.setdefault(term, set()).add(doc)
+        query = {"t1", "t2", "t5", "unknown"}
+        hits = jaccard_from_postings(
+            [postings[t] for t in query if t in postings], len(query), lambda doc: len(docs[doc])
+        )
+        expected = sorted(
+            ((i, jaccard_similarity(query, d)) for i, d in enumerate(docs) if jaccard_similarity(query, d) > 0),
+            key=lambda hit: (-hit[1], hit[0]),
+        )
+        assert hits == expected
+
+    def test_similarity_join_matches_all_pairs(self):
+        rng = random.Random(5)
+        for threshold in (0.0, 0.3, 0.5, 0.6, 0.8, 1.0):
+            sets = self._random_sets(rng, 40)
+            expected = [
+                (i, j, jaccard_similarity(sets[i], sets[j]))
+                for i in range(len(sets))
+                for j in range(i + 1, len(sets))
+                if jaccard_similarity(sets[i], sets[j]) > threshold
+            ]
+            assert similarity_join(sets, threshold) == expected
+
+    def test_empty_query(self):
+        assert jaccard_from_postings([], 0, len) == []
+
+
+class TestMinHash:
+    def test_estimates_jaccard(self):
+        a = {f"s{i}" for i in range(100)}
+        b = {f"s{i}" for i in range(50, 150)}  # true Jaccard 1/3
+        sig_a = minhash_signature(a, 256)
+        assert minhash_signature(a, 256) == sig_a
+        assert minhash_similarity(sig_a, sig_a) == 1.0
+        assert abs(minhash_similarity(sig_a, minhash_signature(b, 256)) - 1 / 3) < 0.1
+        assert minhash_similarity(sig_a, minhash_signature({"x", "y"}, 256)) < 0.05
+
+    def test_empty(self):
+        assert len(minhash_signature(set())) == 0
+        assert minhash_similarity(minhash_signature(set()), minhash_signature({"a"})) == 0.0
+
+
 class TestClaimTextSimilarity:
     def test_similar_texts(self):
         score, matched = claim_text_similarity(
@@ -1,12 +1,27 @@
 """Tests for in-memory stores."""
 
-from datetime import date
+import random
+import sqlite3
+import subprocess
+import sys
+from datetime import date, timedelta
+
+import pytest
 from knot.stores.patent_store import PatentStore
+from knot.stores.disk_patent_store import DiskPatentStore
+from knot.stores import graph_store as graph_store_module
 from knot.stores.graph_store import GraphStore
 from knot.stores.search_store import SearchStore
+from knot.stores.portfolio import PortfolioRollup
+from knot.stores.family import FamilyIndex
+from knot.stores import snapshot as snapshot_module
+from knot.stores.snapshot import build_snapshot, load_snapshot
 from knot.models.patent import Patent, Claim, Classification, Inventor
-from knot.models.product import ProductInfo
+from knot.models.product import ProductInfo, ProductMatch
 from knot.models.company import Company, OwnershipEdge
+from knot.models.validity import PriorArtCandidate
+from knot.services.text_processing import extract_keywords
+from knot.cli import main
 
 
 def _make_patent(**overrides):
@@ -58,6 +73,188 @@ class TestPatentStore:
         store = PatentStore()
         assert store.get("NONEXISTENT") is None
 
+    def test_search_matches_title_abstract_and_keywords(self):
+        store = PatentStore()
+        store.add(_make_patent(id="A", title="Wireless Sensor", keywords=["radio"]))
+        store.add(_make_patent(id="B", title="Other", abstract="uses a sensor", keywords=["mesh"]))
+        store.add(_make_patent(id="C", title="Other", keywords=["Radio"]))
+        assert [p.id for p in store.search("SENSOR")] == ["A", "B"]
+        # search() compares keywords verbatim against the lowercased query
+        assert [p.id for p in store.search("radio")] == ["A"]
+
+    def test_search_by_keywords_case_insensitive_in_insertion_order(self):
+        store = PatentStore()
+        store.add(_make_patent(id="B", keywords=["IoT", "sensor"]))
+        store.add(_make_patent(id="A", keywords=["iot"]))
+        store.add(_make_patent(id="C", keywords=["cloud"]))
+        assert [p.id for p in store.search_by_keywords(["IOT"])] == ["B", "A"]
+        assert [p.id for p in store.search_by_keywords(["sensor", "cloud"])] == ["B", "C"]
+        assert store.search_by_keywords(["missing"]) == []
+
+    def test_readd_replaces_index_entries(self):
+        store = PatentStore()
+        store.add(_make_patent(id="A", keywords=["old"]))
+        store.add(_make_patent(id="B", keywords=["new"]))
+        store.add(_make_patent(id="A", keywords=["new"]))
+        assert store.search_by_keywords(["old"]) == []
+        assert [p.id for p in store.search_by_keywords(["new"])] == ["A", "B"]
+
+    def test_keyword_ids_are_interned_lowercase(self):
+        store = PatentStore()
+        store.add(_make_patent(id="A", keywords=["IoT", "Sensor", "iot"]))
+        store.add(_make_patent(id="B", keywords=["sensor"]))
+        ids_a = store.keyword_ids("A")
+        assert len(ids_a) == 2
+        assert sorted(store.vocabulary.decode(ids_a)) == ["iot", "sensor"]
+        assert set(store.keyword_ids("B")) <= set(ids_a)
+        assert store.encode_keywords(["SENSOR", "unknown"]) == set(store.keyword_ids("B"))
+        assert len(store.keyword_ids("MISSING")) == 0
+
+    def test_claim_keyword_ids_follow_updates(self):
+        store = PatentStore()
+        claims = [
+            Claim(number=1, type="independent", text="A wireless sensor node"),
+            Claim(number=2, type="dependent", depends_on=1, text="The node of claim 1 with a battery"),
+        ]
+        store.add(_make_patent(id="A", claims=claims))
+        decoded = [sorted(store.claim_vocabulary.decode(ids)) for ids in store.claim_keyword_ids("A")]
+        assert decoded == [sorted(extract_keywords(c.text)) for c in claims]
+        store.add(_make_patent(id="A", claims=claims[:1]))
+        assert len(store.claim_keyword_ids("A")) == 1
+        assert store.claim_keyword_ids("MISSING") == []
+
+    def test_jurisdiction_and_status_filters(self):
+        store = PatentStore()
+        store.add(_make_patent(id="A", keywords=["iot"], jurisdictions=["US", "IN"]))
+        store.add(_make_patent(id="B", keywords=["iot"], jurisdictions=["EU"], status="expired"))
+        store.add(_make_patent(id="C", keywords=["iot"], jurisdictions=["IN"], status="expired"))
+        assert [p.id for p in store.search_by_keywords(["iot"], ["IN"])] == ["A", "C"]
+        assert [p.id for p in store.search_by_keywords(["iot"], ["IN"], ["active"])] == ["A"]
+        assert [p.id for p in store.search("iot", ["EU", "US"])] == ["A", "B"]
+
+    def test_filter_by_source(self):
+        store = PatentStore()
+        store.add(_make_patent(id="A", source="USPTO"))
+        store.add(_make_patent(id="B", source="EPO"))
+        store.add(_make_patent(id="C", source="EPO", status="expired"))
+        assert [p.id for p in store.filter(sources=["EPO"])] == ["B", "C"]
+        assert [p.id for p in store.filter(sources=["EPO"], statuses=["active"])] == ["B"]
+        assert len(store.filter()) == 3
+        store.add(_make_patent(id="B", source="USPTO"))
+        assert [p.id for p in store.filter(sources=["EPO"])] == ["C"]
+
+    def test_search_by_classification_prefix(self):
+        store = PatentStore()
+        store.add(_make_patent(id="A", classifications=[Classification(system="CPC", code="G01K1/02")]))
+        store.add(_make_patent(id="B", classifications=[
+            Classification(system="CPC", code="H04W4/38"),
+            Classification(system="CPC", code="G01K7/00"),
+        ]))
+        store.add(_make_patent(id="C", classifications=[Classification(system="CPC", code="G06N20/00")]))
+        assert [p.id for p in store.search_by_classification("G01K")] == ["A", "B"]
+        assert [p.id for p in store.search_by_classification("G")] == ["A", "B", "C"]
+        assert store.search_by_classification("A01") == []
+
+    def test_search_ranked_orders_by_relevance(self):
+        store = PatentStore()
+        store.add(_make_patent(id="A", title="Battery Pack", abstract="thermal control", keywords=["battery"]))
+        store.add(_make_patent(id="B", title="Wireless Temperature Sensor", abstract="temperature sensor node",
+                               keywords=["temperature", "sensor"]))
+        store.add(_make_patent(id="C", title="Sensor Housing", abstract="enclosure", keywords=["sensor"],
+                               jurisdictions=["IN"]))
+        ranked = store.search_ranked("temperature sensor", limit=2)
+        assert [p.id for p, _ in ranked] == ["B", "C"]
+        assert ranked[0][1] > ranked[1][1]
+        assert [p.id for p, _ in store.search_ranked("temperature sensor", ["IN"])] == ["C"]
+        assert store.search_ranked("unrelated") == []
+
+    def test_classification_breakdown(self):
+        store = PatentStore()
+        store.add(_make_patent(id="A", classifications=[Classification(system="CPC", code="G01K1/02")]))
+        store.add(_make_patent(id="B", classifications=[
+            Classification(system="CPC", code="G01K1/08"),
+            Classification(system="CPC", code="G01K7/00"),
+        ]))
+        store.add(_make_patent(id="C", classifications=[Classification(system="CPC", code="G06N20/00")]))
+        assert store.classification_breakdown("G") == {"G01": 2, "G06": 1}
+        assert store.classification_breakdown("G01K") == {"G01K1": 2, "G01K7": 1}
+        assert store.classification_breakdown("G01K1") == {"G01K1/02": 1, "G01K1/08": 1}
+
+    def test_title_index(self):
+        store = PatentStore()
+        store.add(_make_patent(id="A", title="Wireless Sensor!"))
+        store.add(_make_patent(id="B", title="Battery Pack"))
+        store.add(_make_patent(id="C", title="wireless   SENSOR"))
+        assert [p.id for p in store.same_title("WIRELESS sensor")] == ["A", "C"]
+        assert store.title_groups() == [["A", "C"]]
+        store.add(_make_patent(id="C", title="Battery pack"))
+        assert store.title_groups() == [["B", "C"]]
+
+    def test_near_duplicates(self):
+        text = "a wireless temperature sensor node reporting readings over a low power mesh radio network"
+        claims = [Claim(number=1, type="independent", text="A sensor node comprising a thermistor and a mesh radio")]
+        store = PatentStore()
+        store.add(_make_patent(id="A", title="Mesh sensor node", abstract=text, claims=claims))
+        store.add(_make_patent(id="B", title="Battery pack", abstract="lithium cells with thermal runaway protection"))
+        incoming = _make_patent(id="EP1", title="Mesh sensor node", abstract=text + " in buildings", claims=claims)
+        assert [(p.id, score > 0.5) for p, score in store.near_duplicates(incoming)] == [("A", True)]
+        store.add(incoming)
+        assert [p.id for p, _ in store.near_duplicates(store.get("A"))] == ["EP1"]
+        store.add(_make_patent(id="EP1", title="Battery pack", abstract="lithium cells with thermal runaway protection"))
+        assert store.near_duplicates(store.get("A")) == []
+
+
+class TestDiskPatentStore:
+    def test_add_get_and_search(self, tmp_path):
+        store = DiskPatentStore(str(tmp_path / "patents.db"), cache_size=1)
+        store.add(_make_patent(id="A", keywords=["iot"], jurisdictions=["IN"]))
+        store.add(_make_patent(id="B", keywords=["iot", "sensor"]))
+        assert store.count() == 2
+        assert store.get("A").claims[0].text == "A test claim"
+        assert store.get("MISSING") is None
+        assert [p.id for p in store.search_by_keywords(["iot"], ["IN"])] == ["A"]
+        store.close()
+
+    def test_reopen_rebuilds_indexes_in_insertion_order(self, tmp_path):
+        path = str(tmp_path / "patents.db")
+        store = DiskPatentStore(path)
+        store.add(_make_patent(id="B", keywords=["iot"]))
+        store.add(_make_patent(id="A", keywords=["iot"]))
+        store.add(_make_patent(id="B", keywords=["iot"], title="Updated"))
+        store.close()
+
+        reopened = DiskPatentStore(path)
+        assert reopened.count() == 2
+        assert [p.id for p in reopened.search_by_keywords(["iot"])] == ["B", "A"]
+        assert reopened.get("B").title == "Updated"
+        assert [p.id for p in reopened.get_all()] == ["B", "A"]
+        reopened.close()
+
+    def test_adds_survive_process_exit_without_close(self, tmp_path):
+        path = str(tmp_path / "patents.db")
+        script = (
+            "import sys\n"
+            "from knot.models.patent import Patent\n"
+            "from knot.stores.disk_patent_store import DiskPatentStore\n"
+            "store = DiskPatentStore(sys.argv[1])\n"
+            "for i in range(30):\n"
+            "    store.add(Patent(id=f'P{i}', source='USPTO', publication_number=f'US{i}', title='T'))\n"
+        )
+        subprocess.run([sys.executable, "-c", script, path], check=True)
+        reopened = DiskPatentStore(path)
+        assert reopened.count() == 30
+        reopened.close()
+
+    def test_batch_commits_once_at_the_end(self, tmp_path):
+        path = str(tmp_path / "patents.db")
+        store = DiskPatentStore(path)
+        with store.batch():
+            store.add(_make_patent(id="A"))
+            store.add(_make_patent(id="B"))
+            assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM patents").fetchone()[0] == 0
+        assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM patents").fetchone()[0] == 2
+        store.close()
+
 
 class TestGraphStore:
     def test_add_and_get_company(self):
@@ -88,6 +285,39 @@ class TestGraphStore:
         assert found is not None
         assert found.id == "C001"
 
+    def test_fuzzy_name_resolution_picks_best_match(self):
+        store = GraphStore()
+        store.add_company(Company(id="C001", canonical_name="TechShield Corp", aliases=["TechShield"]))
+        store.add_company(Company(id="C002", canonical_name="TechGlobal Corp", aliases=["TechGlobal Corporation"]))
+        # "corp" is a substring of both; the old scan returned whichever came first
+        found = store.find_company_by_name("Tech Global Corporation Ltd")
+        assert found is not None and found.id == "C002"
+        assert store.find_company_by_name("Unrelated Widgets") is None
+
+    def test_fuzzy_name_resolution_ignores_generic_words(self):
+        store = GraphStore()
+        store.add_company(Company(id="C001", canonical_name="InfraGuard Technologies", aliases=["InfraGuard"]))
+        store.add_company(Company(id="C002", canonical_name="EuroSense GmbH", aliases=["EuroSense"]))
+        assert store.find_company_by_name("InfraGuard Technologies Inc").id == "C001"
+        assert store.find_company_by_name("NetSense Technologies") is None
+        assert store.find_company_by_name("FiberSense Europe NV") is None
+
+    def test_fuzzy_name_resolution_needs_a_clear_winner(self):
+        store = GraphStore()
+        store.add_company(Company(id="C001", canonical_name="Acme Sensing"))
+        store.add_company(Company(id="C002", canonical_name="Acme Sensors"))
+        assert store.find_company_by_name("Acme Sens") is None  # ties both names
+        assert store.find_company_by_name("Acme Sensors Inc").id == "C002"
+
+    def test_search_companies_by_name_ranked(self):
+        store = GraphStore()
+        store.add_company(Company(id="C001", canonical_name="SensorTech Innovations LLC", aliases=["SensorTech"]))
+        store.add_company(Company(id="C002", canonical_name="Sensor Holdings"))
+        ranked = store.search_companies_by_name("SensorTech Inc")
+        assert ranked[0][0].id == "C001"
+        assert all(0.0 < score <= 1.0 for _, score in ranked)
+        assert [score for _, score in ranked] == sorted((score for _, score in ranked), reverse=True)
+
     def test_ownership_edges(self):
         store = GraphStore()
         edge = OwnershipEdge(
@@ -102,6 +332,115 @@ class TestGraphStore:
         assert len(parent_edges) == 1
         assert parent_edges[0].from_company_id == "C001"
 
+    def test_stake_ending_later_leaves_current_view(self, monkeypatch):
+        store = GraphStore()
+        rebuilds = []
+        store.add_listener(lambda item: rebuilds.append(item))
+        tomorrow = date.today() + timedelta(days=1)
+        store.add_edge(OwnershipEdge(from_company_id="P", to_company_id="S", ownership_percentage=100.0,
+                                     end_date=tomorrow))
+        assert store.ultimate_parent("S") == "P"
+
+        class Tomorrow(date):
+            @classmethod
+            def today(cls):
+                return tomorrow
+
+        monkeypatch.setattr(graph_store_module, "date", Tomorrow)
+        assert store.ultimate_parent("S") == "S"
+        assert store.get_subsidiary_edges("P") == []
+        assert len(store.get_subsidiary_edges("P", as_of=date.today())) == 1
+        assert rebuilds[-1] is None
+
+    def test_adjacency_and_ownership_graph(self):
+        store = GraphStore()
+        for cid in ["P", "S1", "S2", "X"]:
+            store.add_company(Company(id=cid, canonical_name=cid))
+        store.add_edge(OwnershipEdge(from_company_id="P", to_company_id="S1", ownership_percentage=100.0))
+        store.add_edge(OwnershipEdge(from_company_id="S1", to_company_id="S2", ownership_percentage=60.0))
+        store.add_edge(OwnershipEdge(from_company_id="X", to_company_id="S2", ownership_percentage=40.0))
+        assert [e.to_company_id for e in store.get_subsidiary_edges("S1")] == ["S2"]
+        assert [e.from_company_id for e in store.get_parent_edges("S2")] == ["S1", "X"]
+        assert store.get_parent_edges("P") == []
+
+        graph = store.get_ownership_graph("S1")
+        assert {n.id for n in graph.nodes} == {"P", "S1", "S2", "X"}
+        assert len(graph.edges) == 3
+
+    def test_bulk_load_matches_incremental_adds(self):
+        rng = random.Random(4)
+        companies = [Company(id=f"C{i}", canonical_name=f"Company {i}", patent_ids=[f"P{i}"]) for i in range(30)]
+        edges = [
+            OwnershipEdge(from_company_id=f"C{rng.randrange(30)}", to_company_id=f"C{rng.randrange(30)}",
+                          ownership_percentage=rng.choice([20.0, 60.0]))
+            for _ in range(40)
+        ]
+        incremental = GraphStore()
+        for company in companies:
+            incremental.add_company(company)
+        for edge in edges:
+            incremental.add_edge(edge)
+        bulk = GraphStore()
+        patent_store = PatentStore()
+        for company in companies:
+            patent_store.add(_make_patent(id=company.patent_ids[0]))
+        rollup = PortfolioRollup(bulk, patent_store)
+        bulk.bulk_load(companies, edges)
+
+        for company in companies:
+            assert bulk.ultimate_parent(company.id) == incremental.ultimate_parent(company.id)
+            assert bulk.get_parent_edges(company.id) == incremental.get_parent_edges(company.id)
+        assert bulk.find_company_by_name("company 7").id == "C7"
+        assert sum(len(rollup.get(c.id).companies) for c in companies) == len(companies)
+
+    def test_ownership_graph_depth_and_direction(self):
+        store = GraphStore()
+        for parent, child in [("P", "S1"), ("S1", "S2"), ("S2", "S3"), ("X", "S2")]:
+            store.add_edge(OwnershipEdge(from_company_id=parent, to_company_id=child, ownership_percentage=50.0))
+        for cid in ["P", "S1", "S2", "S3", "X"]:
+            store.add_company(Company(id=cid, canonical_name=cid))
+
+        down = store.get_ownership_graph("S1", direction="down", max_depth=1)
+        assert [n.id for n in down.nodes] == ["S1", "S2"]
+        assert down.frontier == ["S2"]
+        up = store.get_ownership_graph("S2", direction="up")
+        assert {n.id for n in up.nodes} == {"S2", "S1", "X", "P"}
+        assert up.frontier == []
+
+    def test_ownership_graph_pages_cover_graph_once(self):
+        rng = random.Random(8)
+        store = GraphStore()
+        for _ in range(60):
+            store.add_edge(OwnershipEdge(from_company_id=f"C{rng.randrange(25)}", to_company_id=f"C{rng.randrange(25)}",
+                                         ownership_percentage=50.0))
+        for i in range(25):
+            store.add_company(Company(id=f"C{i}", canonical_name=f"C{i}"))
+
+        full = store.get_ownership_graph("C0")
+        nodes, edges, cursor = [], [], None
+        while True:
+            page = store.get_ownership_graph("C0", max_nodes=4, cursor=cursor)
+            assert len(page.nodes) <= 4
+            nodes += page.nodes
+            edges += page.edges
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert [n.id for n in nodes] == [n.id for n in full.nodes]
+        assert sorted(map(id, edges)) == sorted(map(id, full.edges))
+        assert len({id(e) for e in edges}) == len(edges)
+        visited = {n.id for n in full.nodes}
+        assert len(full.edges) == sum(1 for e in store._edges if e.from_company_id in visited and e.to_company_id in visited)
+
+    def test_ownership_graph_rejects_foreign_cursor(self):
+        store = GraphStore()
+        store.add_edge(OwnershipEdge(from_company_id="A", to_company_id="B", ownership_percentage=50.0))
+        cursor = store.get_ownership_graph("A", max_nodes=1).next_cursor
+        with pytest.raises(ValueError):
+            store.get_ownership_graph("B", max_nodes=1, cursor=cursor)
+        with pytest.raises(ValueError):
+            store.get_ownership_graph("A", max_nodes=1, cursor="not-a-cursor")
+
 
 class TestSearchStore:
     def test_add_and_get_products(self):
@@ -115,3 +454,224 @@ class TestSearchStore:
         store.add_product(product)
         products = store.get_all_products()
         assert len(products) == 1
+
+    def test_product_index(self):
+        store = SearchStore()
+        store.add_product(ProductInfo(id="P1", name="Smart Thermostat", manufacturer="Acme",
+                                      description="Wireless temperature sensor for homes"))
+        store.add_product(ProductInfo(id="P2", name="Power Bank", manufacturer="Volt",
+                                      description="Portable lithium battery"))
+        assert [p.id for p in store.product_candidates(["Temperature", "grid"])] == ["P1"]
+        assert "thermostat" in store.product_keywords("P1")
+        assert [p.id for p in store.search_products("volt battery")] == ["P2"]
+
+        # Re-adding a product replaces its indexed terms
+        store.add_product(ProductInfo(id="P1", name="Smart Plug", manufacturer="Acme", description="Relay switch"))
+        assert store.product_candidates(["temperature"]) == []
+        assert [p.id for p in store.product_candidates(["relay"])] == ["P1"]
+
+    def test_product_matches_by_patent(self):
+        store = SearchStore()
+        for patent_id, product_id in [("PAT1", "P1"), ("PAT2", "P1"), ("PAT1", "P2")]:
+            store.add_product_match(ProductMatch(patent_id=patent_id, product_id=product_id, product_name="x",
+                                                 manufacturer="y", confidence_score=0.5))
+        assert [m.product_id for m in store.get_matches_for_patent("PAT1")] == ["P1", "P2"]
+        assert store.get_matches_for_patent("PAT3") == []
+        # All matches keep the order they were added in, across patents
+        assert [(m.patent_id, m.product_id) for m in store.get_all_matches()] == [
+            ("PAT1", "P1"), ("PAT2", "P1"), ("PAT1", "P2"),
+        ]
+
+    def test_prior_art_search_matches_scan_with_date_cutoff(self):
+        rng = random.Random(9)
+        words = ["sensor", "wireless", "battery", "thermal", "mesh", "radio", "probe", "grid"]
+        store = SearchStore()
+        for i in range(80):
+            store.add_prior_art(PriorArtCandidate(
+                id=f"PA{rng.randrange(60)}",
+                title=" ".join(rng.sample(words, 2)).title(),
+                source_type="paper",
+                source="test",
+                publication_date=date(2000 + rng.randrange(20), 1, 1) if rng.random() < 0.9 else None,
+                relevant_text=" ".join(rng.sample(words, 3)),
+                keywords=[w.upper() for w in rng.sample(words, 2)],
+            ))
+
+        def scan(keywords, cutoff):
+            kw_set = {k.lower() for k in keywords}
+            return [
+                pa.id for pa in store.get_all_prior_art()
+                if kw_set & ({k.lower() for k in pa.keywords} | set(pa.title.lower().split())
+                             | set(pa.relevant_text.lower().split()))
+                and (cutoff is None or pa.publication_date is None or pa.publication_date < cutoff)
+            ]
+
+        for _ in range(50):
+            keywords = rng.sample(words, 2)
+            cutoff = rng.choice([None, date(2005, 1, 1), date(2010, 6, 1), date(2030, 1, 1)])
+            assert [pa.id for pa in store.search_prior_art(keywords, cutoff)] == scan(keywords, cutoff)
+
+
+class TestPortfolioRollup:
+    def _state(self, rollup, graph_store):
+        roots = {graph_store.ultimate_parent(c.id) for c in graph_store.get_all_companies()}
+        return {
+            root: (list(rollup.get(root).docs), dict(rollup.get(root).by_jurisdiction),
+                   dict(rollup.get(root).by_status), dict(rollup.get(root).by_classification))
+            for root in roots
+        }
+
+    def test_rolls_up_subsidiary_patents(self):
+        patent_store, graph_store = PatentStore(), GraphStore()
+        rollup = PortfolioRollup(graph_store, patent_store)
+        graph_store.add_company(Company(id="P", canonical_name="Parent", patent_ids=["A"]))
+        graph_store.add_company(Company(id="S", canonical_name="Sub", patent_ids=["B", "C"]))
+        patent_store.add(_make_patent(id="A", jurisdictions=["US", "EU"]))
+        patent_store.add(_make_patent(id="B", status="expired"))
+        assert len(rollup.get("S")) == 1
+        graph_store.add_edge(OwnershipEdge(from_company_id="P", to_company_id="S", ownership_percentage=100.0))
+        patent_store.add(_make_patent(id="C"))
+
+        portfolio = rollup.get("P")
+        assert len(portfolio) == 3
+        assert rollup.patent_ids(portfolio, offset=1, limit=1) == ["B"]
+        assert portfolio.by_jurisdiction == {"US": 3, "EU": 1}
+        assert portfolio.by_status == {"active": 2, "expired": 1}
+        assert len(rollup.get("S")) == 0
+
+    def test_group_without_stored_patents_keeps_its_companies(self):
+        patent_store, graph_store = PatentStore(), GraphStore()
+        rollup = PortfolioRollup(graph_store, patent_store)
+        graph_store.add_company(Company(id="P", canonical_name="Parent", patent_ids=["A"]))
+        graph_store.add_company(Company(id="S", canonical_name="Sub"))
+        graph_store.add_edge(OwnershipEdge(from_company_id="P", to_company_id="S", ownership_percentage=100.0))
+        portfolio = rollup.get("P")
+        assert len(portfolio) == 0
+        assert sorted(portfolio.companies) == ["P", "S"]
+
+    def test_ended_stake_leaves_the_group(self):
+        patent_store, graph_store = PatentStore(), GraphStore()
+        rollup = PortfolioRollup(graph_store, patent_store)
+        graph_store.add_company(Company(id="P", canonical_name="Parent", patent_ids=["A"]))
+        graph_store.add_company(Company(id="S", canonical_name="Sub", patent_ids=["B"]))
+        patent_store.add(_make_patent(id="A"))
+        patent_store.add(_make_patent(id="B"))
+        graph_store.add_edge(OwnershipEdge(from_company_id="P", to_company_id="S", ownership_percentage=100.0,
+                                           effective_date=date(2015, 1, 1), end_date=date(2022, 1, 1)))
+        assert graph_store.ultimate_parent("S") == "S"
+        assert rollup.patent_ids(rollup.get("P")) == ["A"]
+        assert rollup.patent_ids(rollup.get("S")) == ["B"]
+
+    def test_incremental_matches_rebuild(self):
+        rng = random.Random(3)
+        patent_store, graph_store = PatentStore(), GraphStore()
+        rollup = PortfolioRollup(graph_store, patent_store)
+        company_ids = [f"C{i}" for i in range(12)]
+        patent_ids = [f"PAT{i}" for i in range(30)]
+        for _ in range(120):
+            action = rng.random()
+            if action < 0.3:
+                graph_store.add_company(Company(id=rng.choice(company_ids), canonical_name="Co",
+                                                patent_ids=rng.sample(patent_ids, 3)))
+            elif action < 0.6:
+                graph_store.add_edge(OwnershipEdge(from_company_id=rng.choice(company_ids),
+                                                   to_company_id=rng.choice(company_ids),
+                                                   ownership_percentage=rng.choice([30.0, 60.0, 100.0])))
+            else:
+                patent_store.add(_make_patent(id=rng.choice(patent_ids), status=rng.choice(["active", "expired"]),
+                                              jurisdictions=rng.sample(["US", "EU", "IN"], 2)))
+            fresh = PortfolioRollup(graph_store, patent_store)
+            assert self._state(rollup, graph_store) == self._state(fresh, graph_store)
+
+
+class TestFamilyIndex:
+    TEXT = "a wireless temperature sensor node reporting readings over a low power mesh radio network"
+
+    def test_groups_cross_office_filings(self):
+        store = PatentStore()
+        families = FamilyIndex(store)
+        store.add(_make_patent(id="US1", source="USPTO", abstract=self.TEXT, family_id="F1"))
+        store.add(_make_patent(id="EP1", source="EPO", abstract=self.TEXT))
+        store.add(_make_patent(id="IN1", source="CGPDTM", abstract="unrelated", family_id="F1"))
+        store.add(_make_patent(id="US2", source="USPTO", abstract="lithium battery pack with thermal protection"))
+        family = families.family_id("EP1")
+        assert family == "F1"
+        assert families.members(family) == ["US1", "EP1", "IN1"]
+        assert families.representative(family) == "US1"
+        assert families.family_id("US2") != family
+        groups = families.collapse([store.get("EP1"), store.get("US2"), store.get("US1")])
+        assert [[p.id for p in g] for g in groups] == [["EP1", "US1"], ["US2"]]
+
+    def test_same_office_filings_stay_separate(self):
+        store = PatentStore()
+        families = FamilyIndex(store)
+        store.add(_make_patent(id="US1", source="USPTO", abstract=self.TEXT))
+        store.add(_make_patent(id="US2", source="USPTO", abstract=self.TEXT))
+        assert families.family_id("US1") != families.family_id("US2")
+
+    def test_incremental_matches_rebuild(self):
+        store = PatentStore()
+        families = FamilyIndex(store)
+        store.add(_make_patent(id="US1", source="USPTO", abstract=self.TEXT))
+        store.add(_make_patent(id="EP1", source="EPO", abstract=self.TEXT))
+        store.add(_make_patent(id="IN1", source="CGPDTM", abstract=self.TEXT))
+        store.add(_make_patent(id="EP1", source="EPO", abstract="lithium battery pack with thermal protection"))
+        incremental = {pid: families.family_id(pid) for pid in ("US1", "EP1", "IN1")}
+        assert incremental["EP1"] != incremental["US1"] == incremental["IN1"]
+        families.rebuild()
+        assert {pid: families.family_id(pid) for pid in ("US1", "EP1", "IN1")} == incremental
+
+
+class TestSnapshot:
+    def test_round_trip_restores_stores_and_indexes(self, tmp_path, seeded_container):
+        path = tmp_path / "knot.snapshot"
+        build_snapshot(path, seeded_container.patent_store, seeded_container.graph_store,
+                       seeded_container.search_store)
+
+        patent_store, graph_store, search_store = PatentStore(), GraphStore(), SearchStore()
+        assert load_snapshot(path, patent_store, graph_store, search_store) is True
+        assert patent_store.count() == seeded_container.patent_store.count()
+        assert graph_store.count() == seeded_container.graph_store.count()
+        assert len(search_store.get_all_prior_art()) == len(seeded_container.search_store.get_all_prior_art())
+        expected = [p.id for p in seeded_container.patent_store.search_by_keywords(["sensor"], ["US"])]
+        assert [p.id for p in patent_store.search_by_keywords(["sensor"], ["US"])] == expected
+
+    def test_missing_snapshot_returns_false(self, tmp_path):
+        store = PatentStore()
+        assert load_snapshot(tmp_path / "none.snapshot", store, GraphStore(), SearchStore()) is False
+        assert store.count() == 0
+
+    def test_stale_seed_data_is_rejected(self, tmp_path, seeded_container, monkeypatch):
+        path = tmp_path / "knot.snapshot"
+        build_snapshot(path, seeded_container.patent_store, seeded_container.graph_store,
+                       seeded_container.search_store)
+        monkeypatch.setattr(snapshot_module, "seed_data_hash", lambda: "edited")
+        store = PatentStore()
+        assert load_snapshot(path, store, GraphStore(), SearchStore()) is False
+        assert store.count() == 0
+
+    def test_corrupt_or_truncated_snapshot_returns_false(self, tmp_path, seeded_container):
+        path = tmp_path / "knot.snapshot"
+        build_snapshot(path, seeded_container.patent_store, seeded_container.graph_store,
+                       seeded_container.search_store)
+        data = path.read_bytes()
+        header = data[:data.index(b"\n") + 1]
+        for body in [data[len(header):len(data) // 2], b"not a pickle"]:
+            path.write_bytes(header + body)
+            store = PatentStore()
+            assert load_snapshot(path, store, GraphStore(), SearchStore()) is False
+            assert store.count() == 0
+
+    def test_snapshot_writable_by_others_is_ignored(self, tmp_path, seeded_container):
+        path = tmp_path / "knot.snapshot"
+        build_snapshot(path, seeded_container.patent_store, seeded_container.graph_store,
+                       seeded_container.search_store)
+        path.chmod(0o666)
+        assert load_snapshot(path, PatentStore(), GraphStore(), SearchStore()) is False
+
+    def test_cli_build(self, tmp_path):
+        path = tmp_path / "cli.snapshot"
+        main(["snapshot", "build", "--output", str(path)])
+        store = PatentStore()
+        assert load_snapshot(path, store, GraphStore(), SearchStore()) is True
+        assert store.count() > 0
@@ -6,6 +6,9 @@ from knot.services.text_processing import (
     simulate_ocr,
     extract_claim_numbers,
     detect_language,
+    trigrams,
+    company_name_core,
+    shingles,
 )
 
 
@@ -58,6 +61,36 @@ class TestExtractKeywords:
         assert extract_keywords("") == []
 
 
+class TestTrigrams:
+    def test_padded_and_case_insensitive(self):
+        assert trigrams("Ab") == {" ab", "ab "}
+        assert trigrams("TG Corp") == trigrams("tg  corp!")
+
+    def test_empty(self):
+        assert trigrams("  ") == set()
+
+
+class TestCompanyNameCore:
+    def test_drops_legal_suffixes_and_generic_words(self):
+        assert company_name_core("BuildSmart Technologies LLC") == "buildsmart"
+        assert company_name_core("FiberSense Europe NV") == "fibersense"
+        assert company_name_core("Tech Global Corporation Ltd") == "tech global"
+
+    def test_keeps_all_generic_name(self):
+        assert company_name_core("Systems Inc") == "systems inc"
+
+
+class TestShingles:
+    def test_word_shingles_skip_stop_words(self):
+        assert shingles("The wireless sensor node with battery", size=2) == {
+            "wireless sensor", "sensor node", "node battery",
+        }
+
+    def test_short_and_empty_text(self):
+        assert shingles("wireless sensor") == {"wireless sensor"}
+        assert shingles("the of") == set()
+
+
 class TestSimulateOCR:
     def test_returns_normalized_text(self):
         result = simulate_ocr("RAW OCR TEXT WITH   SPACES")
@@ -4,6 +4,6 @@ export function resolveCompany(companyName) {
   return client.post('/corporate/resolve', { company_name: companyName })
 }
 
-export function getOwnershipGraph(companyId) {
-  return client.get(`/corporate/graph/${companyId}`)
+export function getOwnershipGraph(companyId, params = {}) {
+  return client.get(`/corporate/graph/${companyId}`, { params })
 }